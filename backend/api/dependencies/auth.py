@@ -4,22 +4,50 @@ from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from datetime import datetime, timedelta, timezone
-from backend.database.persistent.models import User
+from backend.database.cache.models import CachedUser
 from backend.api.dependencies.database import database_service_dependency
+from backend.handler.session.token_revocation import token_revocation
 import inspect
+import time
+import uuid
 from backend.config.settings import (
     JWT_SECRET_KEY,
     JWT_ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
 )
 
 # OAuth2 setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
+def decode_token(token: str, token_type: str) -> dict:
+    """
+    Decode and validate a token of the given type ("access" or "refresh")
+
+    Raises:
+        JWTError: If the token is invalid, expired, of another type or revoked
+    """
+    payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    if payload.get("type") != token_type or payload.get("user_id") is None:
+        raise JWTError(f"Not an {token_type} token")
+    if token_revocation.is_revoked(payload):
+        raise JWTError("Token has been revoked")
+    return payload
+
+
 def get_current_user(
     db_service: database_service_dependency, token: str = Depends(oauth2_scheme)
-):
+) -> CachedUser:
+    """
+    Resolve the user of the request from the token's user_id
+
+    The access token is validated statelessly plus one revocation lookup in Redis,
+    users are served from the in-process user cache, so authenticating a request
+    normally costs no database query. A token whose role no longer matches the
+    user's role (e.g. an admin was demoted) is rejected, after reloading the user
+    once in case the cached entry predates a role change made in another worker.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -27,33 +55,62 @@ def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = decode_token(token, "access")
     except JWTError:
         raise credentials_exception
 
-    user = db_service.get_user_by_email(email)
+    user = db_service.get_cached_user(payload["user_id"])
     if user is None:
         raise credentials_exception
 
+    role = payload.get("role")
+    if role is not None and role != user.role.value:
+        # Another worker may have changed the role, this worker's entry predates it
+        user = db_service.reload_cached_user(payload["user_id"])
+        if user is None or role != user.role.value:
+            raise credentials_exception
+
     return user
 
 
-current_user_dependency = Annotated[User, Depends(get_current_user)]
+current_user_dependency = Annotated[CachedUser, Depends(get_current_user)]
 
 
-def create_access_token(data: dict, expires_delta: timedelta = None):
+def _encode_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (
-        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update(
+        {
+            "type": token_type,
+            "jti": str(uuid.uuid4()),
+            "iat": time.time(),
+            "exp": datetime.now(timezone.utc) + expires_delta,
+        }
     )
-    to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
-def admin_only(current_user: User = Depends(get_current_user)):
+def create_access_token(data: dict, expires_delta: timedelta = None):
+    return _encode_token(
+        data, "access", expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def create_refresh_token(data: dict, family: str | None = None):
+    """
+    Create a refresh token
+
+    Args:
+        data: Claims of the token (sub, user_id, role)
+        family: Family of the rotated token, a new family is started at login
+    """
+    return _encode_token(
+        {**data, "family": family or str(uuid.uuid4())},
+        "refresh",
+        timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def admin_only(current_user: CachedUser = Depends(get_current_user)):
     """Check if the current user is an admin"""
     if not current_user.role.is_admin():
         raise HTTPException(status_code=403, detail="Admin privileges required")
@@ -91,7 +148,7 @@ def require_resource_access(resource_type: ResourceType) -> Callable:
         current_user: current_user_dependency,
         db_service: database_service_dependency,
         **path_params,  # This will receive all path parameters
-    ) -> User:
+    ) -> CachedUser:
         # Get the ID from the correct path parameter
         resource_id = path_params[param_name]
 
@@ -138,5 +195,5 @@ def require_resource_access(resource_type: ResourceType) -> Callable:
 
 
 current_user_resource_access_dependency = Annotated[
-    User, Depends(require_resource_access(ResourceType.USER))
+    CachedUser, Depends(require_resource_access(ResourceType.USER))
 ]
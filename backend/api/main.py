@@ -1,11 +1,16 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api.routers import cases, users, auth, chat
+from backend.api.routers import cases, users, auth, chat, search
+from backend.api.middleware.query_stats import query_stats_middleware
+from backend.api.dependencies.auth import admin_only
+from backend.handler.database.query_cache import query_cache
 from backend.database.persistent.seed import Seeder
 from backend.services.database_service import DatabaseService
 from backend.handler.database.database_handler import DatabaseHandler
 from backend.database.persistent.config import get_db
+from backend.utils.password_utils import PasswordHasherBusyError
 import uvicorn
 
 
@@ -53,11 +58,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add SQL statistics per request
+app.middleware("http")(query_stats_middleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(cases.router, prefix="/cases", tags=["Cases"])
 app.include_router(chat.router, prefix="/chat", tags=["Chat"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
+
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    """Shed login and signup load instead of queueing unbounded Argon2 work"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Zu viele Anfragen, bitte versuche es gleich noch einmal."},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -65,5 +84,11 @@ def read_root():
     return {"message": "Wilkommen bei der PAPI BOT API"}
 
 
+@app.get("/cache_stats", dependencies=[Depends(admin_only)])
+def read_cache_stats():
+    """Hit ratios of the query cache of this worker"""
+    return query_cache.stats()
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,43 @@
+from fastapi import Request
+from backend.config.environment import is_production
+from backend.database.persistent.instrumentation import logger, track_queries
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Attach the SQL statistics of a request to request.state.query_stats
+
+    In development they are returned as response headers (also as Server-Timing, which
+    the browser devtools show), in production one summary line per request is logged.
+    """
+    with track_queries() as stats:
+        request.state.query_stats = stats
+        response = await call_next(request)
+
+    for statement, count in stats.repeated_statements().items():
+        logger.warning(
+            "Possible N+1 query on %s %s, executed %d times: %s",
+            request.method,
+            request.url.path,
+            count,
+            statement,
+        )
+
+    if is_production():
+        slowest = stats.slowest_statements()
+        logger.info(
+            "method=%s path=%s status=%d db_queries=%d db_time_ms=%.1f slowest_ms=%.1f",
+            request.method,
+            request.url.path,
+            response.status_code,
+            stats.count,
+            stats.total_ms,
+            slowest[0][0] if slowest else 0.0,
+        )
+    else:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Query-Time-Ms"] = f"{stats.total_ms:.1f}"
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+        )
+    return response
@@ -1,11 +1,22 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from argon2.exceptions import VerifyMismatchError
-from backend.database.persistent.models import User
+from jose import JWTError
+from backend.database.cache.models import CachedUser
+from backend.api.schemas.auth import Token, RefreshRequest
 from backend.api.schemas.user import UserResponse
-from backend.api.dependencies.auth import get_current_user, create_access_token
+from backend.api.dependencies.auth import (
+    get_current_user,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+)
+from backend.handler.session.token_revocation import (
+    token_revocation,
+    RevocationUnavailableError,
+)
 from backend.api.dependencies.database import database_service_dependency
-from backend.utils.password_utils import verify_password
+from backend.utils.password_utils import verify_password_async
 
 router = APIRouter()
 
@@ -13,20 +24,21 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
-@router.post("/token")
-def login(
+@router.post("/token", response_model=Token)
+async def login(
     db_service: database_service_dependency,
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
     """
-    Get access token for authentication.
+    Get an access token and a refresh token for authentication.
 
     - **username**: Your email address
     - **password**: Your password
     - Note: Client ID and Secret are not required
     """
-    # Find user by email
-    user = db_service.get_user_by_email(form_data.username)
+    # The database calls are blocking, they run in threads to keep the event loop
+    # free while the route awaits the hashing pool
+    user = await asyncio.to_thread(db_service.get_user_by_email, form_data.username)
 
     if not user:
         raise HTTPException(
@@ -35,10 +47,8 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Verify password
-    try:
-        verify_password(form_data.password, user.password_hash)
-    except VerifyMismatchError:
+    # Verify password in the hashing pool (503 when it is saturated)
+    if not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -46,17 +56,77 @@ def login(
         )
 
     # Update last login date
-    db_service.update_user_last_login(user.id)
+    await asyncio.to_thread(db_service.update_user_last_login, user.id)
+
+    return _issue_tokens(user)
+
+
+def _issue_tokens(user, family: str | None = None) -> Token:
+    """Create a short-lived access token and a refresh token for the user"""
+    claims = {"sub": user.email, "user_id": user.id, "role": user.role.value}
+    return Token(
+        access_token=create_access_token(data=claims),
+        refresh_token=create_refresh_token(claims, family),
+        token_type="bearer",
+    )
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(db_service: database_service_dependency, request: RefreshRequest):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Every refresh token can be used once, reusing a rotated one revokes its whole family.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(request.refresh_token, "refresh")
+        if not token_revocation.use_refresh_token(payload):
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    except RevocationUnavailableError:
+        raise HTTPException(
+            status_code=503, detail="Token service is temporarily unavailable"
+        )
+
+    # Deleted users can't refresh, changed roles are picked up
+    user = db_service.get_cached_user(payload["user_id"])
+    if user is None:
+        raise credentials_exception
 
-    # Create access token
-    access_token = create_access_token(data={"sub": user.email, "user_id": user.id})
+    return _issue_tokens(user, payload["family"])
 
-    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/logout")
+def logout(request: RefreshRequest, token: str = Depends(oauth2_scheme)):
+    """Revoke the access token and the refresh token family of this login"""
+    try:
+        tokens = [decode_token(token, "access")]
+        tokens.append(decode_token(request.refresh_token, "refresh"))
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        for payload in tokens:
+            token_revocation.revoke_token(payload)
+    except RevocationUnavailableError:
+        raise HTTPException(
+            status_code=503, detail="Token service is temporarily unavailable"
+        )
+    return {"detail": "Logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     # db_service: database_service_dependency = Depends(database_service_dependency)
 ):
     # Convert SQL model to Pydantic model
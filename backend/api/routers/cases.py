@@ -1,10 +1,26 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+import tempfile
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Query
+from typing import Optional
 from backend.api.dependencies.auth import (
     current_user_dependency,
     current_user_resource_access_dependency,
 )
 from backend.database.persistent.models import CaseStatus
 from backend.api.dependencies.case import case_service_dependency
+from backend.api.dependencies.storage import storage_service_dependency
+from backend.api.schemas.case import (
+    CaseResponse,
+    CompleteUploadRequest,
+    UploadUrlRequest,
+    UploadUrlResponse,
+)
+from backend.handler.session.processing_lock import ProcessingLockTimeoutError
+from backend.config.settings import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    MAX_UPLOAD_SIZE_BYTES,
+)
 
 router = APIRouter()
 
@@ -26,18 +42,110 @@ async def upload_case(
     case_number = 1
 
     try:
-        # Read file contents
-        file_data = await file.read()
-
-        # Process using our service
+        # The upload is spooled to disk by the server, it's hashed and streamed to
+        # storage in chunks instead of being read into memory
         await case_service.process_case_async_and_store_case_and_qanda(
-            file_data=file_data,
+            file=file.file,
             filename=file.filename,
             user_id=current_user.id,
             case_number=case_number,
         )
 
         return {"message": "Case uploaded successfully"}
+    except ProcessingLockTimeoutError:
+        raise HTTPException(
+            status_code=409,
+            detail="This file is still being processed, try again later",
+        )
+    except FileExistsError as e:
+        raise HTTPException(
+            status_code=409, detail=f"This file has already been uploaded: {str(e)}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An error occurred uploading your file: {str(e)}"
+        )
+
+
+@router.post("/upload_url", response_model=UploadUrlResponse)
+async def create_upload_url(
+    request: UploadUrlRequest,
+    case_service: case_service_dependency,
+    current_user: current_user_dependency,
+):
+    """
+    Get a presigned URL to upload a case file directly to the storage, then call
+    /complete_upload with the returned upload_id
+    """
+    try:
+        return case_service.create_upload_url(request.filename, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/local_uploads/{token}")
+async def receive_local_upload(
+    token: str, request: Request, storage_service: storage_service_dependency
+):
+    """
+    Receive a direct upload to a URL of /upload_url when the storage is local (development).
+    Like a presigned URL, the signed token in the URL authorizes the upload instead of a login.
+    """
+    with tempfile.TemporaryFile() as file:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Die Datei ist zu groß (maximal {MAX_UPLOAD_SIZE_BYTES} Bytes)",
+                )
+            file.write(chunk)
+        file.seek(0)
+
+        try:
+            await asyncio.to_thread(storage_service.receive_local_upload, token, file)
+        except FileExistsError:
+            raise HTTPException(
+                status_code=409, detail="This file has already been uploaded"
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {"message": "File uploaded successfully"}
+
+
+@router.post("/complete_upload")
+async def complete_upload(
+    request: CompleteUploadRequest,
+    case_service: case_service_dependency,
+    current_user: current_user_dependency,
+):
+    """
+    Process a case file uploaded to the URL of /upload_url, generates questions + sets and answers, and stores them in the database
+    """
+    case_number = 1
+
+    try:
+        await case_service.process_staged_upload(
+            upload_id=request.upload_id,
+            filename=request.filename,
+            user_id=current_user.id,
+            case_number=case_number,
+        )
+
+        return {"message": "Case uploaded successfully"}
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404, detail="No file has been uploaded for this upload_id"
+        )
+    except ProcessingLockTimeoutError:
+        raise HTTPException(
+            status_code=409,
+            detail="This file is still being processed, try again later",
+        )
     except FileExistsError as e:
         raise HTTPException(
             status_code=409, detail=f"This file has already been uploaded: {str(e)}"
@@ -52,9 +160,40 @@ async def upload_case(
 
 @router.get("/get_all_cases")
 async def get_all_cases(
-    current_user: current_user_dependency, case_service: case_service_dependency
+    current_user: current_user_dependency,
+    case_service: case_service_dependency,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    return case_service.get_all_cases_for_user(current_user.id)
+    """
+    Get a page of your cases, most recently uploaded first. Pass the returned
+    next_cursor to get the following page.
+    """
+    try:
+        cases, next_cursor = case_service.get_cases_page_for_user(
+            current_user.id, page_size, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "items": [CaseResponse.model_validate(case) for case in cases],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/questions_by_keyword")
+async def get_questions_by_keyword(
+    keyword: str,
+    current_user: current_user_dependency,
+    case_service: case_service_dependency,
+):
+    """
+    Find the questions of all your cases that are tagged with a keyword
+    """
+    try:
+        return case_service.get_questions_by_keyword(current_user.id, keyword)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/delete_case/{case_id}")
@@ -74,7 +213,10 @@ async def delete_case(
 async def get_case(
     case_id: str, case_service: case_service_dependency, _: current_user_dependency
 ):
-    return case_service.get_case_by_id(case_id)
+    case = case_service.get_case_by_id(case_id)
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return CaseResponse.model_validate(case)
 
 
 @router.get("/get_case_questions/{case_id}")
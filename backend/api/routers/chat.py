@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from backend.api.dependencies.auth import current_user_dependency
 from backend.api.dependencies.chat import chat_service_dependency
 from backend.api.schemas.chat import MessageRequest
+from backend.config.settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from typing import Optional
 
 router = APIRouter()
@@ -23,9 +24,24 @@ async def get_case_discussions(
     current_user: current_user_dependency,
     chat_service: chat_service_dependency,
     case_id: str,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    """Get existing discussions for a case"""
-    return await chat_service.get_case_discussions(current_user.id, case_id)
+    """
+    Get a page of existing discussions for a case, most recently active first.
+
+    Pages are ordered by the time of the latest message, which changes with every new
+    message: a discussion that gets a message while the client is paging moves to the
+    front. If it wasn't returned yet it's skipped, the following pages only hold
+    discussions that were less recently active than the cursor. Reload from the first
+    page to see it.
+    """
+    try:
+        return await chat_service.get_case_discussions(
+            current_user.id, case_id, page_size, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/message")
@@ -45,6 +61,14 @@ async def get_chat_history(
     current_user: current_user_dependency,
     chat_service: chat_service_dependency,
     answer_discussion_id: int,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    """Get chat history for a specific answer discussion"""
-    return await chat_service.get_chat_history(answer_discussion_id)
+    """Get chat history for a specific answer discussion, latest messages first page.
+    Pass the returned next_cursor to load older messages."""
+    try:
+        return await chat_service.get_chat_history(
+            answer_discussion_id, page_size, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
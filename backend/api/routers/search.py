@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from backend.api.dependencies.auth import current_user_dependency
+from backend.api.dependencies.database import database_service_dependency
+from backend.config.settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter()
+
+
+@router.get("/")
+async def search(
+    current_user: current_user_dependency,
+    db_service: database_service_dependency,
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Full-text search over the questions, model answers and chat messages of your cases
+
+    - **q**: Search terms, e.g. "Abwehrmechanismen"
+    - **page**: 1-based page number
+    - **page_size**: Number of hits per page
+    """
+    try:
+        return db_service.search_for_user(current_user.id, q, page, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
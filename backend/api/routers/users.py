@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from backend.api.schemas.user import UserCreate, UserUpdate, UserResponse
-from backend.utils.password_utils import hash_password, verify_password
+from backend.utils.password_utils import hash_password_async, verify_password_async
 from backend.api.dependencies.database import database_service_dependency
 from backend.api.dependencies.auth import current_user_resource_access_dependency
+from backend.config.settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -29,15 +32,27 @@ async def get_user(
 async def list_users(
     # _: User = Depends(admin_only),  # @TODO: REMOVE BEFORE PRODUCTION
     db_service: database_service_dependency,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    return db_service.get_all_users()
+    try:
+        users, next_cursor = db_service.get_users_page(page_size, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "items": [UserResponse.model_validate(user) for user in users],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("/", response_model=UserResponse)
 async def create_user(user: UserCreate, db_service: database_service_dependency):
+    password_hash = await hash_password_async(user.password)
     try:
-        new_user = db_service.create_user(user)
-        return UserResponse.model_validate(new_user)
+        # The database calls are blocking, they run in threads to keep the event
+        # loop free (reading the committed user loads it again)
+        new_user = await asyncio.to_thread(db_service.create_user, user, password_hash)
+        return await asyncio.to_thread(UserResponse.model_validate, new_user)
     except ValueError as e:
         print(f"Error creating user: {e}")
         raise HTTPException(
@@ -64,10 +79,11 @@ async def update_user(
                 detail="Aktuelles Passwort ist erforderlich, um E-Mail oder Passwort zu aktualisieren",
             )
 
-        # Verify current password
-        try:
-            verify_password(user_update.current_password, current_user.password_hash)
-        except Exception:
+        # Verify current password (the cached user carries no password hash)
+        db_user = await asyncio.to_thread(db_service.get_user_by_id, current_user.id)
+        if not await verify_password_async(
+            user_update.current_password, db_user.password_hash
+        ):
             raise HTTPException(status_code=401, detail="Aktuelles Passwort ist falsch")
 
     # Update user fields that were provided
@@ -78,16 +94,17 @@ async def update_user(
 
     # Hash new password if provided
     if "password" in update_data:
-        update_data["password_hash"] = hash_password(update_data.pop("password"))
-
-    # Update user in database
-    for key, value in update_data.items():
-        setattr(current_user, key, value)
+        update_data["password_hash"] = await hash_password_async(
+            update_data.pop("password")
+        )
 
-    db_service.update_user(current_user.id, update_data)
+    # Update user in database, in a thread like all blocking database calls
+    updated_user = await asyncio.to_thread(
+        db_service.update_user, current_user.id, update_data
+    )
 
     # Return updated user data
-    return UserResponse.from_orm(current_user)
+    return await asyncio.to_thread(UserResponse.from_orm, updated_user)
 
 
 @router.delete("/{user_id}")
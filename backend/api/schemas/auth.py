@@ -4,9 +4,15 @@ from pydantic import BaseModel, ConfigDict
 class Token(BaseModel):
     model_config = ConfigDict(strict=True)
     access_token: str
+    refresh_token: str | None = None
     token_type: str
 
 
+class RefreshRequest(BaseModel):
+    model_config = ConfigDict(strict=True)
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     model_config = ConfigDict(strict=True)
     email: str | None = None
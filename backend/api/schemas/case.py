@@ -65,9 +65,9 @@ class CaseRetrieveParams(BaseModel):
 
 
 class CaseResponse(BaseModel):
-    """Validates case data returned from database"""
+    """Validates case data returned from database (without the extracted text)"""
 
-    model_config = ConfigDict(strict=True)
+    model_config = ConfigDict(strict=True, from_attributes=True)
 
     id: str
     filename: str
@@ -76,5 +76,27 @@ class CaseResponse(BaseModel):
     status: CaseStatus
     case_number: int
     user_id: str
-    created_at: datetime
-    updated_at: datetime
+    upload_date: datetime
+
+
+class UploadUrlRequest(BaseModel):
+    model_config = ConfigDict(strict=True)
+    filename: str
+
+
+class UploadUrlResponse(BaseModel):
+    """Presigned upload, the client sends the file with the fields to the url"""
+
+    model_config = ConfigDict(strict=True)
+
+    upload_id: str
+    url: str
+    fields: Dict[str, str]
+    method: str
+    expires_in: int
+
+
+class CompleteUploadRequest(BaseModel):
+    model_config = ConfigDict(strict=True)
+    upload_id: str
+    filename: str
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict, field_validator
 from backend.database.persistent.models import MessageRole
 from typing import Optional
+from datetime import datetime
 
 
 class CaseDiscussionCreate(BaseModel):
@@ -32,3 +33,11 @@ class ChatMessageCreate(BaseModel):
 class MessageRequest(BaseModel):
     answer_discussion_id: int
     message_data: str
+
+
+class MessageResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    role: MessageRole
+    content: str
+    created_at: datetime
@@ -68,6 +68,18 @@ class QuestionRetrieve(Question):
     id: str
     answer: Answer
 
+
+class QuestionResponse(BaseModel):
+    """Question data returned to the client (without the model answer)"""
+
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    question: str
+    context: Optional[str] = None
+    difficulty: str
+    keywords: List[str]
+
+
 class QuestionSetCreate(BaseModel):
     case_id: str
     prompt_id: str
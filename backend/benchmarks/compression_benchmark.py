@@ -0,0 +1,120 @@
+"""
+Benchmark storage size and read latency of CompressedText against plain Text.
+
+Generates synthetic German case reports (10 cases of ~200KB, 500 answers of ~2KB),
+stores them in an in-memory SQLite database and times reading them back.
+
+Usage:
+    python -m backend.benchmarks.compression_benchmark
+"""
+
+import os
+import random
+import tempfile
+import time
+import zstandard
+from sqlalchemy import (
+    Column,
+    Integer,
+    LargeBinary,
+    MetaData,
+    Table,
+    Text,
+    create_engine,
+    func,
+    select,
+)
+from backend.database.persistent.compression import (
+    CompressedText,
+    ZstdCodec,
+    DICTIONARY_SUFFIX,
+)
+
+SENTENCES = [
+    "Die Patientin berichtet über eine seit mehreren Monaten bestehende depressive Symptomatik.",
+    "Im Erstgespräch zeigte sich der Patient affektiv verflacht und im Antrieb gemindert.",
+    "Biografisch fällt eine frühe Trennung von der Mutter im Alter von drei Jahren auf.",
+    "Das zentrale Beziehungskonfliktthema lässt sich als Wunsch nach Nähe bei gleichzeitiger Angst vor Zurückweisung beschreiben.",
+    "Als Abwehrmechanismen imponieren vor allem Rationalisierung, Verleugnung und Wendung gegen das Selbst.",
+    "Diagnostisch ergibt sich eine mittelgradige depressive Episode (F32.1) nach ICD-10.",
+    "Differentialdiagnostisch wurde eine Anpassungsstörung (F43.2) in Betracht gezogen.",
+    "Das Strukturniveau wird nach OPD-2 als mäßig integriert eingeschätzt.",
+    "In der Übertragung zeigte sich eine idealisierende Haltung gegenüber dem Therapeuten.",
+    "Die Gegenübertragung war von Fürsorgeimpulsen und zeitweiliger Ungeduld geprägt.",
+    "Der Behandlungsplan sieht 50 Sitzungen tiefenpsychologisch fundierter Psychotherapie vor.",
+    "Eine begleitende Medikation mit Sertralin 50 mg wurde psychiatrisch eingeleitet.",
+    "Suizidalität wurde zu Beginn jeder Sitzung exploriert und glaubhaft verneint.",
+    "Im weiteren Verlauf gelang es der Patientin zunehmend, eigene Bedürfnisse zu äußern.",
+    "Die S3-Leitlinie Unipolare Depression empfiehlt bei mittelgradiger Episode Psychotherapie oder Pharmakotherapie.",
+]
+
+
+def generate_text(random_generator, size: int) -> str:
+    sentences = []
+    length = 0
+    while length < size:
+        sentence = random_generator.choice(SENTENCES)
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def build_documents(seed: int):
+    random_generator = random.Random(seed)
+    cases = [generate_text(random_generator, 200_000) for _ in range(10)]
+    answers = [generate_text(random_generator, 2_000) for _ in range(500)]
+    return cases + answers
+
+
+def measure(name, column_type, documents):
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table(
+        "documents",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("body", column_type),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [{"body": d} for d in documents])
+
+    with engine.connect() as connection:
+        stored_bytes = connection.execute(
+            select(func.sum(func.length(func.cast(table.c.body, LargeBinary))))
+        ).scalar()
+        start = time.perf_counter()
+        for _ in range(5):
+            rows = connection.execute(select(table.c.body)).scalars().all()
+        read_ms = (time.perf_counter() - start) / 5 * 1000
+    assert rows == documents
+    print(f"{name:<28} {stored_bytes / 1024:>10.0f} KB {read_ms:>10.1f} ms")
+
+
+def main():
+    documents = build_documents(seed=1)
+    raw_kb = sum(len(d.encode("utf-8")) for d in documents) / 1024
+    print(f"{len(documents)} documents, {raw_kb:.0f} KB raw UTF-8\n")
+    print(f"{'column type':<28} {'stored':>13} {'read all':>13}")
+
+    measure("Text", Text, documents)
+
+    codec = ZstdCodec(dictionary_dir="", dictionary_name=None)
+    measure("CompressedText", CompressedText(codec), documents)
+
+    # Train a dictionary on a disjoint sample, as the train command does on real data
+    training = build_documents(seed=2)
+    samples = [
+        d.encode("utf-8")[i : i + 4096] for d in training for i in range(0, len(d), 4096)
+    ]
+    dictionary = zstandard.train_dictionary(112_640, samples)
+    with tempfile.TemporaryDirectory() as dictionary_dir:
+        filename = f"bench{DICTIONARY_SUFFIX}"
+        with open(os.path.join(dictionary_dir, filename), "wb") as f:
+            f.write(dictionary.as_bytes())
+        codec = ZstdCodec(dictionary_dir=dictionary_dir, dictionary_name=filename)
+        measure("CompressedText + dictionary", CompressedText(codec), documents)
+
+
+if __name__ == "__main__":
+    main()
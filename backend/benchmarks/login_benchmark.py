@@ -0,0 +1,71 @@
+"""
+Benchmark Argon2 login throughput for different ARGON2_* settings and pool sizes.
+
+For every parameter set a burst of password verifications is pushed through a thread
+pool of the given size, as the login endpoint does with the hashing pool. Reports the
+latency of a single verification, the sustained logins per second and the peak Argon2
+memory (pool size x memory cost).
+
+Usage:
+    python -m backend.benchmarks.login_benchmark [--logins 64]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from argon2 import PasswordHasher
+
+# (name, time_cost, memory_cost in KiB), development and production match settings.py
+PARAMETER_SETS = [
+    ("development", 2, 10000),
+    ("production", 4, 100000),
+    ("rfc9106 low memory", 3, 65536),
+]
+POOL_SIZES = [1, 2, 4, os.cpu_count() or 1]
+
+
+def measure(hasher: PasswordHasher, password_hash: str, pool_size: int, logins: int):
+    """Verify `logins` passwords with `pool_size` workers, return (seconds, per login latency)"""
+    latency_start = time.perf_counter()
+    hasher.verify(password_hash, "benchmark-password")
+    latency = time.perf_counter() - latency_start
+
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        start = time.perf_counter()
+        list(
+            executor.map(
+                lambda _: hasher.verify(password_hash, "benchmark-password"),
+                range(logins),
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return elapsed, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Argon2 login throughput benchmark")
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins per run, {os.cpu_count()} CPUs\n")
+    print(
+        f"{'parameters':<20} {'t':>2} {'memory':>8} {'pool':>5} "
+        f"{'latency':>10} {'logins/s':>10} {'peak memory':>12}"
+    )
+    for name, time_cost, memory_cost in PARAMETER_SETS:
+        hasher = PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=1
+        )
+        password_hash = hasher.hash("benchmark-password")
+        for pool_size in sorted(set(POOL_SIZES)):
+            elapsed, latency = measure(hasher, password_hash, pool_size, args.logins)
+            print(
+                f"{name:<20} {time_cost:>2} {memory_cost // 1024:>5} MB {pool_size:>5} "
+                f"{latency * 1000:>7.1f} ms {args.logins / elapsed:>10.1f} "
+                f"{pool_size * memory_cost // 1024:>9} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark PDF text extraction: sequential pypdf against the extraction process pool.
+
+Generates text-only PDFs of several hundred pages and extracts them with
+PdfExtractor.extract_pages (sequential, in the calling process) and
+FileConverter.extract_pages_async (page ranges in the process pool).
+Reports the wall time of both and checks that they extract the same text.
+
+Usage:
+    python -m backend.benchmarks.pdf_extraction_benchmark [--pages 100 300 600]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from io import BytesIO
+from backend.config.settings import (
+    PDF_EXTRACTION_WORKERS,
+    PDF_EXTRACTION_PAGES_PER_TASK,
+)
+from backend.handler.storage.extractors import PdfExtractor
+from backend.handler.storage.file_converter import FileConverter
+from backend.tests.documents import make_pdf
+
+
+async def measure_pool(converter: FileConverter, pdf: bytes) -> tuple[float, str]:
+    start = time.perf_counter()
+    extracted = await converter.extract_pages_async(BytesIO(pdf), "case.pdf")
+    return time.perf_counter() - start, extracted.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF text extraction benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 300, 600])
+    args = parser.parse_args()
+
+    converter = FileConverter()
+    print(
+        f"{os.cpu_count()} CPUs, {PDF_EXTRACTION_WORKERS} workers, "
+        f"{PDF_EXTRACTION_PAGES_PER_TASK} pages per task\n"
+    )
+    # Spawn the workers before measuring
+    asyncio.run(measure_pool(converter, make_pdf(1)))
+
+    print(f"{'pages':>6} {'size':>8} {'sequential':>11} {'pool':>9} {'speedup':>8}")
+    for pages in args.pages:
+        pdf = make_pdf(pages)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as file:
+            file.write(pdf)
+            file.flush()
+            start = time.perf_counter()
+            sequential_text = "".join(PdfExtractor().extract_pages(file.name))
+            sequential = time.perf_counter() - start
+        pooled, pooled_text = asyncio.run(measure_pool(converter, pdf))
+        assert pooled_text == sequential_text
+        print(
+            f"{pages:>6} {len(pdf) // 1024:>5} KB {sequential:>9.2f} s "
+            f"{pooled:>7.2f} s {sequential / pooled:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,12 @@ if not JWT_SECRET_KEY:
     JWT_SECRET_KEY = generated_key
 
 JWT_ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = (
-    30 if get_environment() == Environment.PRODUCTION else 60 * 24
-)
+# Access tokens are validated statelessly, keep them short-lived and renew them with refresh tokens
+ACCESS_TOKEN_EXPIRE_MINUTES = 15 if get_environment() == Environment.PRODUCTION else 60
+REFRESH_TOKEN_EXPIRE_DAYS = 7 if get_environment() == Environment.PRODUCTION else 30
+
+# Redis Settings
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 # Argon2 Settings
 if get_environment() == Environment.PRODUCTION:
@@ -35,3 +38,113 @@ else:
 ARGON2_PARALLELISM = 1
 ARGON2_HASH_LENGTH = 32
 ARGON2_SALT_LENGTH = 16
+
+# Pagination Settings
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+
+# Column Compression Settings
+# Values shorter than the threshold are stored uncompressed
+COMPRESSION_THRESHOLD_BYTES = int(os.getenv("COMPRESSION_THRESHOLD_BYTES", "512"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+# Directory of trained zstd dictionaries (*.zdict), all of them are available for reading
+COMPRESSION_DICTIONARY_DIR = os.getenv(
+    "COMPRESSION_DICTIONARY_DIR", "backend/database/persistent/dictionaries"
+)
+# File name of the dictionary used to compress new values (no dictionary if unset)
+COMPRESSION_DICTIONARY = os.getenv("COMPRESSION_DICTIONARY")
+
+# Prompt Registry Settings
+# How often a worker checks the prompts table for changes made by other workers
+PROMPT_REGISTRY_CHECK_SECONDS = int(os.getenv("PROMPT_REGISTRY_CHECK_SECONDS", "30"))
+
+# SQL Instrumentation Settings
+# Statements slower than this are logged
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+# Bound parameters hold case texts, messages and credentials, only log them locally
+SLOW_QUERY_LOG_PARAMETERS = get_environment() == Environment.DEVELOPMENT
+# Number of slowest statements kept per request
+QUERY_STATS_SLOWEST_COUNT = int(os.getenv("QUERY_STATS_SLOWEST_COUNT", "3"))
+# The same statement repeated this often in one request is reported as a possible N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Message Archival Settings
+# Messages of answer discussions without new messages for this many days are archived
+MESSAGE_ARCHIVE_IDLE_DAYS = int(os.getenv("MESSAGE_ARCHIVE_IDLE_DAYS", "30"))
+# Number of answer discussions archived per run
+MESSAGE_ARCHIVE_BATCH_SIZE = int(os.getenv("MESSAGE_ARCHIVE_BATCH_SIZE", "100"))
+
+# User Cache Settings
+# Authenticated users are cached per worker, this bounds how long other workers see stale data
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Password Hashing Pool Settings
+# Every running Argon2 hash holds ARGON2_MEMORY_COST KiB, the pool size bounds CPU and memory use
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Hashes allowed to wait for a worker, further requests are rejected with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16"))
+
+# PDF Extraction Settings
+# Text extraction runs in a process pool, large documents are split into page ranges
+PDF_EXTRACTION_WORKERS = int(
+    os.getenv("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PDF_EXTRACTION_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACTION_PAGES_PER_TASK", "25"))
+
+# Session Settings
+# Chat sessions expire after this many seconds without access (sliding expiry)
+SESSION_TIMEOUT_SECONDS = int(os.getenv("SESSION_TIMEOUT_SECONDS", "1800"))
+
+# Chat History Cache Settings
+# Number of most recent messages per answer discussion kept in Redis and sent to the LLM
+CHAT_HISTORY_CACHE_SIZE = int(os.getenv("CHAT_HISTORY_CACHE_SIZE", "100"))
+CHAT_HISTORY_CACHE_TTL_SECONDS = int(
+    os.getenv("CHAT_HISTORY_CACHE_TTL_SECONDS", str(24 * 3600))
+)
+
+# Query Cache Settings
+# In-process (L1) entries live shortly, they aren't invalidated by writes of other workers
+QUERY_CACHE_L1_TTL_SECONDS = int(os.getenv("QUERY_CACHE_L1_TTL_SECONDS", "5"))
+QUERY_CACHE_L1_MAX_SIZE = int(os.getenv("QUERY_CACHE_L1_MAX_SIZE", "256"))
+# After a Redis error the L2 cache is skipped for this long
+QUERY_CACHE_L2_RETRY_SECONDS = int(os.getenv("QUERY_CACHE_L2_RETRY_SECONDS", "30"))
+
+# Case Processing Lock Settings
+# The lock expires on its own if a worker dies, it must outlast a full LLM generation
+CASE_PROCESSING_LOCK_TIMEOUT_SECONDS = int(
+    os.getenv("CASE_PROCESSING_LOCK_TIMEOUT_SECONDS", "900")
+)
+# How long a duplicate upload waits for the in-flight job before giving up
+CASE_PROCESSING_LOCK_WAIT_SECONDS = int(
+    os.getenv("CASE_PROCESSING_LOCK_WAIT_SECONDS", "600")
+)
+
+# Storage Settings
+# "s3" (AWS or S3-compatible like MinIO via STORAGE_ENDPOINT_URL) or "local"
+STORAGE_BACKEND = os.getenv(
+    "STORAGE_BACKEND", "s3" if get_environment() == Environment.PRODUCTION else "local"
+)
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "cf-papi")
+STORAGE_ENDPOINT_URL = os.getenv("STORAGE_ENDPOINT_URL") or None
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "20"))
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "./storage")
+# Uploads are streamed in parts of this size (S3 requires at least 5 MB per part)
+STORAGE_UPLOAD_PART_SIZE = int(
+    os.getenv("STORAGE_UPLOAD_PART_SIZE", str(8 * 1024 * 1024))
+)
+# Direct uploads: clients upload to a presigned URL, the storage enforces the size limit
+MAX_UPLOAD_SIZE_BYTES = int(os.getenv("MAX_UPLOAD_SIZE_BYTES", str(10_000_000)))
+UPLOAD_URL_EXPIRE_SECONDS = int(os.getenv("UPLOAD_URL_EXPIRE_SECONDS", "900"))
+# The local backend has no storage server, its direct uploads go to this API route
+STORAGE_LOCAL_UPLOAD_URL = os.getenv("STORAGE_LOCAL_UPLOAD_URL", "/cases/local_uploads")
+
+# Text Normalization Settings
+# Header/footer lines are searched in this many lines at the top and bottom of a page
+BOILERPLATE_EDGE_LINES = int(os.getenv("BOILERPLATE_EDGE_LINES", "3"))
+# A line is boilerplate if it repeats on at least this share of the pages
+BOILERPLATE_MIN_PAGE_RATIO = float(os.getenv("BOILERPLATE_MIN_PAGE_RATIO", "0.5"))
+# Encoding of the generation model (gpt-4o-mini), only used to report token savings
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
@@ -1,5 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from typing import Optional
+from backend.database.persistent.models import (
+    MessageRole,
+    PromptType,
+    PromptSpecialization,
+    PromptCategory,
+    PromptSubCategory,
+    UserRole,
+)
 
 
 class Session(BaseModel):
@@ -8,3 +17,33 @@ class Session(BaseModel):
     messages: list[dict]
     created_at: datetime
     expires_at: datetime
+
+
+class CachedPrompt(BaseModel):
+    """Immutable in-memory copy of a Prompt row, safe to share across requests"""
+
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: str
+    type: PromptType
+    role: MessageRole
+    specialization: Optional[PromptSpecialization] = None
+    category: Optional[PromptCategory] = None
+    sub_category: Optional[PromptSubCategory] = None
+    content: str
+    version: int
+    updated_at: datetime
+
+
+class CachedUser(BaseModel):
+    """Immutable in-memory copy of a User row used to authenticate requests, without the password hash"""
+
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: str
+    email: str
+    first_name: str
+    last_name: str
+    role: UserRole
+    registration_date: datetime
+    last_login_date: datetime
@@ -1,6 +1,38 @@
+import asyncio
+import weakref
+import redis
+import redis.asyncio
+from backend.config.settings import REDIS_URL
+
+# Shared connection pool, clients are cheap and thread safe
+redis_pool = redis.ConnectionPool.from_url(
+    REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5
+)
+
+
+def get_redis() -> redis.Redis:
+    return redis.Redis(connection_pool=redis_pool)
+
+
+# Connections of an asyncio pool belong to the event loop they were opened on,
+# so there is one shared pool per running loop (in the app: exactly one)
+_async_redis_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Get an asyncio Redis client on the shared pool of the running event loop"""
+    loop = asyncio.get_running_loop()
+    pool = _async_redis_pools.get(loop)
+    if pool is None:
+        pool = redis.asyncio.ConnectionPool.from_url(
+            REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5
+        )
+        _async_redis_pools[loop] = pool
+    return redis.asyncio.Redis(connection_pool=pool)
+
+
 # history = RedisChatMessageHistory(
 #     session_id="test_session",
 #     connection_pool=redis_pool,
 #     key_prefix="chat_history",
 # )
-
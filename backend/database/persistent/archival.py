@@ -0,0 +1,44 @@
+import argparse
+from backend.config.settings import (
+    MESSAGE_ARCHIVE_IDLE_DAYS,
+    MESSAGE_ARCHIVE_BATCH_SIZE,
+)
+from backend.database.persistent.config import SessionLocal
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.services.database_service import DatabaseService
+
+"""
+Background job moving the messages of idle answer discussions out of the hot messages
+table into compressed per-discussion archives (MessageArchive). Reads merge the archive
+back in transparently, so the job can run at any time, e.g. nightly from cron:
+
+    python -m backend.database.persistent.archival --idle-days 30
+"""
+
+
+def run(idle_days: int, batch_size: int) -> tuple[int, int]:
+    """Archive batches until no idle answer discussion is left"""
+    total_discussions, total_messages = 0, 0
+    db = SessionLocal()
+    try:
+        db_service = DatabaseService(DatabaseHandler(db))
+        while True:
+            discussions, messages = db_service.archive_idle_messages(
+                idle_days, batch_size
+            )
+            total_discussions += discussions
+            total_messages += messages
+            if discussions < batch_size:
+                return total_discussions, total_messages
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive messages of idle discussions")
+    parser.add_argument("--idle-days", type=int, default=MESSAGE_ARCHIVE_IDLE_DAYS)
+    parser.add_argument("--batch-size", type=int, default=MESSAGE_ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    discussions, messages = run(args.idle_days, args.batch_size)
+    print(f"Archived {messages} messages of {discussions} answer discussions.")
@@ -0,0 +1,220 @@
+import argparse
+import os
+import zstandard
+from sqlalchemy import LargeBinary, inspect, select, text, update
+from sqlalchemy.types import TypeDecorator
+from backend.config.settings import (
+    COMPRESSION_THRESHOLD_BYTES,
+    COMPRESSION_LEVEL,
+    COMPRESSION_DICTIONARY_DIR,
+    COMPRESSION_DICTIONARY,
+)
+
+"""
+Transparent zstd compression for large text columns.
+
+Values are stored as bytes: short values as plain UTF-8, longer ones as a zstd frame,
+optionally compressed with a dictionary trained on our own (German clinical) case texts.
+Both kinds are told apart by the zstd frame magic number, which can never start valid
+UTF-8 text, so rows written before compression was enabled stay readable.
+
+Usage:
+    python -m backend.database.persistent.compression train
+    python -m backend.database.persistent.compression backfill
+"""
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DICTIONARY_SUFFIX = ".zdict"
+
+
+class ZstdCodec:
+    def __init__(
+        self,
+        threshold: int = COMPRESSION_THRESHOLD_BYTES,
+        level: int = COMPRESSION_LEVEL,
+        dictionary_dir: str = COMPRESSION_DICTIONARY_DIR,
+        dictionary_name: str | None = COMPRESSION_DICTIONARY,
+    ):
+        self.threshold = threshold
+        self.dictionaries = self._load_dictionaries(dictionary_dir)
+
+        write_dictionary = None
+        if dictionary_name:
+            write_dictionary = zstandard.ZstdCompressionDict(
+                self._read_file(os.path.join(dictionary_dir, dictionary_name))
+            )
+            self.dictionaries[write_dictionary.dict_id()] = write_dictionary
+
+        self.compressor = (
+            zstandard.ZstdCompressor(level=level, dict_data=write_dictionary)
+            if write_dictionary
+            else zstandard.ZstdCompressor(level=level)
+        )
+        self.decompressors = {0: zstandard.ZstdDecompressor()}
+        for dict_id, dictionary in self.dictionaries.items():
+            self.decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=dictionary
+            )
+
+    def encode(self, value: str) -> bytes:
+        raw = value.encode("utf-8")
+        if len(raw) < self.threshold:
+            return raw
+        compressed = self.compressor.compress(raw)
+        # Incompressible values are cheaper to read raw
+        return compressed if len(compressed) < len(raw) else raw
+
+    def decode(self, value: bytes | str) -> str:
+        if isinstance(value, str):
+            # Legacy TEXT value written before the column was compressed
+            return value
+        value = bytes(value)
+        if not value.startswith(ZSTD_MAGIC):
+            return value.decode("utf-8")
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        decompressor = self.decompressors.get(dict_id)
+        if decompressor is None:
+            raise ValueError(f"Missing zstd dictionary {dict_id} to decompress value")
+        return decompressor.decompress(value).decode("utf-8")
+
+    def _load_dictionaries(self, dictionary_dir: str) -> dict:
+        dictionaries = {}
+        if not os.path.isdir(dictionary_dir):
+            return dictionaries
+        for filename in sorted(os.listdir(dictionary_dir)):
+            if filename.endswith(DICTIONARY_SUFFIX):
+                dictionary = zstandard.ZstdCompressionDict(
+                    self._read_file(os.path.join(dictionary_dir, filename))
+                )
+                dictionaries[dictionary.dict_id()] = dictionary
+        return dictionaries
+
+    def _read_file(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+
+_codec = None
+
+
+def get_codec() -> ZstdCodec:
+    """Lazily build the process-wide codec (dictionaries are loaded once)"""
+    global _codec
+    if _codec is None:
+        _codec = ZstdCodec()
+    return _codec
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored zstd-compressed above a size threshold
+
+    Args:
+        codec: Codec of the column, defaults to the process-wide codec of the settings
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, codec: ZstdCodec | None = None):
+        super().__init__()
+        self.codec = codec
+
+    def _get_codec(self) -> ZstdCodec:
+        return self.codec or get_codec()
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        return self._get_codec().encode(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        return self._get_codec().decode(value)
+
+
+def compressed_columns():
+    """Yield (model, column) for every mapped column using CompressedText"""
+    from backend.database.persistent.models import Base
+
+    for mapper in Base.registry.mappers:
+        for column in mapper.columns:
+            if isinstance(column.type, CompressedText):
+                yield mapper.class_, column
+
+
+def train_dictionary(engine, dictionary_size: int = 112_640, sample_size: int = 4096):
+    """Train a zstd dictionary on the compressed columns' current contents"""
+    samples = []
+    with engine.connect() as connection:
+        for model, column in compressed_columns():
+            for (value,) in connection.execute(select(column).where(column.isnot(None))):
+                raw = value.encode("utf-8")
+                samples.extend(
+                    raw[i : i + sample_size] for i in range(0, len(raw), sample_size)
+                )
+    if not samples:
+        raise ValueError("No data to train a dictionary on")
+
+    dictionary = zstandard.train_dictionary(dictionary_size, samples)
+    os.makedirs(COMPRESSION_DICTIONARY_DIR, exist_ok=True)
+    filename = f"papi-{dictionary.dict_id()}{DICTIONARY_SUFFIX}"
+    with open(os.path.join(COMPRESSION_DICTIONARY_DIR, filename), "wb") as f:
+        f.write(dictionary.as_bytes())
+    return filename, len(samples)
+
+
+def backfill(engine, batch_size: int = 100):
+    """Rewrite every compressed column with the current codec settings"""
+    rewritten = 0
+    for model, column in compressed_columns():
+        table = column.table
+        primary_key = table.primary_key.columns.values()[0]
+
+        # PostgreSQL keeps the old TEXT type until the column is converted to bytea
+        if engine.dialect.name == "postgresql":
+            column_types = {
+                c["name"]: c["type"] for c in inspect(engine).get_columns(table.name)
+            }
+            if not isinstance(column_types[column.name], LargeBinary):
+                with engine.begin() as connection:
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                            f"TYPE bytea USING convert_to({column.name}, 'UTF8')"
+                        )
+                    )
+
+        last_id = None
+        while True:
+            with engine.begin() as connection:
+                query = select(primary_key, column).order_by(primary_key).limit(batch_size)
+                if last_id is not None:
+                    query = query.where(primary_key > last_id)
+                rows = connection.execute(query).all()
+                if not rows:
+                    break
+                for row_id, value in rows:
+                    connection.execute(
+                        update(table).where(primary_key == row_id).values({column: value})
+                    )
+                last_id = rows[-1][0]
+                rewritten += len(rows)
+        print(f"Backfilled {table.name}.{column.name}")
+    return rewritten
+
+
+if __name__ == "__main__":
+    from backend.database.persistent.config import engine
+
+    parser = argparse.ArgumentParser(description="Manage compressed text columns")
+    parser.add_argument("command", choices=["train", "backfill"])
+    args = parser.parse_args()
+
+    if args.command == "train":
+        filename, sample_count = train_dictionary(engine)
+        print(f"Trained {filename} on {sample_count} samples.")
+        print(f"Set COMPRESSION_DICTIONARY={filename} and run backfill to use it.")
+    else:
+        print(f"Rewrote {backfill(engine)} values.")
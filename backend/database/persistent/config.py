@@ -1,10 +1,15 @@
 import os
+import hashlib
+import itertools
+import threading
+import time
 
 # import asyncio
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
 
 # from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 # Determine if we're in production or development
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -29,6 +34,14 @@ else:
     # SQLite-specific connection arguments
     connect_args = {"check_same_thread": False}
 
+# Read replicas, comma separated URLs (e.g. "postgresql://...@replica1/papi,postgresql://...@replica2/papi")
+# Locally a second SQLite file works too: "sqlite:///file:./papi_replica.db?mode=ro&uri=true"
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+# How long a client keeps reading from the primary after its own write (read-your-writes)
+REPLICA_STICKINESS_SECONDS = int(os.getenv("REPLICA_STICKINESS_SECONDS", "10"))
+
 # Create SQLAlchemy engine
 engine = create_engine(DATABASE_URL, connect_args=connect_args)
 # async_engine = create_async_engine(DATABASE_URL, connect_args=connect_args)
@@ -37,10 +50,107 @@ engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _reject_flush(session, flush_context, instances):
+    raise RuntimeError("Replica sessions are read-only")
+
+
+def create_replica_sessionmaker(url: str) -> sessionmaker:
+    """Create a sessionmaker for a read replica whose sessions refuse to write"""
+    replica_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        execution_options=(
+            {"postgresql_readonly": True} if url.startswith("postgresql") else {}
+        ),
+    )
+    factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        info={"replica": True},
+    )
+    event.listen(factory, "before_flush", _reject_flush)
+    return factory
+
+
+class SessionRouter:
+    """
+    Hands out primary sessions for writes and replica sessions for reads.
+
+    Safe (GET/HEAD) requests are spread round robin over the replicas, unless the same
+    client wrote within the last REPLICA_STICKINESS_SECONDS, in which case it reads from
+    the primary to see its own writes. Without replicas everything goes to the primary.
+    Stickiness is tracked per worker process.
+    """
+
+    READ_METHODS = {"GET", "HEAD"}
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replicas: list[sessionmaker],
+        stickiness_seconds: int = REPLICA_STICKINESS_SECONDS,
+    ):
+        self.primary = primary
+        self.replicas = itertools.cycle(replicas) if replicas else None
+        self.stickiness_seconds = stickiness_seconds
+        self._sticky_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, method: str, client_key: str | None) -> Session:
+        if (
+            self.replicas is None
+            or method not in self.READ_METHODS
+            or self._is_sticky(client_key)
+        ):
+            return self.primary()
+        with self._lock:
+            replica = next(self.replicas)
+        return replica()
+
+    def mark_write(self, client_key: str | None):
+        if client_key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._sticky_until[client_key] = now + self.stickiness_seconds
+            # Drop expired entries so the map only holds recent writers
+            for key in [k for k, until in self._sticky_until.items() if until <= now]:
+                del self._sticky_until[key]
+
+    def _is_sticky(self, client_key: str | None) -> bool:
+        if client_key is None:
+            return False
+        return self._sticky_until.get(client_key, 0) > time.monotonic()
+
+
+session_router = SessionRouter(
+    SessionLocal,
+    [create_replica_sessionmaker(url) for url in DATABASE_REPLICA_URLS],
+)
+
+
+def _client_key(request: Request) -> str | None:
+    """Identify the client by its bearer token (hashed) or, if anonymous, its address"""
+    identity = request.headers.get("authorization") or (
+        request.client.host if request.client else None
+    )
+    if identity is None:
+        return None
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request = None):
+    if request is None:
+        # Used outside of a request (startup tasks, scripts): always the primary
+        db = SessionLocal()
+    else:
+        client_key = _client_key(request)
+        db = session_router.session_for(request.method, client_key)
     try:
         yield db
     finally:
         db.close()
+        if request is not None and request.method not in SessionRouter.READ_METHODS:
+            session_router.mark_write(client_key)
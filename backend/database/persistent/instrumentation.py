@@ -0,0 +1,101 @@
+import heapq
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.config.settings import (
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_LOG_PARAMETERS,
+    QUERY_STATS_SLOWEST_COUNT,
+    N_PLUS_ONE_THRESHOLD,
+)
+
+"""
+SQL instrumentation.
+
+Every statement executed by any engine is timed. Statements above SLOW_QUERY_THRESHOLD_MS
+go to the slow-query log (with their bound parameters in development only), and while a `track_queries()` block is active (the API middleware
+opens one per request) count, total time, the slowest statements and repeated statements
+(possible N+1 queries) are collected in a QueryStats object.
+"""
+
+logger = logging.getLogger("papi.sql")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements[statement] += 1
+        if len(self.slowest) < QUERY_STATS_SLOWEST_COUNT:
+            heapq.heappush(self.slowest, (duration_ms, statement))
+        else:
+            heapq.heappushpop(self.slowest, (duration_ms, statement))
+
+    def slowest_statements(self) -> list[tuple[float, str]]:
+        """Slowest statements of the request, slowest first"""
+        return sorted(self.slowest, reverse=True)
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        """Statements executed at least `threshold` times, typically a lazy load in a loop"""
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= threshold
+        }
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """
+    Collect statistics of all statements executed in this context
+
+    Usage:
+        with track_queries() as stats:
+            ...
+        print(stats.count, stats.total_ms)
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration_ms)
+
+    if duration_ms >= SLOW_QUERY_THRESHOLD_MS:
+        if SLOW_QUERY_LOG_PARAMETERS:
+            logger.warning(
+                "Slow query (%.1f ms): %s parameters=%r",
+                duration_ms,
+                statement,
+                parameters,
+            )
+        else:
+            logger.warning("Slow query (%.1f ms): %s", duration_ms, statement)
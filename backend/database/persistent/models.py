@@ -1,4 +1,7 @@
 from sqlalchemy import (
+    DDL,
+    event,
+    text,
     String,
     Integer,
     DateTime,
@@ -6,10 +9,20 @@ from sqlalchemy import (
     Text,
     Boolean,
     CheckConstraint,
+    Index,
     Enum as SQLAlchemyEnum,
 )
-from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
-from sqlalchemy.types import TypeDecorator, JSON
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    relationship,
+    Mapped,
+    mapped_column,
+    validates,
+)
+from sqlalchemy.types import JSON
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from backend.database.persistent.compression import CompressedText
+from bisect import bisect_right
 from datetime import datetime
 from enum import Enum
 import json
@@ -20,19 +33,14 @@ class Base(DeclarativeBase):
     pass
 
 
-# For SQLite compatibility with JSON
-class JSONType(TypeDecorator):
-    impl = Text
-
-    def process_bind_param(self, value, dialect):
-        if value is not None:
-            value = json.dumps(value)
-        return value
+# Full-text search documents on PostgreSQL, shared by the GIN indexes and the search queries
+QUESTION_TSVECTOR = (
+    "to_tsvector('german', questions.question || ' ' || coalesce(questions.llm_answer, ''))"
+)
+MESSAGE_TSVECTOR = "to_tsvector('german', messages.content)"
 
-    def process_result_value(self, value, dialect):
-        if value is not None:
-            value = json.loads(value)
-        return value
+# Native JSON storage: JSONB on PostgreSQL, JSON1 (text decoded once per load) on SQLite
+JSONType = JSON().with_variant(JSONB(), "postgresql")
 
 
 class UserRole(Enum):
@@ -116,10 +124,16 @@ class Case(Base):
         nullable=False,
     )  # status of the document (uploaded, processed, etc.)
     case_number: Mapped[int] = mapped_column(Integer)  # 1 or 2
-    case_metadata: Mapped[dict] = mapped_column(JSON)  # metadata of the document
+    case_metadata: Mapped[dict] = mapped_column(JSONType)  # metadata of the document
     content_text: Mapped[str] = mapped_column(
-        Text
-    )  # extracted text content of the document
+        CompressedText
+    )  # extracted text content of the document (zstd-compressed when large)
+    page_offsets: Mapped[list[int]] = mapped_column(
+        JSONType, nullable=True
+    )  # start offset of every page in content_text
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )  # SHA-256 of the file, key of its extraction cache entries
 
     # Foreign Keys
     user_id: Mapped[str] = mapped_column(
@@ -139,6 +153,51 @@ class Case(Base):
         "CaseDiscussion", back_populates="case", cascade="all, delete-orphan"
     )
 
+    def page_number_at(self, offset: int) -> int | None:
+        """Page (starting at 1) of a position in content_text, e.g. to cite "Seite 3" """
+        if not self.page_offsets:
+            return None
+        return bisect_right(self.page_offsets, offset)
+
+    def page_text(self, page_number: int) -> str:
+        """Text of a page (starting at 1)"""
+        if not self.page_offsets:
+            return self.content_text if page_number == 1 else ""
+        start = self.page_offsets[page_number - 1]
+        end = (
+            self.page_offsets[page_number]
+            if page_number < len(self.page_offsets)
+            else len(self.content_text)
+        )
+        return self.content_text[start:end]
+
+
+class ExtractedDocument(Base):
+    """
+    Extraction cache: the page texts of a file, keyed by the SHA-256 of its content
+    and the extractor that parsed it.
+
+    Reprocessing and duplicate uploads of the same bytes (by any user) reuse the
+    pages instead of parsing the file again. Entries are deleted with the last case
+    of their content.
+    """
+
+    __tablename__ = "extracted_documents"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # The same bytes read by another extractor (e.g. as .txt) give other pages
+    extractor: Mapped[str] = mapped_column(String(32), primary_key=True)
+    pages: Mapped[str] = mapped_column(
+        CompressedText, nullable=False
+    )  # JSON list of the page texts
+    page_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now()
+    )
+
+    def to_pages(self) -> list[str]:
+        return json.loads(self.pages)
+
 
 class QuestionSet(Base):
     """
@@ -183,7 +242,7 @@ class Question(Base):
     question: Mapped[str] = mapped_column(Text, nullable=False)
     context: Mapped[str] = mapped_column(Text, nullable=True)
     difficulty: Mapped[str] = mapped_column(String(10), nullable=False)
-    _keywords: Mapped[str] = mapped_column("keywords", Text, nullable=False)
+    keywords: Mapped[list[str]] = mapped_column(JSONType, nullable=False)
     llm_answer: Mapped[str] = mapped_column(
         Text, nullable=True
     )  # LLM_Answer is part of the Question Object
@@ -196,19 +255,25 @@ class Question(Base):
         Integer, ForeignKey("question_sets.id", ondelete="CASCADE")
     )
 
-    # Getter and Setter for keywords
-    @property
-    def keywords(self):
-        # Convert from DB string back to list
-        return json.loads(self._keywords) if self._keywords else []
-
-    @keywords.setter
-    def keywords(self, value):
-        # Convert list to string for DB
-        if isinstance(value, list):
-            self._keywords = json.dumps(value)
-        else:
-            self._keywords = value
+    __table_args__ = (
+        # GIN index serves keyword containment (@>) lookups on PostgreSQL
+        Index("ix_questions_keywords", "keywords", postgresql_using="gin").ddl_if(
+            dialect="postgresql"
+        ),
+        # GIN index over the german tsvector of question and model answer (full-text search)
+        Index(
+            "ix_questions_fulltext",
+            text(QUESTION_TSVECTOR),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @validates("keywords")
+    def validate_keywords(self, key, value):
+        # Accept JSON-encoded keyword lists coming from the LLM validation layer
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
 
     # Relationships
     question_set: Mapped["QuestionSet"] = relationship(back_populates="questions")
@@ -302,6 +367,12 @@ class AnswerDiscussion(Base):
         cascade="all, delete-orphan",
         uselist=False,
     )
+    # Relationship (1 AnswerDiscussion : 0..1 MessageArchive)
+    message_archive: Mapped["MessageArchive"] = relationship(
+        "MessageArchive",
+        cascade="all, delete-orphan",
+        uselist=False,
+    )
 
 
 class MessageRole(Enum):
@@ -335,6 +406,106 @@ class Message(Base):
         "AnswerDiscussion", back_populates="messages"
     )
 
+    __table_args__ = (
+        # GIN index over the german tsvector of the content (full-text search)
+        Index(
+            "ix_messages_fulltext",
+            text(MESSAGE_TSVECTOR),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        # Ids of archived messages must never be handed out again
+        {"sqlite_autoincrement": True},
+    )
+
+    def to_dict(self) -> dict:
+        """Serializable form used by the message archive and the chat history cache"""
+        return {
+            "id": self.id,
+            "role": self.role.value,
+            "content": self.content,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, answer_discussion_id: int) -> "Message":
+        """Rebuild a transient Message from its serialized form"""
+        return cls(
+            id=data["id"],
+            role=MessageRole(data["role"]),
+            content=data["content"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            answer_discussion_id=answer_discussion_id,
+        )
+
+
+class MessageArchive(Base):
+    """
+    Cold storage for the messages of an idle AnswerDiscussion.
+
+    The messages are moved out of the messages table into one compressed JSON
+    blob per answer discussion and read back transparently by the database handler.
+    """
+
+    __tablename__ = "message_archives"
+
+    answer_discussion_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("answer_discussions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    messages: Mapped[str] = mapped_column(
+        CompressedText, nullable=False
+    )  # JSON list of {id, role, content, created_at}, oldest first
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(), onupdate=lambda: datetime.now()
+    )
+
+    # Relationship (1 MessageArchive : N ArchivedMessage)
+    entries: Mapped[list["ArchivedMessage"]] = relationship(
+        "ArchivedMessage", cascade="all, delete-orphan"
+    )
+
+    def to_messages(self) -> list[Message]:
+        """Rebuild the archived messages as transient Message objects, oldest first"""
+        return [
+            Message.from_dict(message, self.answer_discussion_id)
+            for message in json.loads(self.messages)
+        ]
+
+
+class ArchivedMessage(Base):
+    """
+    Full-text search entry of an archived message.
+
+    The content itself is only kept in the compressed MessageArchive. PostgreSQL
+    stores the german tsvector here, SQLite indexes the content in the contentless
+    archived_messages_fts table.
+    """
+
+    __tablename__ = "archived_messages"
+
+    # ID the message had in the messages table
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    answer_discussion_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("message_archives.answer_discussion_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Unused on SQLite
+    search_document: Mapped[str | None] = mapped_column(
+        Text().with_variant(TSVECTOR(), "postgresql")
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_archived_messages_fulltext",
+            "search_document",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 class AnswerStatus(Enum):
     DISCUSSION = "discussion"
@@ -469,3 +640,90 @@ class Prompt(Base):
     question_sets: Mapped[list["QuestionSet"]] = relationship(
         "QuestionSet", back_populates="prompt"
     )
+
+
+# Full-text search over questions, model answers and chat messages
+# SQLite: external content FTS5 tables kept in sync on insert/update/delete by triggers
+SQLITE_FULLTEXT_DDL = {
+    Question.__table__: [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+            question, llm_answer, content='questions', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts(rowid, question, llm_answer)
+            VALUES (new.id, new.question, new.llm_answer);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts(questions_fts, rowid, question, llm_answer)
+            VALUES ('delete', old.id, old.question, old.llm_answer);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_update
+        AFTER UPDATE OF question, llm_answer ON questions BEGIN
+            INSERT INTO questions_fts(questions_fts, rowid, question, llm_answer)
+            VALUES ('delete', old.id, old.question, old.llm_answer);
+            INSERT INTO questions_fts(rowid, question, llm_answer)
+            VALUES (new.id, new.question, new.llm_answer);
+        END""",
+    ],
+    Message.__table__: [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content, content='messages', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_update
+        AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+    ],
+    # Contentless: the archived content isn't stored a second time uncompressed.
+    # The database handler fills it on archival, entries are removed below.
+    ArchivedMessage.__table__: [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS archived_messages_fts USING fts5(
+            content, content='', tokenize='unicode61 remove_diacritics 2'
+        )""",
+    ],
+}
+
+for _table, _statements in SQLITE_FULLTEXT_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            _table, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+        )
+    # The FTS table outlives a dropped content table and would keep stale rowids
+    event.listen(
+        _table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_table.name}_fts").execute_if(dialect="sqlite"),
+    )
+
+
+@event.listens_for(MessageArchive, "before_delete")
+def _delete_archived_messages_fts(mapper, connection, archive):
+    """
+    Drop the search entries of a deleted archive on SQLite
+
+    A contentless FTS5 table can only delete an entry given its original content,
+    which no trigger has access to.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(
+        text(
+            "INSERT INTO archived_messages_fts(archived_messages_fts, rowid, content) "
+            "VALUES ('delete', :id, :content)"
+        ),
+        [
+            {"id": message.id, "content": message.content}
+            for message in archive.to_messages()
+        ],
+    )
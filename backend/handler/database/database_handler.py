@@ -7,55 +7,209 @@ from backend.database.persistent.models import (
     CaseDiscussion,
     AnswerDiscussion,
     Message,
+    MessageArchive,
+    ArchivedMessage,
+    ExtractedDocument,
     Prompt,
+    QUESTION_TSVECTOR,
+    MESSAGE_TSVECTOR,
 )
-from sqlalchemy.orm import joinedload
+from sqlalchemy import (
+    column,
+    exists,
+    func,
+    literal,
+    literal_column,
+    null,
+    or_,
+    select,
+    table,
+    text,
+    tuple_,
+    type_coerce,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import defer, joinedload, load_only, selectinload
 from sqlalchemy.exc import SQLAlchemyError
+from contextlib import contextmanager
 from datetime import datetime
 from sqlalchemy.orm import Session
-from backend.database.persistent.models import PromptType
+import json
+import re
+from backend.config.settings import MAX_PAGE_SIZE
+from backend.utils.pagination import encode_cursor, decode_cursor
+from backend.handler.database.query_cache import cached, invalidates, query_cache
+from backend.database.persistent.models import (
+    PromptType,
+    PromptCategory,
+    PromptSubCategory,
+)
+
+
+def _snippet(content: str, terms: list[str], size: int = 12) -> str:
+    """
+    Cut a window of `size` words around the first matching word, matches in
+    brackets like the snippets of the full-text index
+    """
+    words = content.split()
+
+    def matches(word: str) -> bool:
+        word = re.sub(r"\W+", "", word.casefold())
+        return any(word.startswith(term) for term in terms)
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, min(first - size // 2, len(words) - size))
+    window = [
+        f"[{word}]" if matches(word) else word for word in words[start : start + size]
+    ]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + size < len(words) else ""
+    return prefix + " ".join(window) + suffix
 
 
-# @TODO: Tryo to get cached queries with redis first
 class DatabaseHandler:
     def __init__(self, db: Session):
         self.db = db
+        self._transaction_depth = 0
+        self._after_commit_callbacks = []
+
+    # TRANSACTIONS
+    @contextmanager
+    def _transaction(self):
+        """
+        Group several handler operations into one unit of work
+
+        Inside the context the handler methods only flush (so generated IDs are
+        available), the outermost context commits once on success and rolls back
+        everything on error. Contexts can be nested.
+        """
+        self._transaction_depth += 1
+        try:
+            yield
+            if self._transaction_depth == 1:
+                self.db.commit()
+                self._run_after_commit_callbacks()
+        except BaseException:
+            if self._transaction_depth == 1:
+                self.db.rollback()
+                self._after_commit_callbacks.clear()
+            raise
+        finally:
+            self._transaction_depth -= 1
+
+    def _commit(self):
+        """Commit, or only flush when running inside a unit of work"""
+        if self._transaction_depth:
+            self.db.flush()
+        else:
+            self.db.commit()
+            self._run_after_commit_callbacks()
+
+    def _rollback(self):
+        """
+        Roll back a failed operation, inside a unit of work the error is only
+        propagated and the outermost context rolls back the whole unit
+        """
+        if not self._transaction_depth:
+            self.db.rollback()
+
+    def _after_commit(self, callback):
+        """
+        Run a callback (e.g. a cache write) once the current changes are committed
+
+        Outside a unit of work the changes are committed already and the callback runs
+        right away, inside one it runs after the outermost commit and is dropped on rollback.
+        """
+        self._after_commit_callbacks.append(callback)
+        if not self._transaction_depth:
+            self._run_after_commit_callbacks()
+
+    def _run_after_commit_callbacks(self):
+        callbacks, self._after_commit_callbacks = self._after_commit_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    # PAGINATION
+    def _keyset_page(
+        self,
+        query,
+        order_columns: list,
+        page_size: int,
+        cursor: str | None = None,
+        descending: bool = False,
+    ) -> tuple[list, str | None]:
+        """
+        Apply keyset pagination to a query
+
+        Args:
+            query: Query to paginate
+            order_columns: Columns forming a unique, stable sort key (last one should be the primary key)
+            page_size: Number of rows per page, capped at MAX_PAGE_SIZE
+            cursor: Cursor returned with the previous page, None for the first page
+            descending: Whether to page through the sort key in descending order
+
+        Returns:
+            Tuple of (rows of the page, cursor of the next page or None if this is the last page)
+        """
+        page_size = min(page_size, MAX_PAGE_SIZE)
+        if cursor:
+            values = decode_cursor(cursor, order_columns)
+            key = tuple_(*order_columns)
+            last_key = tuple_(
+                *[literal(value, col.type) for value, col in zip(values, order_columns)]
+            )
+            query = query.filter(key < last_key if descending else key > last_key)
+
+        ordering = [col.desc() if descending else col.asc() for col in order_columns]
+        rows = query.order_by(*ordering).limit(page_size + 1).all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(
+                [getattr(rows[-1], col.key) for col in order_columns]
+            )
+        return rows, next_cursor
 
     # CREATE
     def _create_user(self, user_data):
         try:
             self.db.add(user_data)
-            self.db.commit()
+            self._commit()
             return user_data
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
+    @invalidates(
+        lambda case_data: [f"user_cases:{case_data.user_id}", f"case:{case_data.id}"]
+    )
     def _create_case(self, case_data):
         try:
             self.db.add(case_data)
-            self.db.commit()
+            self._commit()
             return case_data
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_question_set(self, question_set: QuestionSet) -> QuestionSet:
         try:
             self.db.add(question_set)
-            self.db.commit()
+            self._commit()
             return question_set
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_question(self, question: Question) -> Question:
         try:
             self.db.add(question)
-            self.db.commit()
+            self._commit()
             return question
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_question_set_and_questions(
@@ -67,10 +221,10 @@ class DatabaseHandler:
             for question in questions:
                 question.question_set_id = question_set.id
                 self.db.add(question)
-            self.db.commit()
+            self._commit()
             return question_set, questions
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_case_discussion(
@@ -78,10 +232,10 @@ class DatabaseHandler:
     ) -> CaseDiscussion:
         try:
             self.db.add(case_discussion)
-            self.db.commit()
+            self._commit()
             return case_discussion
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_answer_discussion(
@@ -89,28 +243,40 @@ class DatabaseHandler:
     ) -> AnswerDiscussion:
         try:
             self.db.add(answer_discussion)
-            self.db.commit()
+            self._commit()
             return answer_discussion
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_message(self, message: Message) -> Message:
         try:
             self.db.add(message)
-            self.db.commit()
+            self._commit()
             return message
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
     def _create_prompt(self, prompt: Prompt) -> Prompt:
         try:
             self.db.add(prompt)
-            self.db.commit()
+            self._commit()
             return prompt
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
+            raise e
+
+    def _create_extracted_document(
+        self, document: ExtractedDocument
+    ) -> ExtractedDocument:
+        """Store the extracted pages of a file, keeping an existing entry of the same content"""
+        try:
+            document = self.db.merge(document)
+            self._commit()
+            return document
+        except SQLAlchemyError as e:
+            self._rollback()
             raise e
 
     # RETRIEVE
@@ -123,9 +289,49 @@ class DatabaseHandler:
     def _get_all_users(self) -> list[User] | None:
         return self.db.query(User).all()
 
+    def _get_users_page(
+        self, page_size: int, cursor: str | None = None
+    ) -> tuple[list[User], str | None]:
+        return self._keyset_page(
+            self.db.query(User).options(
+                load_only(
+                    User.id,
+                    User.email,
+                    User.first_name,
+                    User.last_name,
+                    User.role,
+                    User.registration_date,
+                    User.last_login_date,
+                )
+            ),
+            [User.id],
+            page_size,
+            cursor,
+        )
+
+    @cached(
+        Case,
+        ttl=300,
+        tags=lambda case, case_id: [
+            f"case:{case_id}",
+            *([f"user_cases:{case.user_id}"] if case else []),
+        ],
+        exclude=("content_text",),
+    )
     def _get_case_by_id(self, case_id) -> Case | None:
-        return self.db.query(Case).filter(Case.id == case_id).first()
+        """Get a case by its ID (without loading content_text)"""
+        return (
+            self.db.query(Case)
+            .options(defer(Case.content_text))
+            .filter(Case.id == case_id)
+            .first()
+        )
 
+    @cached(
+        Question,
+        ttl=600,
+        tags=lambda question, question_id: [f"question:{question_id}", "questions"],
+    )
     def _get_question_by_id(self, question_id: int) -> Question | None:
         """
         Get a question by its ID
@@ -152,7 +358,7 @@ class DatabaseHandler:
         """
         return (
             self.db.query(AnswerDiscussion)
-            .options(joinedload(AnswerDiscussion.question))
+            .options(joinedload(AnswerDiscussion.question).defer(Question.llm_answer))
             .filter(AnswerDiscussion.id == answer_discussion_id)
             .first()
         )
@@ -169,15 +375,159 @@ class DatabaseHandler:
         Returns:
             List of Message objects
         """
-        return (
+        messages = (
             self.db.query(Message)
             .filter(Message.answer_discussion_id == answer_discussion_id)
             .order_by(Message.created_at)
             .all()
         )
+        return self._get_archived_messages(answer_discussion_id) + messages
+
+    def _get_messages_page_by_answer_discussion_id(
+        self, answer_discussion_id: int, page_size: int, cursor: str | None = None
+    ) -> tuple[list[Message], str | None]:
+        """
+        Get a page of messages of an answer discussion, newest first
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+            page_size: Number of messages per page
+            cursor: Cursor of the previous (newer) page
+
+        Returns:
+            Tuple of (messages newest first, cursor of the next older page)
+        """
+        order_columns = [Message.created_at, Message.id]
+        messages, next_cursor = self._keyset_page(
+            self.db.query(Message).filter(
+                Message.answer_discussion_id == answer_discussion_id
+            ),
+            order_columns,
+            page_size,
+            cursor,
+            descending=True,
+        )
+        if next_cursor is not None:
+            return messages, next_cursor
+
+        # The hot table is exhausted, continue with the archived (older) messages
+        archived = self._get_archived_messages(answer_discussion_id)
+        if not archived:
+            return messages, None
+
+        if messages:
+            last_key = (messages[-1].created_at, messages[-1].id)
+        elif cursor:
+            last_key = tuple(decode_cursor(cursor, order_columns))
+        else:
+            last_key = None
+        older = [
+            message
+            for message in reversed(archived)
+            if last_key is None or (message.created_at, message.id) < last_key
+        ]
+        free = max(min(page_size, MAX_PAGE_SIZE) - len(messages), 0)
+        messages = messages + older[:free]
+        if len(older) > free:
+            next_cursor = encode_cursor([messages[-1].created_at, messages[-1].id])
+        return messages, next_cursor
+
+    def _get_latest_messages_by_answer_discussion_ids(
+        self, answer_discussion_ids: list[int]
+    ) -> dict[int, Message]:
+        """
+        Get the most recent message of each answer discussion in a single query
+
+        Args:
+            answer_discussion_ids: IDs of the answer discussions
+
+        Returns:
+            Dictionary mapping answer discussion ID to its latest Message
+        """
+        if not answer_discussion_ids:
+            return {}
+        ranked = (
+            select(
+                Message.id,
+                func.row_number()
+                .over(
+                    partition_by=Message.answer_discussion_id,
+                    order_by=(Message.created_at.desc(), Message.id.desc()),
+                )
+                .label("position"),
+            )
+            .where(Message.answer_discussion_id.in_(answer_discussion_ids))
+            .subquery()
+        )
+        messages = (
+            self.db.query(Message)
+            .join(ranked, Message.id == ranked.c.id)
+            .filter(ranked.c.position == 1)
+            .all()
+        )
+        latest = {message.answer_discussion_id: message for message in messages}
 
+        # Discussions without hot messages may have archived ones
+        missing_ids = [id for id in answer_discussion_ids if id not in latest]
+        if missing_ids:
+            archives = (
+                self.db.query(MessageArchive)
+                .filter(MessageArchive.answer_discussion_id.in_(missing_ids))
+                .all()
+            )
+            for archive in archives:
+                latest[archive.answer_discussion_id] = archive.to_messages()[-1]
+        return latest
+
+    def _get_extracted_document(
+        self, content_hash: str, extractor: str
+    ) -> ExtractedDocument | None:
+        return self.db.get(ExtractedDocument, (content_hash, extractor))
+
+    def _get_archived_messages(self, answer_discussion_id: int) -> list[Message]:
+        """
+        Get the archived messages of an answer discussion as transient Message objects
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+
+        Returns:
+            List of Message objects ordered by creation time, empty if nothing is archived
+        """
+        archive = self.db.get(MessageArchive, answer_discussion_id)
+        return archive.to_messages() if archive else []
+
+    @cached(
+        Case,
+        ttl=60,
+        tags=lambda cases, user_id: [
+            f"user_cases:{user_id}",
+            *(f"case:{case.id}" for case in cases or ()),
+        ],
+        exclude=("content_text",),
+    )
     def _get_all_cases_for_user(self, user_id) -> list[Case] | None:
-        return self.db.query(Case).filter(Case.user_id == user_id).all()
+        """Get all cases of a user (without loading content_text)"""
+        return (
+            self.db.query(Case)
+            .options(defer(Case.content_text))
+            .filter(Case.user_id == user_id)
+            .all()
+        )
+
+    def _get_cases_page_for_user(
+        self, user_id: str, page_size: int, cursor: str | None = None
+    ) -> tuple[list[Case], str | None]:
+        """Get a page of the cases of a user, most recently uploaded first (without content_text)"""
+        return self._keyset_page(
+            self.db.query(Case)
+            .options(defer(Case.content_text), defer(Case.case_metadata))
+            .filter(Case.user_id == user_id),
+            [Case.upload_date, Case.id],
+            page_size,
+            cursor,
+            descending=True,
+        )
 
     def _get_question_set_by_topic_and_user(
         self, case_id: str, topic: str, user_id: str
@@ -196,53 +546,341 @@ class DatabaseHandler:
             return None
         return question_set
 
-    def _get_unanswered_questions_by_topic(
-        self, case_id: str, topic: str
-    ) -> list[Question] | None:
-        questions = (
+    def _get_random_unanswered_question(
+        self, case_id: str, topic: str | None = None
+    ) -> Question | None:
+        """
+        Pick a random unanswered question of a case directly in the database
+
+        Only the columns needed to open a discussion are loaded, so the long
+        llm_answer texts of the question pool are never hydrated.
+
+        Args:
+            case_id: ID of the case
+            topic: Optional prompt category or sub category to restrict the pick to
+
+        Returns:
+            Question object or None if no unanswered question is left
+        """
+        query = (
             self.db.query(Question)
+            .options(load_only(Question.id, Question.question))
             .join(QuestionSet)
             .filter(
                 QuestionSet.case_id == case_id,
-                QuestionSet.topic == topic,
+                Question.is_answered.is_(False),
             )
-            .all()
         )
-        if questions is None:
-            return None
-        return questions
+        if topic:
+            query = query.join(Prompt).filter(self._prompt_topic_filter(topic))
+        return query.order_by(func.random()).limit(1).first()
+
+    def _prompt_topic_filter(self, topic: str):
+        """Build a filter matching prompts whose category or sub category is the topic"""
+        conditions = []
+        if topic in {category.value for category in PromptCategory}:
+            conditions.append(Prompt.category == PromptCategory(topic))
+        if topic in {sub_category.value for sub_category in PromptSubCategory}:
+            conditions.append(Prompt.sub_category == PromptSubCategory(topic))
+        if not conditions:
+            raise ValueError(f"Unknown topic: {topic}")
+        return or_(*conditions)
 
-    async def _get_all_unanswered_questions(
-        self, case_id: str
-    ) -> list[Question] | None:
+    def _get_questions_by_keyword_for_user(
+        self, user_id: str, keyword: str
+    ) -> list[Question]:
+        """
+        Get all questions of a user's cases that are tagged with a keyword
+
+        Args:
+            user_id: ID of the user
+            keyword: Keyword to look for
+
+        Returns:
+            List of Question objects without their llm_answer loaded
+        """
         return (
             self.db.query(Question)
-            .join(QuestionSet)
-            .filter(
-                QuestionSet.case_id == case_id,
+            .options(
+                load_only(
+                    Question.id,
+                    Question.question,
+                    Question.difficulty,
+                    Question.keywords,
+                    Question.question_set_id,
+                )
             )
+            .join(QuestionSet)
+            .join(Case)
+            .filter(Case.user_id == user_id, self._keyword_filter(keyword))
+            .order_by(Question.id)
             .all()
         )
 
-    def _get_case_discussions(self, case_id: str, user_id: str) -> list[CaseDiscussion]:
+    def _keyword_filter(self, keyword: str):
+        """Build a keyword containment filter for the current dialect"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            # jsonb @> '["keyword"]' is answered by the GIN index
+            return type_coerce(Question.keywords, JSONB).contains([keyword])
+        # SQLite: expand the JSON array with the JSON1 table-valued json_each
+        keywords = func.json_each(Question.keywords).table_valued("value")
+        return exists(
+            select(1).select_from(keywords).where(keywords.c.value == keyword)
+        )
+
+    def _index_archived_messages(
+        self, archive: MessageArchive, messages: list[Message]
+    ) -> None:
+        """Keep archived messages searchable, their rows leave the messages index"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            archive.entries.extend(
+                ArchivedMessage(
+                    id=message.id,
+                    search_document=func.to_tsvector(
+                        literal_column("'german'"), message.content
+                    ),
+                )
+                for message in messages
+            )
+            return
+        archive.entries.extend(ArchivedMessage(id=message.id) for message in messages)
+        self.db.execute(
+            text(
+                "INSERT INTO archived_messages_fts(rowid, content) VALUES (:id, :content)"
+            ),
+            [{"id": message.id, "content": message.content} for message in messages],
+        )
+
+    def _search_for_user(
+        self, user_id: str, search_query: str, limit: int, offset: int
+    ) -> list[dict]:
+        """
+        Full-text search over the questions, model answers and chat messages of a user
+
+        Args:
+            user_id: ID of the user whose cases and discussions are searched
+            search_query: Free text search query
+            limit: Maximum number of hits to return
+            offset: Number of hits to skip
+
+        Returns:
+            List of hits ordered by relevance (best first)
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            selects = self._postgres_fulltext_selects(user_id, search_query)
+        else:
+            selects = self._sqlite_fulltext_selects(user_id, search_query)
+        hits = union_all(*selects).subquery()
+        rows = self.db.execute(
+            select(hits)
+            .order_by(hits.c.score.desc(), hits.c.kind, hits.c.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        results = [dict(row._mapping) for row in rows]
+        self._add_archived_snippets(results, search_query)
+        return results
+
+    def _add_archived_snippets(self, hits: list[dict], search_query: str) -> None:
+        """Build the snippets of archived message hits from their decoded archives"""
+        archived_hits = [hit for hit in hits if hit["snippet"] is None]
+        if not archived_hits:
+            return
+        archives = self.db.query(MessageArchive).filter(
+            MessageArchive.answer_discussion_id.in_(
+                {hit["answer_discussion_id"] for hit in archived_hits}
+            )
+        )
+        contents = {
+            message.id: message.content
+            for archive in archives
+            for message in archive.to_messages()
+        }
+        terms = [term.casefold() for term in re.findall(r"\w+", search_query)]
+        for hit in archived_hits:
+            hit["snippet"] = _snippet(contents.get(hit["id"], ""), terms)
+
+    def _postgres_fulltext_selects(self, user_id: str, search_query: str):
+        """Build the question and message hit selects using the german tsvector GIN indexes"""
+        tsquery = func.websearch_to_tsquery(literal_column("'german'"), search_query)
+        question_document = literal_column(QUESTION_TSVECTOR)
+        message_document = literal_column(MESSAGE_TSVECTOR)
+
+        question_hits = (
+            select(
+                literal("question").label("kind"),
+                Question.id.label("id"),
+                QuestionSet.case_id.label("case_id"),
+                null().label("answer_discussion_id"),
+                func.ts_headline(
+                    literal_column("'german'"), Question.question, tsquery
+                ).label("snippet"),
+                func.ts_rank(question_document, tsquery).label("score"),
+            )
+            .join(QuestionSet, Question.question_set_id == QuestionSet.id)
+            .join(Case, QuestionSet.case_id == Case.id)
+            .where(Case.user_id == user_id, question_document.op("@@")(tsquery))
+        )
+        message_hits = (
+            select(
+                literal("message").label("kind"),
+                Message.id.label("id"),
+                CaseDiscussion.case_id.label("case_id"),
+                Message.answer_discussion_id.label("answer_discussion_id"),
+                func.ts_headline(
+                    literal_column("'german'"), Message.content, tsquery
+                ).label("snippet"),
+                func.ts_rank(message_document, tsquery).label("score"),
+            )
+            .join(AnswerDiscussion, Message.answer_discussion_id == AnswerDiscussion.id)
+            .join(
+                CaseDiscussion,
+                AnswerDiscussion.case_discussion_id == CaseDiscussion.id,
+            )
+            .where(
+                CaseDiscussion.user_id == user_id,
+                message_document.op("@@")(tsquery),
+            )
+        )
+        # Snippets of archived messages are built from the decoded archive
+        archived_message_hits = (
+            select(
+                literal("message").label("kind"),
+                ArchivedMessage.id.label("id"),
+                CaseDiscussion.case_id.label("case_id"),
+                ArchivedMessage.answer_discussion_id.label("answer_discussion_id"),
+                null().label("snippet"),
+                func.ts_rank(ArchivedMessage.search_document, tsquery).label("score"),
+            )
+            .join(
+                AnswerDiscussion,
+                ArchivedMessage.answer_discussion_id == AnswerDiscussion.id,
+            )
+            .join(
+                CaseDiscussion,
+                AnswerDiscussion.case_discussion_id == CaseDiscussion.id,
+            )
+            .where(
+                CaseDiscussion.user_id == user_id,
+                ArchivedMessage.search_document.op("@@")(tsquery),
+            )
+        )
+        return question_hits, message_hits, archived_message_hits
+
+    def _sqlite_fulltext_selects(self, user_id: str, search_query: str):
+        """Build the question and message hit selects using the FTS5 tables"""
+        # Quote every term so user input can't inject FTS5 syntax; prefix matching
+        # stands in for the missing german stemmer ("Abwehr" finds "Abwehrmechanismen")
+        terms = re.findall(r"\w+", search_query)
+        if not terms:
+            raise ValueError("Search query must contain at least one word")
+        match_query = " ".join(f'"{term}"*' for term in terms)
+
+        questions_fts = table("questions_fts", column("rowid"), column("rank"))
+        messages_fts = table("messages_fts", column("rowid"), column("rank"))
+        archived_messages_fts = table(
+            "archived_messages_fts", column("rowid"), column("rank")
+        )
+
+        question_hits = (
+            select(
+                literal("question").label("kind"),
+                Question.id.label("id"),
+                QuestionSet.case_id.label("case_id"),
+                null().label("answer_discussion_id"),
+                func.snippet(
+                    literal_column("questions_fts"), -1, "[", "]", "…", 12
+                ).label("snippet"),
+                (-questions_fts.c.rank).label("score"),
+            )
+            .select_from(questions_fts)
+            .join(Question, Question.id == questions_fts.c.rowid)
+            .join(QuestionSet, Question.question_set_id == QuestionSet.id)
+            .join(Case, QuestionSet.case_id == Case.id)
+            .where(
+                literal_column("questions_fts").op("MATCH")(match_query),
+                Case.user_id == user_id,
+            )
+        )
+        message_hits = (
+            select(
+                literal("message").label("kind"),
+                Message.id.label("id"),
+                CaseDiscussion.case_id.label("case_id"),
+                Message.answer_discussion_id.label("answer_discussion_id"),
+                func.snippet(
+                    literal_column("messages_fts"), -1, "[", "]", "…", 12
+                ).label("snippet"),
+                (-messages_fts.c.rank).label("score"),
+            )
+            .select_from(messages_fts)
+            .join(Message, Message.id == messages_fts.c.rowid)
+            .join(AnswerDiscussion, Message.answer_discussion_id == AnswerDiscussion.id)
+            .join(
+                CaseDiscussion,
+                AnswerDiscussion.case_discussion_id == CaseDiscussion.id,
+            )
+            .where(
+                literal_column("messages_fts").op("MATCH")(match_query),
+                CaseDiscussion.user_id == user_id,
+            )
+        )
+        # Contentless table: no snippet(), it's built from the decoded archive
+        archived_message_hits = (
+            select(
+                literal("message").label("kind"),
+                ArchivedMessage.id.label("id"),
+                CaseDiscussion.case_id.label("case_id"),
+                ArchivedMessage.answer_discussion_id.label("answer_discussion_id"),
+                null().label("snippet"),
+                (-archived_messages_fts.c.rank).label("score"),
+            )
+            .select_from(archived_messages_fts)
+            .join(ArchivedMessage, ArchivedMessage.id == archived_messages_fts.c.rowid)
+            .join(
+                AnswerDiscussion,
+                ArchivedMessage.answer_discussion_id == AnswerDiscussion.id,
+            )
+            .join(
+                CaseDiscussion,
+                AnswerDiscussion.case_discussion_id == CaseDiscussion.id,
+            )
+            .where(
+                literal_column("archived_messages_fts").op("MATCH")(match_query),
+                CaseDiscussion.user_id == user_id,
+            )
+        )
+        return question_hits, message_hits, archived_message_hits
+
+    def _get_case_discussions(
+        self, case_id: str, user_id: str, page_size: int, cursor: str | None = None
+    ) -> tuple[list[CaseDiscussion], str | None]:
         """
-        Get all case discussions for a specific case and user, with eager loading of answer discussions
+        Get a page of case discussions for a specific case and user, with eager loading of answer discussions
 
         Args:
             case_id: ID of the case
             user_id: ID of the user
+            page_size: Number of case discussions per page
+            cursor: Cursor of the previous page
 
         Returns:
-            List of CaseDiscussion objects with answer_discussions eager-loaded
+            Tuple of (CaseDiscussion objects with answer_discussions eager-loaded, most recent first,
+            cursor of the next page)
         """
-        return (
+        return self._keyset_page(
             self.db.query(CaseDiscussion)
-            .options(joinedload(CaseDiscussion.answer_discussions))
+            # selectinload keeps the LIMIT on case discussions instead of joined rows
+            .options(selectinload(CaseDiscussion.answer_discussions))
             .filter(
                 CaseDiscussion.case_id == case_id, CaseDiscussion.user_id == user_id
-            )
-            .order_by(CaseDiscussion.last_message_at.desc())
-            .all()
+            ),
+            # Ordered by activity on purpose: a discussion with a new message moves
+            # to the front while a client is paging (see the /case_discussions route)
+            [CaseDiscussion.last_message_at, CaseDiscussion.id],
+            page_size,
+            cursor,
+            descending=True,
         )
 
     def _get_all_prompts(self) -> list[Prompt]:
@@ -250,11 +888,23 @@ class DatabaseHandler:
 
     def _get_all_prompts_by_type(self, prompt_type: PromptType) -> list[Prompt]:
         return self.db.query(Prompt).filter(Prompt.type == prompt_type).all()
-    
-    def _get_all_prompts_by_type_negative(self, prompt_type: PromptType) -> list[Prompt]:
+
+    def _get_all_prompts_by_type_negative(
+        self, prompt_type: PromptType
+    ) -> list[Prompt]:
         """get all prompts that are not type x"""
         return self.db.query(Prompt).filter(Prompt.type != prompt_type).all()
 
+    def _get_prompts_fingerprint(self) -> tuple:
+        """Cheap summary of the prompts table that changes whenever a prompt is created or updated"""
+        return tuple(
+            self.db.query(
+                func.count(Prompt.id),
+                func.max(Prompt.version),
+                func.max(Prompt.updated_at),
+            ).one()
+        )
+
     def _get_all_prompt_ids(self) -> list[int]:
         return [prompt.id for prompt in self.db.query(Prompt).all()]
 
@@ -272,10 +922,27 @@ class DatabaseHandler:
                 if hasattr(user, key):
                     setattr(user, key, value)
 
-            self.db.commit()
+            self._commit()
             return user
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
+            raise e
+
+    def _update_prompt(self, prompt_id: str, update_data: dict) -> Prompt | None:
+        try:
+            prompt = self.db.query(Prompt).filter(Prompt.id == prompt_id).first()
+            if not prompt:
+                return None
+
+            for key, value in update_data.items():
+                if hasattr(prompt, key):
+                    setattr(prompt, key, value)
+            prompt.version += 1
+
+            self._commit()
+            return prompt
+        except SQLAlchemyError as e:
+            self._rollback()
             raise e
 
     def _update_user_last_login(self, user_id: str) -> User | None:
@@ -284,12 +951,13 @@ class DatabaseHandler:
             if not user:
                 return None
             user.last_login = datetime.now()
-            self.db.commit()
+            self._commit()
             return user
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
+    @invalidates(lambda case_id, update_data: [f"case:{case_id}"])
     def _update_case(self, case_id: str, update_data: dict) -> Case | None:
         """Generic update function for any case fields"""
         try:
@@ -301,12 +969,15 @@ class DatabaseHandler:
                 if hasattr(case, key):
                     setattr(case, key, value)
 
-            self.db.commit()
+            user_id = case.user_id
+            self._commit()
+            self._invalidate_user_cases(user_id)
             return case
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
+    @invalidates(lambda case_id, status: [f"case:{case_id}"])
     def _update_case_status(self, case_id: str, status: CaseStatus) -> Case | None:
         """Specific function for updating status with type safety"""
         try:
@@ -315,25 +986,145 @@ class DatabaseHandler:
                 return None
 
             case.status = status  # Type checking happens here
-            self.db.commit()
+            user_id = case.user_id
+            self._commit()
+            self._invalidate_user_cases(user_id)
             return case
         except SQLAlchemyError as e:
-            self.db.rollback()
+            self._rollback()
             raise e
 
+    def _invalidate_user_cases(self, user_id: str):
+        # The case lists of the owner are tagged with the case too, but a list read
+        # in flight only knows the tag of its user before the query
+        self._after_commit(lambda: query_cache.invalidate([f"user_cases:{user_id}"]))
+
     # DELETE
+    # Questions are dropped with their case
+    @invalidates(lambda case_id: [f"case:{case_id}", "questions"])
     def _delete_case(self, case_id: str) -> None:
         case = self.db.query(Case).filter(Case.id == case_id).first()
         if case:
+            content_hash, user_id = case.content_hash, case.user_id
             self.db.delete(case)
-            self.db.commit()
+            self.db.flush()
+            self._delete_unreferenced_extracted_documents([content_hash])
+            self._invalidate_user_cases(user_id)
         else:
             raise ValueError(f"Case with id {case_id} not found")
 
+    @invalidates(lambda user_id: [f"user_cases:{user_id}", "questions"])
     def _delete_user(self, user_id: str) -> None:
         user = self.db.query(User).filter(User.id == user_id).first()
         if user:
+            content_hashes = list(
+                self.db.scalars(
+                    select(Case.content_hash).where(Case.user_id == user_id)
+                )
+            )
             self.db.delete(user)
-            self.db.commit()
+            self.db.flush()
+            self._delete_unreferenced_extracted_documents(content_hashes)
         else:
             raise ValueError(f"User with id {user_id} not found")
+
+    def _delete_unreferenced_extracted_documents(
+        self, content_hashes: list[str | None]
+    ) -> None:
+        """
+        Delete the extraction cache entries of contents no case refers to anymore,
+        and commit
+
+        Args:
+            content_hashes: Content hashes of deleted (or never created) cases
+        """
+        try:
+            content_hashes = [h for h in content_hashes if h]
+            if content_hashes:
+                self.db.query(ExtractedDocument).filter(
+                    ExtractedDocument.content_hash.in_(content_hashes),
+                    ~exists().where(
+                        Case.content_hash == ExtractedDocument.content_hash
+                    ),
+                ).delete(synchronize_session=False)
+            self._commit()
+        except SQLAlchemyError as e:
+            self._rollback()
+            raise e
+
+    # ARCHIVAL
+    def _get_idle_answer_discussion_ids(
+        self, idle_before: datetime, limit: int
+    ) -> list[int]:
+        """
+        Get answer discussions that have hot messages but none newer than idle_before
+
+        Args:
+            idle_before: Discussions whose latest message is older are idle
+            limit: Maximum number of IDs to return
+
+        Returns:
+            List of answer discussion IDs
+        """
+        return list(
+            self.db.scalars(
+                select(Message.answer_discussion_id)
+                .group_by(Message.answer_discussion_id)
+                .having(func.max(Message.created_at) < idle_before)
+                .order_by(Message.answer_discussion_id)
+                .limit(limit)
+            )
+        )
+
+    def _archive_messages(
+        self, answer_discussion_id: int, idle_before: datetime | None = None
+    ) -> int:
+        """
+        Move the hot messages of an answer discussion into its compressed archive
+
+        Messages archived earlier are kept, the new ones are appended.
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+            idle_before: Only archive if the latest message is older, checked on the
+                locked messages (a message may have been posted since the discussion
+                was found idle)
+
+        Returns:
+            Number of messages moved
+        """
+        try:
+            with self._transaction():
+                messages = (
+                    self.db.query(Message)
+                    .filter(Message.answer_discussion_id == answer_discussion_id)
+                    .order_by(Message.created_at, Message.id)
+                    .with_for_update()
+                    .all()
+                )
+                if not messages:
+                    return 0
+                if idle_before is not None and (
+                    max(message.created_at for message in messages) >= idle_before
+                ):
+                    return 0
+
+                archive = self.db.get(
+                    MessageArchive, answer_discussion_id, with_for_update=True
+                )
+                archived = json.loads(archive.messages) if archive else []
+                archived.extend(message.to_dict() for message in messages)
+                if archive is None:
+                    archive = MessageArchive(answer_discussion_id=answer_discussion_id)
+                    self.db.add(archive)
+                archive.messages = json.dumps(archived, ensure_ascii=False)
+                archive.message_count = len(archived)
+                self._index_archived_messages(archive, messages)
+
+                for message in messages:
+                    self.db.delete(message)
+                self._commit()
+            return len(messages)
+        except SQLAlchemyError as e:
+            self._rollback()
+            raise e
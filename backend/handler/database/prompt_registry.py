@@ -0,0 +1,70 @@
+import threading
+import time
+from backend.config.settings import PROMPT_REGISTRY_CHECK_SECONDS
+from backend.database.cache.models import CachedPrompt
+from backend.database.persistent.models import PromptType, PromptCategory
+
+"""
+In-process prompt registry.
+
+Prompts change rarely but are read several times per LLM call, so every worker keeps
+all of them in memory. The registry reloads when this worker creates or updates a
+prompt, and otherwise at most every PROMPT_REGISTRY_CHECK_SECONDS compares a cheap
+fingerprint (row count, max version, max updated_at) to pick up changes from other workers.
+"""
+
+
+class PromptRegistry:
+    def __init__(self, check_interval: int = PROMPT_REGISTRY_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._prompts: dict[str, CachedPrompt] | None = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cached prompts, the next lookup reloads them"""
+        with self._lock:
+            self._prompts = None
+
+    def get_all(self, db_handler) -> list[CachedPrompt]:
+        return list(self._load(db_handler).values())
+
+    def get_by_id(self, db_handler, prompt_id: str) -> CachedPrompt | None:
+        return self._load(db_handler).get(prompt_id)
+
+    def get_by_type(self, db_handler, prompt_type: PromptType) -> list[CachedPrompt]:
+        return [p for p in self.get_all(db_handler) if p.type == prompt_type]
+
+    def get_by_type_negative(
+        self, db_handler, prompt_type: PromptType
+    ) -> list[CachedPrompt]:
+        return [p for p in self.get_all(db_handler) if p.type != prompt_type]
+
+    def get_by_category(
+        self, db_handler, category: PromptCategory
+    ) -> list[CachedPrompt]:
+        return [p for p in self.get_all(db_handler) if p.category == category]
+
+    def _load(self, db_handler) -> dict[str, CachedPrompt]:
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._prompts is not None
+                and now - self._checked_at < self.check_interval
+            ):
+                return self._prompts
+
+            fingerprint = db_handler._get_prompts_fingerprint()
+            if self._prompts is None or fingerprint != self._fingerprint:
+                self._prompts = {
+                    prompt.id: CachedPrompt.model_validate(prompt)
+                    for prompt in db_handler._get_all_prompts()
+                }
+                self._fingerprint = fingerprint
+            self._checked_at = now
+            return self._prompts
+
+
+# Shared by all requests of this worker
+prompt_registry = PromptRegistry()
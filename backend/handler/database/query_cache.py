@@ -0,0 +1,332 @@
+import functools
+import json
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime
+import redis
+from sqlalchemy import DateTime, Enum as SQLAlchemyEnum, inspect
+from backend.config.settings import (
+    QUERY_CACHE_L1_TTL_SECONDS,
+    QUERY_CACHE_L1_MAX_SIZE,
+    QUERY_CACHE_L2_RETRY_SECONDS,
+)
+from backend.database.cache.redis import get_redis
+
+"""
+Cache-aside layer for DatabaseHandler reads.
+
+Read methods decorated with @cached look up their result in an in-process L1 cache,
+then in Redis (L2), and only query the database on a miss. Results are stored as
+column values and rebuilt as detached model instances on every hit, so requests
+never share ORM objects. Every entry carries tags (e.g. "case:<id>"); write methods
+decorated with @invalidates drop all entries of their tags once the write is committed.
+
+Every tag has a generation counter, bumped on each invalidation. A read records the
+generations of its tags before the query and drops its result if one changed in the
+meantime, so a write committed while the read was in flight can't be overwritten by
+the old row (the Redis write is guarded by WATCH).
+
+L1 entries live at most QUERY_CACHE_L1_TTL_SECONDS, since writes in other workers only
+invalidate Redis. Reads inside a unit of work bypass the cache (uncommitted state),
+reads from a replica session aren't cached (the replica may lag behind the
+invalidation of a write).
+Large or sensitive columns such as Case.content_text are excluded from the entries
+(the methods also defer them), on a hit they are None.
+"""
+
+_TAG_TTL_SECONDS = 24 * 60 * 60
+
+
+def _encode_row(row, exclude: tuple[str, ...]) -> dict:
+    values = {}
+    state = inspect(row)
+    for attribute in state.mapper.column_attrs:
+        # Unloaded (deferred) columns would be loaded by reading them
+        if attribute.key in exclude or attribute.key in state.unloaded:
+            continue
+        value = getattr(row, attribute.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif hasattr(value, "name") and hasattr(type(value), "__members__"):
+            value = value.name  # Enum members are stored by name, as in the database
+        values[attribute.key] = value
+    return values
+
+
+def _decode_row(model, values: dict):
+    for attribute in inspect(model).column_attrs:
+        value = values.get(attribute.key)
+        if value is None:
+            continue
+        column_type = attribute.columns[0].type
+        if isinstance(column_type, DateTime):
+            values[attribute.key] = datetime.fromisoformat(value)
+        elif isinstance(column_type, SQLAlchemyEnum) and column_type.enum_class:
+            values[attribute.key] = column_type.enum_class[value]
+    return model(**values)
+
+
+def _encode_result(result, exclude: tuple[str, ...]):
+    if result is None:
+        return {"rows": None}
+    if isinstance(result, list):
+        return {"rows": [_encode_row(row, exclude) for row in result]}
+    return {"rows": _encode_row(result, exclude), "one": True}
+
+
+def _decode_result(model, payload):
+    rows = payload["rows"]
+    if rows is None:
+        return None
+    if payload.get("one"):
+        return _decode_row(model, dict(rows))
+    return [_decode_row(model, dict(row)) for row in rows]
+
+
+class QueryCache:
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        l1_ttl: int = QUERY_CACHE_L1_TTL_SECONDS,
+        l1_max_size: int = QUERY_CACHE_L1_MAX_SIZE,
+    ):
+        self.redis_client = redis_client or get_redis()
+        self.l1_ttl = l1_ttl
+        self.l1_max_size = l1_max_size
+        self._l1: OrderedDict[str, tuple[float, dict, set]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._l2_disabled_until = 0.0
+        self._stats: dict[str, Counter] = defaultdict(Counter)
+        self._generations: Counter = Counter()
+
+    # L2 (Redis) access, skipped for a while after an error
+    def _l2(self, operation):
+        if time.monotonic() < self._l2_disabled_until:
+            return None
+        try:
+            return operation(self.redis_client)
+        except redis.exceptions.RedisError as e:
+            print(f"Query cache L2 disabled for {QUERY_CACHE_L2_RETRY_SECONDS}s: {e}")
+            self._l2_disabled_until = time.monotonic() + QUERY_CACHE_L2_RETRY_SECONDS
+            return None
+
+    def get(self, method: str, key: str) -> dict | None:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._l1.move_to_end(key)
+                self._stats[method]["l1_hits"] += 1
+                return entry[1]
+
+        value = self._l2(lambda client: client.get(f"query:{key}"))
+        if value is None:
+            self._stats[method]["misses"] += 1
+            return None
+        self._stats[method]["l2_hits"] += 1
+        payload = json.loads(value)
+        self._set_l1(key, payload, set(payload.pop("tags")), self.l1_ttl)
+        return payload
+
+    def generations(self, tags: list[str]) -> dict:
+        """Get the current generations of the tags, to be passed to set()"""
+        with self._lock:
+            local = {tag: self._generations[tag] for tag in tags}
+        remote = self._l2(
+            lambda client: client.mget([f"query_gen:{tag}" for tag in tags])
+        )
+        return {"local": local, "remote": remote}
+
+    def set(
+        self,
+        key: str,
+        payload: dict,
+        ttl: int,
+        tags: list[str],
+        generations: dict | None = None,
+    ):
+        """
+        Store an entry, unless one of the tags in generations was invalidated since
+
+        Args:
+            generations: Result of generations() taken before the query, None to
+                store unconditionally
+        """
+
+        def write(client):
+            with client.pipeline() as pipeline:
+                if generations is not None:
+                    generation_keys = [
+                        f"query_gen:{tag}" for tag in generations["local"]
+                    ]
+                    pipeline.watch(*generation_keys)
+                    if pipeline.mget(generation_keys) != generations["remote"]:
+                        return False
+                    pipeline.multi()
+                pipeline.set(
+                    f"query:{key}", json.dumps({**payload, "tags": tags}), ex=ttl
+                )
+                for tag in tags:
+                    pipeline.sadd(f"query_tag:{tag}", key)
+                    # Tag sets outlive every entry, stale members are harmless
+                    pipeline.expire(f"query_tag:{tag}", _TAG_TTL_SECONDS)
+                try:
+                    pipeline.execute()
+                except redis.exceptions.WatchError:
+                    return False
+            return True
+
+        # Without the generations of Redis the entry can't be checked against the
+        # writes of other workers, it's only kept in L1
+        if generations is None or generations["remote"] is not None:
+            if self._l2(write) is False:
+                return
+        self._set_l1(
+            key,
+            payload,
+            set(tags),
+            min(ttl, self.l1_ttl),
+            generations["local"] if generations is not None else None,
+        )
+
+    def _set_l1(
+        self,
+        key: str,
+        payload: dict,
+        tags: set,
+        ttl: int,
+        generations: dict | None = None,
+    ):
+        with self._lock:
+            if generations is not None and any(
+                self._generations[tag] != generation
+                for tag, generation in generations.items()
+            ):
+                return
+            self._l1[key] = (time.monotonic() + ttl, payload, tags)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max_size:
+                self._l1.popitem(last=False)
+
+    def invalidate(self, tags: list[str]):
+        """Drop every cached entry carrying one of the tags"""
+        tags = set(tags)
+        with self._lock:
+            self._generations.update(tags)
+            for key in [key for key, entry in self._l1.items() if entry[2] & tags]:
+                del self._l1[key]
+
+        def delete(client):
+            pipeline = client.pipeline(transaction=False)
+            # Bumped first, a read in flight either fails its WATCH or is deleted
+            for tag in tags:
+                pipeline.incr(f"query_gen:{tag}")
+                pipeline.expire(f"query_gen:{tag}", _TAG_TTL_SECONDS)
+            for tag in tags:
+                pipeline.smembers(f"query_tag:{tag}")
+            results = pipeline.execute()[2 * len(tags) :]
+            keys = {key.decode() for members in results for key in members}
+            client.delete(
+                *[f"query:{key}" for key in keys],
+                *[f"query_tag:{tag}" for tag in tags],
+            )
+
+        self._l2(delete)
+
+    def clear(self):
+        """Drop all entries and statistics"""
+        with self._lock:
+            self._l1.clear()
+            self._stats.clear()
+
+        def delete_all(client):
+            for pattern in ("query:*", "query_tag:*", "query_gen:*"):
+                keys = list(client.scan_iter(match=pattern, count=500))
+                if keys:
+                    client.delete(*keys)
+
+        self._l2(delete_all)
+
+    def stats(self) -> dict:
+        """Hits, misses and hit ratio per cached method"""
+        stats = {}
+        for method, counter in self._stats.items():
+            lookups = counter["l1_hits"] + counter["l2_hits"] + counter["misses"]
+            stats[method] = {
+                **counter,
+                "hit_ratio": round(
+                    (counter["l1_hits"] + counter["l2_hits"]) / lookups, 3
+                )
+                if lookups
+                else 0.0,
+            }
+        return stats
+
+
+query_cache = QueryCache()
+
+
+def cached(model, ttl: int, tags, exclude: tuple[str, ...] = ()):
+    """
+    Cache the result of a DatabaseHandler read method
+
+    Args:
+        model: Model class of the returned rows (a single row, a list of rows or None)
+        ttl: Seconds the result stays in Redis
+        tags: Function (result, *args) returning the tags of the entry. It's also
+            called with a None result before the query, if one of these tags is
+            invalidated while the query runs its result isn't cached
+        exclude: Columns that are never cached, None on a hit
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            # Inside a unit of work the entry may predate its own writes
+            if self._transaction_depth:
+                return method(self, *args)
+
+            key = f"{method.__name__}:{json.dumps(args, default=str)}"
+            payload = query_cache.get(method.__name__, key)
+            if payload is not None:
+                return _decode_result(model, payload)
+
+            # Replicas may not have applied a write whose invalidation already ran
+            if self.db.info.get("replica"):
+                return method(self, *args)
+
+            generations = query_cache.generations(tags(None, *args))
+            result = method(self, *args)
+            query_cache.set(
+                key,
+                _encode_result(result, exclude),
+                ttl,
+                tags(result, *args),
+                generations,
+            )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(tags):
+    """
+    Invalidate cached reads after a DatabaseHandler write method is committed
+
+    Args:
+        tags: Function (*args) returning the tags to invalidate, evaluated before the write
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            invalidated_tags = tags(*args)
+            result = method(self, *args)
+            self._after_commit(lambda: query_cache.invalidate(invalidated_tags))
+            return result
+
+        return wrapper
+
+    return decorator
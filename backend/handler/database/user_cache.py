@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+from backend.config.settings import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE
+from backend.database.cache.models import CachedUser
+
+"""
+In-process cache of authenticated users.
+
+get_current_user resolves the user of every request from the token's user_id, so the
+users are kept in memory for USER_CACHE_TTL_SECONDS. Updates and deletes in this worker
+invalidate the entry right away, other workers pick up changes once the entry expires.
+"""
+
+
+class UserCache:
+    def __init__(
+        self, ttl: int = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users: OrderedDict[str, tuple[float, CachedUser]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> CachedUser | None:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user: CachedUser):
+        with self._lock:
+            self._users[user.id] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(user.id)
+            # Evict the least recently used users
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+# Shared by all requests of this worker
+user_cache = UserCache()
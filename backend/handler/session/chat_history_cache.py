@@ -0,0 +1,136 @@
+import json
+import redis
+from backend.config.settings import (
+    CHAT_HISTORY_CACHE_SIZE,
+    CHAT_HISTORY_CACHE_TTL_SECONDS,
+)
+from backend.database.cache.redis import get_redis
+from backend.database.persistent.models import Message
+
+"""
+Chat history cache
+
+The most recent CHAT_HISTORY_CACHE_SIZE messages of an answer discussion are kept in a
+Redis list (chat_history:<answer_discussion_id>, oldest first), so reading the history
+for a chat turn is a single LRANGE. The list is filled from the database on a miss and
+new messages are appended after they are committed (write-through). Appending uses
+RPUSHX, so a message never creates a partial list of a discussion that isn't cached.
+
+Every append also increments a version counter (chat_history_version:<id>). A fill
+passes the version read before its database snapshot and is dropped if a message was
+appended meanwhile, so a stale snapshot can't replace a list that missed the append.
+
+When Redis is unreachable the cache reports a miss and the database is used.
+"""
+
+
+class ChatHistoryCache:
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        size: int = CHAT_HISTORY_CACHE_SIZE,
+        ttl: int = CHAT_HISTORY_CACHE_TTL_SECONDS,
+    ):
+        self.redis_client = redis_client or get_redis()
+        self.size = size
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(answer_discussion_id: int) -> str:
+        return f"chat_history:{answer_discussion_id}"
+
+    @staticmethod
+    def _version_key(answer_discussion_id: int) -> str:
+        return f"chat_history_version:{answer_discussion_id}"
+
+    def get(self, answer_discussion_id: int) -> list[Message] | None:
+        """Get the cached recent messages oldest first, None on a miss"""
+        try:
+            values = self.redis_client.lrange(
+                self._key(answer_discussion_id), -self.size, -1
+            )
+        except redis.exceptions.RedisError as e:
+            print(f"Chat history cache unavailable: {e}")
+            return None
+        if not values:
+            return None
+        return [
+            Message.from_dict(json.loads(value), answer_discussion_id)
+            for value in values
+        ]
+
+    def version(self, answer_discussion_id: int) -> bytes | None:
+        """Get the append version, read it before loading the messages to fill"""
+        try:
+            return self.redis_client.get(self._version_key(answer_discussion_id))
+        except redis.exceptions.RedisError as e:
+            print(f"Chat history cache unavailable: {e}")
+            return None
+
+    def fill(
+        self,
+        answer_discussion_id: int,
+        messages: list[Message],
+        version: bytes | None,
+    ):
+        """
+        Replace the cached history with the given messages (oldest first)
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+            messages: Messages loaded from the database
+            version: Result of version() before the messages were loaded, the fill
+                is dropped if a message was appended since
+        """
+        if not messages:
+            return
+        key = self._key(answer_discussion_id)
+        version_key = self._version_key(answer_discussion_id)
+        try:
+            with self.redis_client.pipeline(transaction=True) as pipeline:
+                pipeline.watch(version_key)
+                if pipeline.get(version_key) != version:
+                    return
+                pipeline.multi()
+                pipeline.delete(key)
+                pipeline.rpush(
+                    key,
+                    *[
+                        json.dumps(message.to_dict(), ensure_ascii=False)
+                        for message in messages[-self.size :]
+                    ],
+                )
+                pipeline.expire(key, self.ttl)
+                pipeline.execute()
+        except redis.exceptions.WatchError:
+            # Appended while filling, the next read loads the history again
+            pass
+        except redis.exceptions.RedisError as e:
+            print(f"Could not fill chat history cache: {e}")
+
+    def append(self, message: Message):
+        """Append a committed message to the history if the discussion is cached"""
+        key = self._key(message.answer_discussion_id)
+        try:
+            pipeline = self.redis_client.pipeline(transaction=True)
+            pipeline.rpushx(key, json.dumps(message.to_dict(), ensure_ascii=False))
+            pipeline.ltrim(key, -self.size, -1)
+            pipeline.expire(key, self.ttl)
+            # Also when the discussion isn't cached: an in-flight fill is dropped
+            version_key = self._version_key(message.answer_discussion_id)
+            pipeline.incr(version_key)
+            pipeline.expire(version_key, self.ttl)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            # A missed append would leave the cache incomplete, drop it instead
+            print(f"Could not append to chat history cache: {e}")
+            self.invalidate(message.answer_discussion_id)
+
+    def invalidate(self, answer_discussion_id: int):
+        try:
+            self.redis_client.delete(self._key(answer_discussion_id))
+        except redis.exceptions.RedisError as e:
+            print(f"Could not invalidate chat history cache: {e}")
+
+
+chat_history_cache = ChatHistoryCache()
@@ -0,0 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
+import redis
+import redis.asyncio
+from redis.exceptions import LockError
+from backend.config.settings import (
+    CASE_PROCESSING_LOCK_TIMEOUT_SECONDS,
+    CASE_PROCESSING_LOCK_WAIT_SECONDS,
+)
+from backend.database.cache.redis import get_async_redis
+
+"""
+Processing lock
+
+Serializes work on the same key (the content-derived case id). Duplicates within a
+worker queue on an in-process asyncio.Lock, the holder then takes a Redis lock at
+lock:<key> to exclude the other workers. The Redis lock expires after
+CASE_PROCESSING_LOCK_TIMEOUT_SECONDS so a crashed worker can't block a case forever.
+
+When Redis is unreachable only the in-process lock is held.
+"""
+
+
+class ProcessingLockTimeoutError(Exception):
+    """Raised when the in-flight job holding the lock didn't finish in time"""
+
+
+class ProcessingLock:
+    def __init__(
+        self,
+        timeout: int = CASE_PROCESSING_LOCK_TIMEOUT_SECONDS,
+        wait: int = CASE_PROCESSING_LOCK_WAIT_SECONDS,
+    ):
+        self.timeout = timeout
+        self.wait = wait
+        self._local_locks: dict[str, asyncio.Lock] = {}
+        self._local_waiters: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        """
+        Hold the lock of a key for the duration of the context
+
+        Yields:
+            True if another job held the lock and had to be waited for
+
+        Raises:
+            ProcessingLockTimeoutError: If the lock wasn't released within the wait time
+        """
+        async with (
+            self._hold_local(key) as waited_locally,
+            self._hold_redis(key) as waited_remotely,
+        ):
+            yield waited_locally or waited_remotely
+
+    @asynccontextmanager
+    async def _hold_local(self, key: str):
+        lock = self._local_locks.setdefault(key, asyncio.Lock())
+        self._local_waiters[key] = self._local_waiters.get(key, 0) + 1
+        try:
+            waited = lock.locked()
+            if not waited:
+                await lock.acquire()  # free, acquired without suspending
+            else:
+                try:
+                    await asyncio.wait_for(lock.acquire(), self.wait)
+                except TimeoutError:
+                    raise ProcessingLockTimeoutError(f"{key} is still being processed")
+            try:
+                yield waited
+            finally:
+                lock.release()
+        finally:
+            self._local_waiters[key] -= 1
+            if not self._local_waiters[key]:
+                del self._local_waiters[key]
+                del self._local_locks[key]
+
+    @asynccontextmanager
+    async def _hold_redis(self, key: str):
+        lock = get_async_redis().lock(
+            f"lock:{key}", timeout=self.timeout, sleep=0.2, blocking=False
+        )
+        try:
+            waited = not await lock.acquire()
+            if waited and not await lock.acquire(
+                blocking=True, blocking_timeout=self.wait
+            ):
+                raise ProcessingLockTimeoutError(f"{key} is still being processed")
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            print(f"Processing lock {key} is local only, Redis unavailable: {e}")
+            yield False
+            return
+
+        try:
+            yield waited
+        finally:
+            try:
+                await lock.release()
+            except (LockError, redis.exceptions.RedisError) as e:
+                # Expired (the job outlasted the timeout) or Redis went away
+                print(f"Error releasing processing lock {key}: {e}")
+
+
+case_processing_lock = ProcessingLock()
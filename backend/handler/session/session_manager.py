@@ -1,6 +1,8 @@
-import redis
+import redis.asyncio
 import json
+from backend.config.settings import SESSION_TIMEOUT_SECONDS
 from backend.database.cache.models import Session
+from backend.database.cache.redis import get_async_redis
 import uuid
 from datetime import datetime, timedelta
 
@@ -13,46 +15,67 @@ Process:
 3. If session exists, load messages from session and pass to the next llm request
 4. If no session exists, load history from sql database
 5. If no data exists in the sql database, create a new entry for the user_id
+
+A session is stored as a Redis hash (session:<user_id>) with one field per Session
+attribute, so updates only write the fields that changed. Reading a session and
+sliding its expiry is a single pipelined round trip on the shared connection pool.
 """
 
 
 class SessionManager:
-    def __init__(self):
-        self.redis_client = redis.Redis(host="localhost", port=6379, db=0)
-        self.session_timeout = 1800  # 30 minutes in seconds
-
-    def get_or_create_session(self, user_id):
+    def __init__(self, redis_client: redis.asyncio.Redis | None = None):
+        self.redis_client = redis_client or get_async_redis()
+        self.session_timeout = SESSION_TIMEOUT_SECONDS
+
+    @staticmethod
+    def _session_key(user_id) -> str:
+        return f"session:{user_id}"
+
+    @staticmethod
+    def _serialize(session: Session, fields) -> dict:
+        """Serialize the given Session attributes to hash field values"""
+        values = {}
+        for field in fields:
+            value = getattr(session, field)
+            if field == "messages":
+                values[field] = json.dumps(value, ensure_ascii=False)
+            elif isinstance(value, datetime):
+                values[field] = value.isoformat()
+            else:
+                values[field] = value
+        return values
+
+    async def get_or_create_session(self, user_id):
         """Simple function that either gets an existing session or creates a new one"""
-        session = self.get_session(user_id)
+        session = await self.get_session(user_id)
         if session:
             return session
-        return self.create_session(user_id)
+        return await self.create_session(user_id)
 
-    def get_session(self, user_id):
+    async def get_session(self, user_id):
         """Get a session and refresh its expiration time"""
-        session_key = f"session:{user_id}"
-
-        if not self.redis_client.exists(session_key):
-            return None
-
-        # Retrieve and deserialize the session data
-        session_json = self.redis_client.get(session_key).decode("utf-8")
-        session_dict = json.loads(session_json)
+        session_key = self._session_key(user_id)
 
-        # Convert to Pydantic model
-        session = Session(**session_dict)
+        # Read and slide the expiry in one round trip
+        async with self.redis_client.pipeline(transaction=False) as pipeline:
+            pipeline.hgetall(session_key)
+            pipeline.expire(session_key, self.session_timeout)
+            fields, _ = await pipeline.execute()
 
-        # Update the expiration time in Redis (sliding expiration)
-        self.redis_client.expire(session_key, self.session_timeout)
-
-        # Also update the expires_at field in the session object
-        session.expires_at = datetime.now() + timedelta(seconds=self.session_timeout)
+        if not fields:
+            return None
 
-        return session
+        fields = {key.decode(): value.decode() for key, value in fields.items()}
+        return Session(
+            id=fields["id"],
+            user_id=fields["user_id"],
+            messages=json.loads(fields["messages"]),
+            created_at=datetime.fromisoformat(fields["created_at"]),
+            expires_at=datetime.now() + timedelta(seconds=self.session_timeout),
+        )
 
-    def create_session(self, user_id):
+    async def create_session(self, user_id):
         """Create a new session for the user"""
-        session_key = f"session:{user_id}"
         session = Session(
             id=str(uuid.uuid4()),
             user_id=user_id,
@@ -60,27 +83,57 @@ class SessionManager:
             created_at=datetime.now(),
             expires_at=datetime.now() + timedelta(seconds=self.session_timeout),
         )
-        self.redis_client.set(
-            session_key, session.model_dump_json(), ex=self.session_timeout
-        )
+        session_key = self._session_key(user_id)
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.hset(
+                session_key,
+                mapping=self._serialize(
+                    session, ["id", "user_id", "messages", "created_at"]
+                ),
+            )
+            pipeline.expire(session_key, self.session_timeout)
+            await pipeline.execute()
         return session
 
-    def update_session(self, session):
-        """Update a session in Redis and refresh its expiration time"""
-        session_key = f"session:{session.user_id}"
+    async def update_session(self, session, fields=("messages",)):
+        """
+        Write the changed fields of a session to Redis and refresh its expiration time
+
+        Args:
+            session: Session to update
+            fields: Names of the Session attributes that changed
+        """
+        session_key = self._session_key(session.user_id)
 
         # Update expires_at field
         session.expires_at = datetime.now() + timedelta(seconds=self.session_timeout)
 
-        # Save to Redis with refreshed expiration
-        self.redis_client.set(
-            session_key, session.model_dump_json(), ex=self.session_timeout
-        )
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.hset(session_key, mapping=self._serialize(session, fields))
+            # Restore the identity fields if the session expired in the meantime
+            for field, value in self._serialize(
+                session, ["id", "user_id", "created_at"]
+            ).items():
+                pipeline.hsetnx(session_key, field, value)
+            pipeline.expire(session_key, self.session_timeout)
+            await pipeline.execute()
 
         return session
 
+    async def delete_session(self, user_id):
+        """Remove a session"""
+        await self.redis_client.delete(self._session_key(user_id))
+
 
 if __name__ == "__main__":
-    session_manager = SessionManager()
-    print(session_manager.get_or_create_session("124"))
-    session_manager.update_session(session_manager.get_or_create_session("124"))
+    import asyncio
+
+    async def main():
+        session_manager = SessionManager()
+        session = await session_manager.get_or_create_session("124")
+        print(session)
+        session.messages.append({"role": "user", "content": "Hallo"})
+        await session_manager.update_session(session)
+        print(await session_manager.get_session("124"))
+
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+import time
+import redis
+from backend.config.settings import REFRESH_TOKEN_EXPIRE_DAYS
+from backend.database.cache.redis import get_redis
+
+"""
+Token revocation
+
+Access tokens are validated without touching the database, revocation is a set of
+expiring Redis keys checked with a single MGET per request:
+
+- revoked:jti:<jti>          a single token (logout), expires with the token
+- revoked:user:<user_id>     all tokens of a user issued before the stored timestamp
+                             (user deleted or role changed)
+- revoked:family:<family>    a refresh token family (logout, refresh token reuse)
+- used:refresh:<jti>         refresh tokens already rotated, a second use revokes the family
+
+Access token checks fail open when Redis is unreachable, access tokens are short-lived.
+Refresh token rotation needs Redis and fails closed.
+"""
+
+
+class RevocationUnavailableError(Exception):
+    """Raised when refresh tokens can't be rotated safely because Redis is unreachable"""
+
+
+class TokenRevocationStore:
+    def __init__(self, redis_client: redis.Redis | None = None):
+        self.redis_client = redis_client or get_redis()
+        self.user_revocation_ttl = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Check whether a decoded token was revoked individually or for its user"""
+        keys = [
+            f"revoked:jti:{payload.get('jti')}",
+            f"revoked:user:{payload['user_id']}",
+        ]
+        if "family" in payload:
+            keys.append(f"revoked:family:{payload['family']}")
+        try:
+            token_revoked, user_revoked_at, *family_revoked = self.redis_client.mget(
+                keys
+            )
+        except redis.exceptions.RedisError as e:
+            print(f"Token revocation check skipped, Redis unavailable: {e}")
+            return False
+
+        if token_revoked or any(family_revoked):
+            return True
+        return user_revoked_at is not None and payload.get("iat", 0) <= float(
+            user_revoked_at
+        )
+
+    def revoke_token(self, payload: dict):
+        """Revoke a single token (and its refresh token family) until it expires"""
+        ttl = max(int(payload["exp"] - time.time()), 1)
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.set(f"revoked:jti:{payload['jti']}", 1, ex=ttl)
+            if "family" in payload:
+                pipeline.set(
+                    f"revoked:family:{payload['family']}",
+                    1,
+                    ex=self.user_revocation_ttl,
+                )
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            raise RevocationUnavailableError(str(e)) from e
+
+    def revoke_user(self, user_id: str):
+        """Revoke every token issued to the user so far"""
+        try:
+            self.redis_client.set(
+                f"revoked:user:{user_id}", time.time(), ex=self.user_revocation_ttl
+            )
+        except redis.exceptions.RedisError as e:
+            print(f"Could not revoke tokens of user {user_id}: {e}")
+
+    def use_refresh_token(self, payload: dict) -> bool:
+        """
+        Mark a refresh token as rotated
+
+        Returns:
+            False if the token was used before, its whole family is revoked then
+        """
+        ttl = max(int(payload["exp"] - time.time()), 1)
+        try:
+            if self.redis_client.set(
+                f"used:refresh:{payload['jti']}", 1, ex=ttl, nx=True
+            ):
+                return True
+            # Reuse of a rotated refresh token: the token leaked, cut off the family
+            self.redis_client.set(
+                f"revoked:family:{payload['family']}", 1, ex=self.user_revocation_ttl
+            )
+            return False
+        except redis.exceptions.RedisError as e:
+            raise RevocationUnavailableError(str(e)) from e
+
+
+token_revocation = TokenRevocationStore()
@@ -0,0 +1,197 @@
+import asyncio
+import codecs
+import zipfile
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from pathlib import PurePath
+from xml.etree import ElementTree
+from pypdf import PdfReader
+from backend.config.settings import PDF_EXTRACTION_PAGES_PER_TASK
+
+"""
+Text extractors
+
+An extractor turns a file (given by path) into its page texts. Extractors are looked up
+by file extension or MIME type with get_extractor and run in the extraction process pool
+of the FileConverter, new formats are added with register_extractor.
+
+The DOCX and TXT extractors stream their input: the DOCX document part is parsed
+incrementally and TXT files are decoded chunk by chunk, no raw file content is held
+in memory beyond one document part.
+"""
+
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+
+class TextExtractor(ABC):
+    # Identifies the extractor's output, e.g. in the extraction cache
+    name: str
+    extensions: tuple[str, ...] = ()
+    mime_types: tuple[str, ...] = ()
+
+    @abstractmethod
+    def extract_pages(self, path: str) -> list[str]:
+        """Extract the page texts of a file, runs in a worker process"""
+
+    async def extract_pages_async(self, path: str, pool: Executor) -> list[str]:
+        """Extract the page texts of a file in the pool"""
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, self.extract_pages, path
+        )
+
+
+def _count_pdf_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> list[str]:
+    reader = PdfReader(path)
+    return [reader.pages[index].extract_text() for index in range(start, stop)]
+
+
+class PdfExtractor(TextExtractor):
+    name = "pdf"
+    extensions = ("pdf",)
+    mime_types = ("application/pdf",)
+
+    def extract_pages(self, path: str) -> list[str]:
+        return [page.extract_text() for page in PdfReader(path).pages]
+
+    async def extract_pages_async(self, path: str, pool: Executor) -> list[str]:
+        """Split the pages into ranges of PDF_EXTRACTION_PAGES_PER_TASK extracted in parallel"""
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(pool, _count_pdf_pages, path)
+        page_ranges = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool,
+                    _extract_pdf_pages,
+                    path,
+                    start,
+                    min(start + PDF_EXTRACTION_PAGES_PER_TASK, page_count),
+                )
+                for start in range(0, page_count, PDF_EXTRACTION_PAGES_PER_TASK)
+            )
+        )
+        return [page for pages in page_ranges for page in pages]
+
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class DocxExtractor(TextExtractor):
+    """
+    Paragraph text of the main document part (word/document.xml)
+
+    DOCX files have no fixed pages, manual page breaks and the page breaks Word
+    rendered when saving (lastRenderedPageBreak) delimit the pages.
+    """
+
+    name = "docx"
+    extensions = ("docx",)
+    mime_types = (
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    )
+
+    def extract_pages(self, path: str) -> list[str]:
+        pages = []
+        page = []
+
+        def break_page():
+            # Word renders a break after a manual page break too, skip empty pages
+            if "".join(page).strip():
+                pages.append("".join(page))
+                page.clear()
+
+        with zipfile.ZipFile(path) as docx, docx.open("word/document.xml") as part:
+            for event, element in ElementTree.iterparse(part, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == f"{WORD_NAMESPACE}lastRenderedPageBreak":
+                        break_page()
+                    continue
+                if tag == f"{WORD_NAMESPACE}t":
+                    page.append(element.text or "")
+                elif tag == f"{WORD_NAMESPACE}tab":
+                    page.append("\t")
+                elif tag == f"{WORD_NAMESPACE}br":
+                    if element.get(f"{WORD_NAMESPACE}type") == "page":
+                        break_page()
+                    else:
+                        page.append("\n")
+                elif tag == f"{WORD_NAMESPACE}p":
+                    if page:  # not the end of a paragraph that broke the page
+                        page.append("\n")
+                    element.clear()  # the paragraph's text was taken, free it
+        if "".join(page).strip() or not pages:
+            pages.append("".join(page))
+        return pages
+
+
+class TxtExtractor(TextExtractor):
+    """
+    Plain text, UTF-8 or (if it isn't valid UTF-8) Windows-1252
+
+    Form feeds separate pages, as in text exported from PDF or word processors.
+    """
+
+    name = "txt"
+    extensions = ("txt",)
+    mime_types = ("text/plain",)
+
+    def extract_pages(self, path: str) -> list[str]:
+        try:
+            return self._decode_pages(path, "utf-8-sig", "strict")
+        except UnicodeDecodeError:
+            return self._decode_pages(path, "cp1252", "replace")
+
+    def _decode_pages(self, path: str, encoding: str, errors: str) -> list[str]:
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        pages = [[]]
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(TEXT_CHUNK_SIZE), b""):
+                self._append(pages, decoder.decode(chunk))
+            self._append(pages, decoder.decode(b"", final=True))
+        return ["".join(page) for page in pages]
+
+    def _append(self, pages: list[list[str]], text: str):
+        first, *rest = text.split("\f")
+        pages[-1].append(first)
+        pages.extend([part] for part in rest)
+
+
+_extractors: dict[str, TextExtractor] = {}
+
+
+def register_extractor(extractor: TextExtractor):
+    """Make an extractor available for its extensions and MIME types"""
+    for key in (*extractor.extensions, *extractor.mime_types):
+        _extractors[key] = extractor
+
+
+def get_extractor(filename: str, content_type: str | None = None) -> TextExtractor:
+    """
+    Get the extractor for a file by its extension, or else its MIME type
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    extension = PurePath(filename).suffix.lstrip(".").lower()
+    extractor = _extractors.get(extension) or _extractors.get(content_type or "")
+    if extractor is None:
+        supported = sorted(
+            {
+                extension
+                for extractor in _extractors.values()
+                for extension in extractor.extensions
+            }
+        )
+        raise ValueError(
+            f"Unsupported file type, supported are: {', '.join(supported)}"
+        )
+    return extractor
+
+
+register_extractor(PdfExtractor())
+register_extractor(DocxExtractor())
+register_extractor(TxtExtractor())
@@ -1,5 +1,60 @@
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate
+from concurrent.futures.process import BrokenProcessPool
 from pypdf import PdfReader
 from io import BytesIO
+from pathlib import PurePath
+from typing import BinaryIO
+from backend.config.settings import PDF_EXTRACTION_WORKERS
+from backend.handler.storage.extractors import get_extractor
+
+# Text extraction is CPU bound pure Python, it runs in worker processes to keep the
+# event loop free and use more than one core. Workers are spawned, not forked, the
+# app process runs threads (hashing pool, database pools).
+_extraction_pool: ProcessPoolExecutor | None = None
+_extraction_pool_lock = threading.Lock()
+
+
+def _get_extraction_pool() -> ProcessPoolExecutor:
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extraction_pool
+
+
+def _reset_extraction_pool(pool: ProcessPoolExecutor):
+    """Replace a pool whose worker died (e.g. out of memory on a hostile PDF)"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass(frozen=True)
+class ExtractedText:
+    """Text of a document page by page"""
+
+    pages: list[str]
+
+    @property
+    def text(self) -> str:
+        return "".join(self.pages)
+
+    @property
+    def page_offsets(self) -> list[int]:
+        """Start offset of every page in text"""
+        return [0, *accumulate(len(page) for page in self.pages)][: len(self.pages)]
 
 
 class FileConverter:
@@ -9,11 +64,9 @@ class FileConverter:
 
     def convert_file_to_text(self, file_path: str):
         """
-        Convert a file to text
+        Convert a file of any supported type to text
         """
-        if file_path.endswith(".pdf"):
-            return self._convert_pdf_to_text(file_path)
-        raise ValueError("Only PDF files are currently supported")
+        return "".join(get_extractor(file_path).extract_pages(file_path))
 
     def _convert_pdf_to_text(self, file_path: str):
         """
@@ -24,27 +77,47 @@ class FileConverter:
         reader = PdfReader(file_path)
 
         # Extract text from all pages
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-
-        return text
+        return "".join(page.extract_text() for page in reader.pages)
 
     def convert_pdf_from_bytes(self, pdf_bytes):
         """
         Extract text from PDF binary data
         """
-        # Using libraries like PyPDF2 or pdfplumber to process binary data
-        # Example with PyPDF2:
-
         reader = PdfReader(BytesIO(pdf_bytes))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
+        return "".join(page.extract_text() for page in reader.pages)
+
+    async def extract_pages_async(
+        self, stream: BinaryIO, filename: str, content_type: str | None = None
+    ) -> ExtractedText:
+        """
+        Extract the page texts of a file object in the extraction process pool
+
+        The extractor is chosen by the file's extension or MIME type. The file is
+        copied to a temporary file the workers open by path, the stream is rewound
+        afterwards.
+
+        Raises:
+            ValueError: If the file type isn't supported, the file can't be read or a
+                worker died extracting it
+        """
+        extractor = get_extractor(filename, content_type)
+        pool = _get_extraction_pool()
+        with tempfile.NamedTemporaryFile(suffix=PurePath(filename).suffix) as file:
 
-        return text
+            def copy():
+                shutil.copyfileobj(stream, file)
+                file.flush()
+                stream.seek(0)
 
-    # @TODO: add other file types
+            await asyncio.to_thread(copy)
+            try:
+                pages = await extractor.extract_pages_async(file.name, pool)
+            except BrokenProcessPool as e:
+                _reset_extraction_pool(pool)
+                raise ValueError("The file could not be processed") from e
+            except Exception as e:
+                raise ValueError(f"The file could not be read: {e}") from e
+        return ExtractedText(pages)
 
 
 if __name__ == "__main__":
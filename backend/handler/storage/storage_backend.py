@@ -0,0 +1,332 @@
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO
+from pathlib import Path
+import boto3
+from botocore.config import Config
+from jose import JWTError, jwt
+from backend.config.settings import (
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    STORAGE_BACKEND,
+    STORAGE_BUCKET,
+    STORAGE_ENDPOINT_URL,
+    STORAGE_MAX_CONNECTIONS,
+    STORAGE_LOCAL_ROOT,
+    STORAGE_LOCAL_UPLOAD_URL,
+    STORAGE_UPLOAD_PART_SIZE,
+)
+
+"""
+Object storage backends
+
+The StorageHandler talks to a StorageBackend instead of S3 directly. The backend is
+selected with STORAGE_BACKEND and created once per process (get_storage_backend):
+
+- S3StorageBackend: one long-lived, thread safe boto3 client with a connection pool of
+  STORAGE_MAX_CONNECTIONS, AWS or any S3-compatible endpoint (MinIO) via STORAGE_ENDPOINT_URL
+- LocalStorageBackend: files below STORAGE_LOCAL_ROOT, for development and tests
+
+Uploads are streamed from a file object in parts of STORAGE_UPLOAD_PART_SIZE, so the
+memory needed per upload is bounded by the part size, not the file size.
+
+Backends hand out upload URLs for direct uploads: S3 presigned POSTs, clients then
+upload to the storage without the file passing through an API worker. The local
+backend has no server of its own, its URLs point to an API route (receive_upload)
+and carry a signed token naming the key and size limit, like a presigned URL.
+"""
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        """
+        Store an object read from a stream, never overwriting an existing one
+
+        Raises:
+            FileExistsError: If an object with this key already exists
+        """
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an object, never overwriting an existing one"""
+        self.put_stream(key, BytesIO(data))
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """
+        Read an object
+
+        Raises:
+            FileNotFoundError: If there is no object with this key
+        """
+
+    @abstractmethod
+    def download(self, key: str, file: BinaryIO) -> None:
+        """
+        Write an object into a file object, in chunks
+
+        Raises:
+            FileNotFoundError: If there is no object with this key
+        """
+
+    @abstractmethod
+    def move(self, source_key: str, target_key: str) -> None:
+        """
+        Move an object within the storage, without transferring it through the API
+
+        The move needn't be atomic, callers serialize the moves to a target key.
+
+        Raises:
+            FileNotFoundError: If there is no object with the source key
+            FileExistsError: If an object with the target key already exists
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an object, deleting a missing object is not an error"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def create_upload_url(self, key: str, max_size: int, expires_in: int) -> dict:
+        """
+        Create a presigned upload for exactly this key
+
+        Returns:
+            Dict with the url, the form fields to post along and the HTTP method
+        """
+
+
+class S3StorageBackend(StorageBackend):
+    def __init__(
+        self,
+        bucket: str = STORAGE_BUCKET,
+        endpoint_url: str | None = STORAGE_ENDPOINT_URL,
+        max_connections: int = STORAGE_MAX_CONNECTIONS,
+        part_size: int = STORAGE_UPLOAD_PART_SIZE,
+    ):
+        self.bucket = bucket
+        self.part_size = part_size
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_connections,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        # Conditional writes: S3 rejects them atomically if the object exists
+        part = stream.read(self.part_size)
+        try:
+            if len(part) < self.part_size:
+                self.client.put_object(
+                    Bucket=self.bucket, Key=key, Body=part, IfNoneMatch="*"
+                )
+            else:
+                self._put_multipart(key, part, stream)
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("PreconditionFailed", "412"):
+                raise FileExistsError(key)
+            raise
+
+    def _put_multipart(self, key: str, part: bytes, stream: BinaryIO) -> None:
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)[
+            "UploadId"
+        ]
+        try:
+            parts = []
+            while part:
+                response = self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=len(parts) + 1,
+                    Body=part,
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": len(parts) + 1})
+                part = stream.read(self.part_size)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+                IfNoneMatch="*",
+            )
+        except Exception:
+            # Uploaded parts are billed until the upload is aborted
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            raise
+
+    def get(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+        return response["Body"].read()
+
+    def download(self, key: str, file: BinaryIO) -> None:
+        try:
+            self.client.download_fileobj(self.bucket, key, file)
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key)
+            raise
+
+    def move(self, source_key: str, target_key: str) -> None:
+        # Not atomic: CopyObject takes no If-None-Match, so an object stored between
+        # the check and the copy is overwritten. Safe only because callers serialize
+        # the moves to a target (the case processing lock of its case id)
+        if self.exists(target_key):
+            raise FileExistsError(target_key)
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=target_key,
+                CopySource={"Bucket": self.bucket, "Key": source_key},
+            )
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(source_key)
+            raise
+        self.delete(source_key)
+
+    def delete(self, key: str) -> None:
+        # S3 answers deletes of missing objects with success
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] == "404":
+                return False
+            raise
+
+    def create_upload_url(self, key: str, max_size: int, expires_in: int) -> dict:
+        # A presigned POST (unlike PUT) lets S3 enforce the size limit
+        upload = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Conditions=[["content-length-range", 1, max_size]],
+            ExpiresIn=expires_in,
+        )
+        return {**upload, "method": "POST"}
+
+
+class LocalStorageBackend(StorageBackend):
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT):
+        self.root = Path(root).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and link it into place: readers never see a
+        # partial object and the link fails atomically if the key exists
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            try:
+                shutil.copyfileobj(stream, file, STORAGE_UPLOAD_PART_SIZE)
+                file.flush()
+                os.link(file.name, path)
+            finally:
+                os.unlink(file.name)
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def download(self, key: str, file: BinaryIO) -> None:
+        with self._path(key).open("rb") as source:
+            shutil.copyfileobj(source, file, STORAGE_UPLOAD_PART_SIZE)
+
+    def move(self, source_key: str, target_key: str) -> None:
+        target = self._path(target_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # The link fails atomically if the target exists
+        os.link(self._path(source_key), target)
+        self._path(source_key).unlink()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def create_upload_url(self, key: str, max_size: int, expires_in: int) -> dict:
+        token = jwt.encode(
+            {
+                "type": "local_upload",
+                "key": key,
+                "max_size": max_size,
+                "exp": int(time.time()) + expires_in,
+            },
+            JWT_SECRET_KEY,
+            algorithm=JWT_ALGORITHM,
+        )
+        return {
+            "url": f"{STORAGE_LOCAL_UPLOAD_URL}/{token}",
+            "fields": {},
+            "method": "PUT",
+        }
+
+    def receive_upload(self, token: str, stream: BinaryIO) -> str:
+        """
+        Store a direct upload sent to a URL of create_upload_url
+
+        Returns:
+            Key of the stored object
+
+        Raises:
+            ValueError: If the token is invalid or expired, or the file too large
+            FileExistsError: If the file was uploaded already
+        """
+        try:
+            claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except JWTError as e:
+            raise ValueError(f"Invalid upload token: {e}")
+        if claims.get("type") != "local_upload":
+            raise ValueError("Invalid upload token")
+        self.put_stream(claims["key"], _LimitedReader(stream, claims["max_size"]))
+        return claims["key"]
+
+
+class _LimitedReader:
+    """Read a stream, failing once it exceeds the size limit of its upload"""
+
+    def __init__(self, stream: BinaryIO, max_size: int):
+        self.stream = stream
+        self.max_size = max_size
+        self.remaining = max_size
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise ValueError(f"Die Datei ist zu groß (maximal {self.max_size} Bytes)")
+        return data
+
+
+@lru_cache
+def get_storage_backend() -> StorageBackend:
+    """Get the storage backend of this process, as configured by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "s3":
+        return S3StorageBackend()
+    if STORAGE_BACKEND == "local":
+        return LocalStorageBackend()
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
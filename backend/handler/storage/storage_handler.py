@@ -1,83 +1,184 @@
 import hashlib
-import boto3
+import uuid
+from typing import BinaryIO
+from backend.handler.storage.storage_backend import (
+    LocalStorageBackend,
+    StorageBackend,
+    get_storage_backend,
+)
+from backend.config.settings import MAX_UPLOAD_SIZE_BYTES, UPLOAD_URL_EXPIRE_SECONDS
 
 """
 This module is responsible for handling the case data.
 It is responsible for uploading the case to S3 and the database.
 It is also responsible for deleting the case from S3 and the database.
+The objects are stored through the configured StorageBackend (S3 or local files).
+Direct uploads land under a staging key first and are moved to the case key
+once the case id, derived from the content, is known.
 """
 
 
+# Chunk size of incremental hashing, independent of the upload part size
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
 class StorageHandler:
-    def __init__(self):
-        pass
+    def __init__(self, backend: StorageBackend | None = None):
+        self.backend = backend or get_storage_backend()
 
     # PRIVATE METHODS #
-    def _generate_case_id(self, user_id: int, case_text: str):
+    def _generate_content_hash(self, file: BinaryIO) -> str:
+        """
+        Generate the SHA-256 of the file content
+
+        The hash is updated chunk by chunk, the file is rewound afterwards
+        """
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+
+    def _generate_case_id(self, user_id: str, content_hash: str) -> str:
         """
-        Generate a new case id
+        Generate the case id from the user and the content hash of the file
         """
-        unique_string = f"{user_id}_{case_text}"
-        return hashlib.sha256(unique_string.encode()).hexdigest()
+        return hashlib.sha256(f"{user_id}_{content_hash}".encode()).hexdigest()
 
     ## S3 operations ##
-    def _upload_case_to_s3(self, file_data: bytes, user_id: str):
+    def _upload_case_to_s3(
+        self, file: BinaryIO, user_id: str, case_id: str | None = None
+    ):
         """
-        Upload file data to S3
+        Stream a file to S3, the file is rewound afterwards
 
         Args:
-            file_data: The binary content of the file
+            file: The binary file, read in chunks
             user_id: ID of the user uploading the file
+            case_id: Case id of the file if already generated
 
         Raises:
             FileExistsError: If the file already exists in S3
         """
-        case_id = self._generate_case_id(user_id, file_data)
+        case_id = case_id or self._generate_case_id(
+            user_id, self._generate_content_hash(file)
+        )
 
         # Generate a unique S3 key/path
         s3_key = f"cases/users/{user_id}/{case_id}"
 
-        # Upload to S3 using the file data
-        s3 = boto3.client("s3")
+        # The backend rejects the write atomically if the object exists,
+        # no check-then-act window between two concurrent uploads
         try:
-            s3.head_object(Bucket="cf-papi", Key=s3_key)
-            # Object exists, raise a custom error
+            self.backend.put_stream(s3_key, file)
+        except FileExistsError:
             raise FileExistsError(
                 f"Eine Datei mit diesem Inhalt existiert bereits: {s3_key}"
             )
-        except s3.exceptions.ClientError as e:
-            if e.response["Error"]["Code"] == "404":
-                # Object doesn't exist, safe to upload
-                s3.put_object(Bucket="cf-papi", Key=s3_key, Body=file_data)
-            else:
-                # Some other error occurred with the S3 request
-                raise
+        finally:
+            file.seek(0)
         return (
             s3_key,
             case_id,
         )  # Return the S3 path and case id for storage in your database
 
-    def _delete_case_from_s3(self, s3_key):
+    def _get_staged_upload_key(self, user_id: str, upload_id: str) -> str:
+        """
+        Get the staging key of a direct upload
+
+        Raises:
+            ValueError: If the upload id is not a UUID
+        """
+        return f"cases/users/{user_id}/uploads/{uuid.UUID(upload_id)}"
+
+    def _create_upload_url(self, user_id: str):
+        """
+        Create a presigned URL the client uploads a case file to
+
+        Returns:
+            Dict with upload_id, url, fields, method and expires_in
         """
-        Delete a case from S3
+        upload_id = str(uuid.uuid4())
+        upload = self.backend.create_upload_url(
+            self._get_staged_upload_key(user_id, upload_id),
+            MAX_UPLOAD_SIZE_BYTES,
+            UPLOAD_URL_EXPIRE_SECONDS,
+        )
+        return {
+            "upload_id": upload_id,
+            **upload,
+            "expires_in": UPLOAD_URL_EXPIRE_SECONDS,
+        }
+
+    def _receive_local_upload(self, token: str, stream: BinaryIO) -> str:
         """
-        s3 = boto3.client("s3")
+        Store a direct upload sent to the API, the upload URLs of the local backend
+        point there
+
+        Raises:
+            ValueError: If the storage isn't local, the token is invalid or the file too large
+            FileExistsError: If the file was uploaded already
+        """
+        if not isinstance(self.backend, LocalStorageBackend):
+            raise ValueError("Direct uploads go to the storage, not the API")
+        return self.backend.receive_upload(token, stream)
+
+    def _download_staged_upload(self, staged_key: str, file: BinaryIO):
+        """
+        Download a direct upload into a file, the file is rewound afterwards
+
+        Raises:
+            FileNotFoundError: If nothing was uploaded under the key
+            ValueError: If the upload exceeds MAX_UPLOAD_SIZE_BYTES
+        """
+        self.backend.download(staged_key, file)
+        size = file.tell()
+        file.seek(0)
+        if size > MAX_UPLOAD_SIZE_BYTES:
+            raise ValueError(
+                f"Die Datei ist zu groß (maximal {MAX_UPLOAD_SIZE_BYTES} Bytes)"
+            )
+
+    def _promote_staged_upload(self, staged_key: str, user_id: str, case_id: str):
+        """
+        Move a direct upload to the key of its case, inside the storage. Callers hold
+        the case processing lock of the case id, which makes the move safe.
+
+        Raises:
+            FileExistsError: If the file already exists in S3
+        """
+        s3_key = f"cases/users/{user_id}/{case_id}"
         try:
-            s3.delete_object(Bucket="cf-papi", Key=s3_key)
-        except s3.exceptions.ClientError as e:
-            if e.response["Error"]["Code"] == "404":
-                # Object doesn't exist, safe to delete
-                pass
-            else:
-                raise
+            self.backend.move(staged_key, s3_key)
+        except FileExistsError:
+            raise FileExistsError(
+                f"Eine Datei mit diesem Inhalt existiert bereits: {s3_key}"
+            )
+        return s3_key, case_id
+
+    def _restore_staged_upload(self, s3_key: str, staged_key: str):
+        """
+        Move a promoted direct upload back to its staging key, e.g. if its processing
+        failed, so that it can be completed again
+        """
+        self.backend.move(s3_key, staged_key)
+
+    def _delete_case_from_s3(self, s3_key):
+        """
+        Delete a case from S3, deleting a missing case is not an error
+        """
+        self.backend.delete(s3_key)
 
     def _get_case_by_id_from_s3(self, user_id, case_id):
         """
         Get a case by id from S3
+
+        Raises:
+            FileNotFoundError: If the case doesn't exist
         """
-        s3 = boto3.client("s3")
         s3_key = f"cases/users/{user_id}/{case_id}"
-        s3.get_object(Bucket="cf-papi", Key=s3_key)
+        if not self.backend.exists(s3_key):
+            raise FileNotFoundError(s3_key)
         return s3_key
 
     # ## DB operations ##
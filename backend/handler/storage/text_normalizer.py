@@ -0,0 +1,196 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+import requests
+import tiktoken
+from backend.config.settings import (
+    BOILERPLATE_EDGE_LINES,
+    BOILERPLATE_MIN_PAGE_RATIO,
+    TOKENIZER_ENCODING,
+)
+
+"""
+Case text normalization
+
+The extracted page texts are sent to the LLM in every generation call of a case, so
+everything that carries no content is removed once before the case is stored:
+headers and footers repeated across pages, page numbers, line-break hyphenation and
+whitespace runs. Pages are normalized one by one and stay separate, the page offsets
+of the case refer to the normalized text.
+"""
+
+# Page numbers: "3", "- 3 -", "Seite 3", "Seite 3 von 10", "3/10"
+_PAGE_NUMBER = re.compile(
+    r"^[-–\s]*(?:seite|page|s\.)?\s*(\d+)\s*(?:(?:von|of|/)\s*\d+)?[-–\s]*$",
+    re.IGNORECASE,
+)
+# A word hyphenated at the line end, continued in lower case on the next line.
+# Suspended hyphens ("Vor- und Nachteile") are kept.
+_HYPHENATION = re.compile(
+    r"(\w)-\n(?!(?:und|oder|bis|sowie|bzw)\b)([a-zäöüß])",
+)
+_SPACES = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+# Running headers and footers are short, longer lines are always content
+_MAX_BOILERPLATE_LENGTH = 80
+
+
+@dataclass(frozen=True)
+class NormalizationStats:
+    characters_before: int
+    characters_after: int
+    # None if the tokenizer isn't available
+    tokens_before: int | None = None
+    tokens_after: int | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "characters_before": self.characters_before,
+            "characters_after": self.characters_after,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+        }
+
+
+def _boilerplate_key(line: str) -> str:
+    # Running headers differ in their numbers only ("Fall 1 – Seite 3")
+    return _DIGITS.sub("#", line.casefold())
+
+
+def _edge_lines(lines: list[str]) -> list[str]:
+    if len(lines) <= 2 * BOILERPLATE_EDGE_LINES:
+        return lines
+    return lines[:BOILERPLATE_EDGE_LINES] + lines[-BOILERPLATE_EDGE_LINES:]
+
+
+def _page_number(line: str) -> int | None:
+    match = _PAGE_NUMBER.match(line)
+    return int(match.group(1)) if match else None
+
+
+def _find_page_numbers(pages: list[list[str]]) -> list[set[int]]:
+    """
+    Get the page numbers of every page: numbers of edge lines that count up from
+    the previous or to the next page, a number alone (a year, a lab value) is content
+    """
+    candidates = [
+        {
+            number
+            for line in _edge_lines(lines)
+            if (number := _page_number(line)) is not None
+        }
+        for lines in pages
+    ]
+    return [
+        {
+            number
+            for number in numbers
+            if (index > 0 and number - 1 in candidates[index - 1])
+            or (index + 1 < len(pages) and number + 1 in candidates[index + 1])
+        }
+        for index, numbers in enumerate(candidates)
+    ]
+
+
+def _find_boilerplate(pages: list[list[str]]) -> set[str]:
+    """Get the keys of the edge lines repeated on enough pages"""
+    # Two pages sharing a line aren't evidence of a running header
+    if len(pages) < 3:
+        return set()
+    counts = Counter(
+        key
+        for lines in pages
+        for key in {
+            _boilerplate_key(line)
+            for line in _edge_lines(lines)
+            if line and len(line) <= _MAX_BOILERPLATE_LENGTH
+        }
+    )
+    min_pages = max(2, BOILERPLATE_MIN_PAGE_RATIO * len(pages))
+    return {key for key, count in counts.items() if count >= min_pages}
+
+
+def _strip_edges(
+    lines: list[str], boilerplate: set[str], page_numbers: set[int]
+) -> list[str]:
+    """Remove boilerplate and page numbers from the top and bottom of a page"""
+
+    def is_noise(line: str) -> bool:
+        return (
+            _boilerplate_key(line) in boilerplate or _page_number(line) in page_numbers
+        )
+
+    start, end = 0, len(lines)
+    while start < min(end, BOILERPLATE_EDGE_LINES) and (
+        not lines[start] or is_noise(lines[start])
+    ):
+        start += 1
+    while end > max(start, len(lines) - BOILERPLATE_EDGE_LINES) and (
+        not lines[end - 1] or is_noise(lines[end - 1])
+    ):
+        end -= 1
+    return lines[start:end]
+
+
+def normalize_pages(pages: list[str]) -> list[str]:
+    """
+    Normalize the page texts of a document
+
+    Args:
+        pages: Extracted page texts
+
+    Returns:
+        Normalized page texts, one per input page, ending with a line break so
+        the joined pages don't run into each other
+    """
+    split_pages = [
+        [_SPACES.sub(" ", line).strip() for line in page.splitlines()] for page in pages
+    ]
+    boilerplate = _find_boilerplate(split_pages)
+    page_numbers = _find_page_numbers(split_pages)
+
+    normalized = []
+    for lines, numbers in zip(split_pages, page_numbers):
+        text = "\n".join(_strip_edges(lines, boilerplate, numbers))
+        text = _HYPHENATION.sub(r"\1\2", text)
+        text = _BLANK_LINES.sub("\n\n", text).strip()
+        normalized.append(f"{text}\n" if text else "")
+    return normalized
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding | None:
+    # A failed load is cached as well, the download isn't retried for every upload
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except (OSError, ValueError, requests.exceptions.RequestException) as e:
+        print(f"Error loading tokenizer {TOKENIZER_ENCODING}: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int | None:
+    """
+    Count the tokens of a text for the generation model
+
+    Returns:
+        Number of tokens, None if the encoding can't be loaded (it's downloaded once)
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return None
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def normalization_stats(before: str, after: str) -> NormalizationStats:
+    """
+    Compare a text before and after normalization
+    """
+    tokens_before = count_tokens(before)
+    return NormalizationStats(
+        characters_before=len(before),
+        characters_after=len(after),
+        tokens_before=tokens_before,
+        tokens_after=count_tokens(after) if tokens_before is not None else None,
+    )
@@ -1,8 +1,22 @@
+import asyncio
+import logging
+import tempfile
+from typing import BinaryIO
 from backend.services.storage_service import StorageService
 from backend.services.database_service import DatabaseService
-from backend.handler.storage.file_converter import FileConverter
+from backend.handler.storage.file_converter import ExtractedText, FileConverter
+from backend.handler.storage.extractors import get_extractor
+from backend.handler.storage.text_normalizer import (
+    NormalizationStats,
+    normalization_stats,
+    normalize_pages,
+)
 from backend.services.llm_service import LLMService
 from backend.database.persistent.models import CaseStatus
+from backend.handler.session.processing_lock import case_processing_lock
+
+
+logger = logging.getLogger("papi.cases")
 
 
 class CaseService:
@@ -18,23 +32,110 @@ class CaseService:
         self.database_service = database_service
         self.file_converter = file_converter
 
+    def create_upload_url(self, filename: str, user_id: str):
+        """
+        Create a presigned URL the client uploads a case file to directly
+
+        Raises:
+            ValueError: If the file type is not supported
+        """
+        get_extractor(filename)
+        return self.storage_service.create_upload_url(user_id)
+
+    async def process_staged_upload(
+        self, upload_id: str, filename: str, user_id: str, case_number: int = 1
+    ):
+        """
+        Process a case the client uploaded directly to the storage
+
+        The file is downloaded into a temporary file for the extraction, the stored
+        object is moved to the case key instead of being uploaded again.
+
+        The staged object is kept if the processing can be retried with the same
+        upload id (e.g. the file is still being processed by a concurrent upload, or
+        the processing failed after the move, which moves it back), the lifecycle
+        rule of the uploads prefix expires it if it never is.
+
+        Raises:
+            ValueError: If the upload id is invalid or the file too large
+            FileNotFoundError: If nothing was uploaded for the upload id
+            ProcessingLockTimeoutError: If a concurrent upload of the same file is still running
+        """
+        staged_key = self.storage_service.get_staged_upload_key(user_id, upload_id)
+        with tempfile.TemporaryFile() as file:
+            try:
+                await asyncio.to_thread(
+                    self.storage_service.download_staged_upload, staged_key, file
+                )
+                case = await self.process_case_async_and_store_case_and_qanda(
+                    file, filename, user_id, case_number, staged_key
+                )
+            except (ValueError, FileExistsError):
+                # Rejected files and duplicates won't succeed on a retry
+                self.storage_service.delete_case_from_s3(staged_key)
+                raise
+            # Gone if promoted, dropped if a concurrent upload already processed it
+            self.storage_service.delete_case_from_s3(staged_key)
+            return case
+
     async def process_case_async_and_store_case_and_qanda(
-        self, file_data: bytes, filename: str, user_id: str, case_number: int = 1
+        self,
+        file: BinaryIO,
+        filename: str,
+        user_id: str,
+        case_number: int = 1,
+        staged_key: str | None = None,
     ):
         """
         Process a case to generate questions and answers, store the case and the questions and answers in the database
 
         Args:
-            file_data: Binary content of the uploaded file
+            file: Uploaded binary file, read in chunks
             filename: Original filename with extension
             user_id: ID of the user uploading
             case_number: Optional case number identifier
+            staged_key: Storage key of a direct upload of the file, moved instead of uploading the file
 
         Returns:
+            The case, or None if a concurrent upload of the same file already processed it
+
+        Raises:
+            ProcessingLockTimeoutError: If a concurrent upload of the same file is still running
         """
+        # Duplicate uploads (double clicks, retries) wait for the in-flight job of the
+        # same content instead of running the LLM generation a second time
+        content_hash = await asyncio.to_thread(
+            self.storage_service.generate_content_hash, file
+        )
+        case_id = self.storage_service.generate_case_id(user_id, content_hash)
+        async with case_processing_lock.hold(case_id) as waited:
+            if waited:
+                case = self.database_service.get_case_by_id(case_id)
+                if case and case.status == CaseStatus.COMPLETED:
+                    return None
+            return await self._process_case_and_store_case_and_qanda(
+                file, filename, user_id, case_number, case_id, content_hash, staged_key
+            )
+
+    async def _process_case_and_store_case_and_qanda(
+        self,
+        file: BinaryIO,
+        filename: str,
+        user_id: str,
+        case_number: int,
+        case_id: str,
+        content_hash: str,
+        staged_key: str | None = None,
+    ):
         try:
-            processed_case, case_id = self.upload_case(
-                file_data, filename, user_id, case_number
+            processed_case, case_id = await self.upload_case(
+                file,
+                filename,
+                user_id,
+                case_number,
+                case_id,
+                content_hash,
+                staged_key,
             )
         except Exception as e:
             print(f"Error processing case: {e}")
@@ -50,7 +151,7 @@ class CaseService:
         except Exception as e:
             print(f"Error generating questions and answers: {e} – cleaning up case")
             self.database_service.update_case_status(case_id, CaseStatus.FAILED)
-            self.storage_service.delete_case_from_s3(processed_case.storage_path)
+            self.discard_case_file(processed_case.storage_path, staged_key)
             self.database_service.delete_case_from_db(case_id)
             raise e
 
@@ -63,40 +164,135 @@ class CaseService:
             print(f"Error storing questions: {e}")
             raise e
 
-    def upload_case(
-        self, file_data: bytes, filename: str, user_id: str, case_number: int = 1
+        return processed_case
+
+    async def upload_case(
+        self,
+        file: BinaryIO,
+        filename: str,
+        user_id: str,
+        case_number: int = 1,
+        case_id: str | None = None,
+        content_hash: str | None = None,
+        staged_key: str | None = None,
     ):
         """
-        Upload a case to S3 and the database from binary file data
+        Upload a case to S3 and the database from a binary file, streamed in chunks
 
         Args:
-            file_data: Binary content of the uploaded file
+            file: Uploaded binary file
             filename: Original filename with extension
             user_id: ID of the user uploading
             case_number: Optional case number identifier
+            case_id: Case id of the file if already generated
+            content_hash: SHA-256 of the file content if already generated
+            staged_key: Storage key of a direct upload of the file, moved instead of uploading the file
         """
 
-        # Check if file is PDF (based on extension)
-        if not filename.lower().endswith(".pdf"):
-            raise ValueError("Only PDF files are currently supported")
+        # Check if the file type is supported (based on extension)
+        get_extractor(filename)
 
-        # Upload binary data directly to S3
-        s3_key, case_id = self.storage_service.upload_case_to_s3(file_data, user_id)
+        content_hash = content_hash or await asyncio.to_thread(
+            self.storage_service.generate_content_hash, file
+        )
+        case_id = case_id or self.storage_service.generate_case_id(
+            user_id, content_hash
+        )
+
+        if staged_key:
+            # Already in the storage, move it instead of transferring it again
+            s3_key, case_id = await asyncio.to_thread(
+                self.storage_service.promote_staged_upload, staged_key, user_id, case_id
+            )
+        else:
+            # Stream the file to S3
+            s3_key, case_id = await asyncio.to_thread(
+                self.storage_service.upload_case_to_s3, file, user_id, case_id
+            )
 
         try:
-            # Convert binary data to text
-            case_content = self.file_converter.convert_pdf_from_bytes(file_data)
+            # Convert the file to text page by page
+            extracted = await self.extract_case_pages(file, content_hash, filename)
+
+            # The stored text is sent in every generation call of the case, strip
+            # what carries no content once before
+            normalized, stats = await asyncio.to_thread(
+                self.normalize_case_text, extracted
+            )
 
             # Add to database
             case = self.database_service.create_case(
-                filename, user_id, s3_key, case_id, case_content, case_number
+                filename,
+                user_id,
+                s3_key,
+                case_id,
+                normalized.text,
+                case_number,
+                normalized.page_offsets,
+                {
+                    # Direct uploads went to the storage without passing the API
+                    "upload_source": "direct" if staged_key else "api",
+                    "normalization": stats.to_dict(),
+                },
+                content_hash,
             )
             return case, case_id
         except Exception as e:
-            # Clean up S3 if database operation fails
-            self.storage_service.delete_case_from_s3(s3_key)
+            # Clean up S3 and the extracted text if database operation fails
+            self.discard_case_file(s3_key, staged_key)
+            self.database_service.delete_unreferenced_extracted_pages(content_hash)
             raise e
 
+    def discard_case_file(self, s3_key: str, staged_key: str | None = None):
+        """
+        Remove the stored file of a case that failed to process. A promoted direct
+        upload is the only copy of the file, it's moved back to its staging key so
+        the upload can be completed again.
+        """
+        if staged_key:
+            self.storage_service.restore_staged_upload(s3_key, staged_key)
+        else:
+            self.storage_service.delete_case_from_s3(s3_key)
+
+    async def extract_case_pages(
+        self, file: BinaryIO, content_hash: str, filename: str
+    ) -> ExtractedText:
+        """
+        Extract the page texts of a file, the file is only parsed if no file with the
+        same content was extracted by the same extractor before
+        """
+        extractor = get_extractor(filename).name
+        pages = self.database_service.get_extracted_pages(content_hash, extractor)
+        if pages is not None:
+            return ExtractedText(pages)
+
+        extracted = await self.file_converter.extract_pages_async(file, filename)
+        self.database_service.store_extracted_pages(
+            content_hash, extractor, extracted.pages
+        )
+        return extracted
+
+    def normalize_case_text(
+        self, extracted: ExtractedText
+    ) -> tuple[ExtractedText, NormalizationStats]:
+        """
+        Remove repeated headers and footers, page numbers, hyphenation and
+        whitespace runs from the page texts of a case
+
+        Returns:
+            Tuple of (normalized text, statistics of the saved characters and tokens)
+        """
+        normalized = ExtractedText(normalize_pages(extracted.pages))
+        stats = normalization_stats(extracted.text, normalized.text)
+        logger.info(
+            "Normalized case text: %s -> %s characters, %s -> %s tokens",
+            stats.characters_before,
+            stats.characters_after,
+            stats.tokens_before,
+            stats.tokens_after,
+        )
+        return normalized, stats
+
     def delete_case(self, case_id: str, user_id: str):
         """High-level business operation to delete a case"""
 
@@ -123,8 +319,34 @@ class CaseService:
         """
         return self.database_service.get_all_cases_for_user(user_id)
 
+    def get_cases_page_for_user(
+        self, user_id: str, page_size: int, cursor: str | None = None
+    ):
+        """
+        Get a page of the cases of a user, most recently uploaded first
+        """
+        return self.database_service.get_cases_page_for_user(user_id, page_size, cursor)
+
     def get_case_by_id(self, case_id: str):
         """
         Get a case by its ID
         """
         return self.database_service.get_case_by_id(case_id)
+
+    def get_questions_by_keyword(self, user_id: str, keyword: str):
+        """
+        Get all questions across the cases of a user that are tagged with a keyword
+        """
+        questions = self.database_service.get_questions_by_keyword_for_user(
+            user_id, keyword
+        )
+        return [
+            {
+                "id": question.id,
+                "question": question.question,
+                "difficulty": question.difficulty,
+                "keywords": question.keywords,
+                "question_set_id": question.question_set_id,
+            }
+            for question in questions
+        ]
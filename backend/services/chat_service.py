@@ -1,7 +1,8 @@
-import random
 from backend.services.llm_service import LLMService
 from backend.services.database_service import DatabaseService
-from backend.database.persistent.models import MessageRole
+from backend.database.persistent.models import MessageRole, Message
+from backend.api.schemas.chat import MessageResponse
+from backend.api.schemas.qanda import QuestionResponse
 from typing import Optional, Dict, Any
 
 """
@@ -22,14 +23,31 @@ class ChatService:
         self.db_service = db_service
         self.llm_service = llm_service
 
-    async def get_case_discussions(self, user_id: str, case_id: str) -> Dict[str, Any]:
-        """Get existing discussions for a case"""
+    async def get_case_discussions(
+        self,
+        user_id: str,
+        case_id: str,
+        page_size: int,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get a page of existing discussions for a case"""
         # Get case discussions for this case
-        case_discussions = self.db_service.get_case_discussions(case_id, user_id)
+        case_discussions, next_cursor = self.db_service.get_case_discussions(
+            case_id, user_id, page_size, cursor
+        )
 
         # If no discussions found, return empty list
         if not case_discussions:
-            return {"discussions": []}
+            return {"discussions": [], "next_cursor": None}
+
+        # Get the most recent message of every answer discussion on this page at once
+        latest_messages = self.db_service.get_latest_messages_by_answer_discussion_ids(
+            [
+                answer_discussion.id
+                for case_discussion in case_discussions
+                for answer_discussion in case_discussion.answer_discussions
+            ]
+        )
 
         # Format response with most recent discussions first
         formatted_discussions = []
@@ -37,11 +55,7 @@ class ChatService:
             # Get the answer discussions for this case discussion
             answer_discussions = []
             for answer_discussion in case_discussion.answer_discussions:
-                # Get the most recent message for this answer discussion
-                messages = self.db_service.get_messages_by_answer_discussion_id(
-                    answer_discussion.id
-                )
-                latest_message = messages[-1] if messages else None
+                latest_message = latest_messages.get(answer_discussion.id)
 
                 answer_discussions.append(
                     {
@@ -71,38 +85,34 @@ class ChatService:
         # Sort by last_message_at (most recent first)
         formatted_discussions.sort(key=lambda d: d["last_message_at"], reverse=True)
 
-        return {"discussions": formatted_discussions}
+        return {"discussions": formatted_discussions, "next_cursor": next_cursor}
 
     async def start_case_discussion(
         self, user_id: str, case_id: str, topic: Optional[str] = None
     ) -> dict[str, int]:
         """Start a new discussion for a case for a random unanswered question of a specific topic or completely random question"""
-        # First create the case discussion without topic
-        case_discussion = self.db_service.create_case_discussion(case_id, user_id)
-
-        # Then get questions based on topic if provided
-        if topic:
-            questions = await self.db_service.get_unanswered_questions_by_topic(
+        # Case discussion, answer discussion and first message are one unit of work:
+        # a single commit, and nothing half-created is left behind on failure
+        with self.db_service.transaction():
+            # Let the database pick a random unanswered question (of the topic if provided)
+            selected_question = self.db_service.get_random_unanswered_question(
                 case_id, topic
             )
-        else:
-            questions = await self.db_service.get_all_unanswered_questions(case_id)
-
-        if not questions:
-            raise ValueError("No unanswered questions found")
+            if not selected_question:
+                raise ValueError("No unanswered questions found")
 
-        # Select a random question from the list
-        selected_question = random.choice(questions)
+            # Create the case discussion without topic
+            case_discussion = self.db_service.create_case_discussion(case_id, user_id)
 
-        # Create answer discussion for the selected question
-        answer_discussion = self.db_service.create_answer_discussion(
-            case_discussion.id, selected_question.id
-        )
+            # Create answer discussion for the selected question
+            answer_discussion = self.db_service.create_answer_discussion(
+                case_discussion.id, selected_question.id
+            )
 
-        # Add first message (the selected question to the answer_discussion)
-        first_message = self.db_service.create_chat_message(
-            MessageRole.ASSISTANT, selected_question.question, answer_discussion.id
-        )
+            # Add first message (the selected question to the answer_discussion)
+            first_message = self.db_service.create_chat_message(
+                MessageRole.ASSISTANT, selected_question.question, answer_discussion.id
+            )
 
         return {
             "case_discussion_id": case_discussion.id,
@@ -113,28 +123,27 @@ class ChatService:
 
     async def add_user_message(self, content: str, answer_discussion_id: int) -> dict:
         """Add a user message to the discussion and generate a bot response"""
-        # Store user message
-        user_message = self.db_service.create_chat_message(
-            role=MessageRole.USER,
-            content=content,
-            answer_discussion_id=answer_discussion_id,
-        )
-
-        # @TODO: Implement caching
-        # Get answer discussion details to provide context for response
-        chat_history = self.db_service.get_messages_by_answer_discussion_id(
-            answer_discussion_id
-        )
+        # Recent messages of the discussion, one Redis call when cached
+        chat_history = self.db_service.get_recent_messages(answer_discussion_id)
+        # The user message is only stored together with the bot response, so the
+        # history sent to the LLM gets it appended in memory
+        chat_history.append(Message(role=MessageRole.USER, content=content))
 
         # Generate bot response using LLM service
         bot_response = await self.llm_service.generate_response(content, chat_history)
 
-        # Store bot response
-        bot_message = self.db_service.create_chat_message(
-            role=MessageRole.ASSISTANT,
-            content=bot_response,
-            answer_discussion_id=answer_discussion_id,
-        )
+        # Store user message and bot response with a single commit
+        with self.db_service.transaction():
+            user_message = self.db_service.create_chat_message(
+                role=MessageRole.USER,
+                content=content,
+                answer_discussion_id=answer_discussion_id,
+            )
+            bot_message = self.db_service.create_chat_message(
+                role=MessageRole.ASSISTANT,
+                content=bot_response,
+                answer_discussion_id=answer_discussion_id,
+            )
 
         return {
             "user_message_id": user_message.id,
@@ -142,8 +151,13 @@ class ChatService:
             "bot_response": bot_response,
         }
 
-    async def get_chat_history(self, answer_discussion_id: int) -> dict:
-        """Get all messages for a specific answer discussion"""
+    async def get_chat_history(
+        self,
+        answer_discussion_id: int,
+        page_size: int,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """Get a page of messages for a specific answer discussion, newest page first"""
         # Get answer discussion details
         answer_discussion = self.db_service.get_answer_discussion_by_id(
             answer_discussion_id
@@ -153,16 +167,17 @@ class ChatService:
                 f"Answer discussion with ID {answer_discussion_id} not found"
             )
 
-        # Get all messages for this discussion
-        messages = self.db_service.get_messages_by_answer_discussion_id(
-            answer_discussion_id
+        # Get a page of messages for this discussion
+        messages, next_cursor = (
+            self.db_service.get_messages_page_by_answer_discussion_id(
+                answer_discussion_id, page_size, cursor
+            )
         )
 
-        # Get question details
-        question = self.db_service.get_question_by_id(answer_discussion.question_id)
-
+        # The question is eager-loaded with the answer discussion (without its model answer)
         return {
             "answer_discussion_id": answer_discussion_id,
-            "question": question,
-            "messages": messages,
+            "question": QuestionResponse.model_validate(answer_discussion.question),
+            "messages": [MessageResponse.model_validate(m) for m in messages],
+            "next_cursor": next_cursor,
         }
@@ -7,6 +7,7 @@ from backend.database.persistent.models import (
     MessageRole,
     Prompt,
     PromptType,
+    PromptCategory,
 )
 from backend.api.schemas.chat import (
     CaseDiscussionCreate,
@@ -17,10 +18,27 @@ from backend.api.schemas.qanda import QuestionRetrieve, QuestionSetCreate
 from backend.api.schemas.prompt import PromptCreate
 from backend.api.schemas.case import CaseCreate
 from backend.api.schemas.user import UserCreate
-from backend.database.persistent.models import CaseStatus, AnswerDiscussion, Message
+from backend.database.persistent.models import (
+    CaseStatus,
+    AnswerDiscussion,
+    Message,
+    ExtractedDocument,
+)
 from backend.handler.database.database_handler import DatabaseHandler
+from backend.handler.database.prompt_registry import prompt_registry
+from backend.handler.database.user_cache import user_cache
+from backend.handler.session.token_revocation import token_revocation
+from backend.handler.session.chat_history_cache import chat_history_cache
+from backend.database.cache.models import CachedPrompt, CachedUser
 from backend.utils.password_utils import hash_password
+from backend.config.settings import (
+    MESSAGE_ARCHIVE_IDLE_DAYS,
+    MESSAGE_ARCHIVE_BATCH_SIZE,
+)
+from datetime import datetime, timedelta
 from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+import json
 import uuid
 from typing import Optional
 
@@ -29,8 +47,32 @@ class DatabaseService:
     def __init__(self, db_handler: DatabaseHandler):
         self.db_handler = db_handler
 
+    def transaction(self):
+        """
+        Run several operations as one unit of work with a single commit
+
+        Usage:
+            with db_service.transaction():
+                discussion = db_service.create_case_discussion(...)
+                db_service.create_answer_discussion(discussion.id, ...)
+
+        Everything is rolled back if the block raises.
+        """
+        return self.db_handler._transaction()
+
     # User-specific operations
-    def create_user(self, user_data: UserCreate):
+    def create_user(self, user_data: UserCreate, password_hash: Optional[str] = None):
+        """
+        Create a user
+
+        Args:
+            user_data: Validated user data
+            password_hash: Argon2 hash of the password, async callers hash it in the
+                hashing pool beforehand; it is hashed here if not given
+
+        Returns:
+            The created User
+        """
         try:
             # @TODO: Pass in values and create UserCreate object here and validate it
             validated_user_data = UserCreate.model_validate(user_data)
@@ -43,7 +85,9 @@ class DatabaseService:
                 raise ValueError("User with this email already exists")
 
             # Hash the password
-            hashed_password = hash_password(validated_user_data.password)
+            hashed_password = password_hash or hash_password(
+                validated_user_data.password
+            )
             # Create new user
             new_user = User(
                 id=str(uuid.uuid4()),
@@ -62,6 +106,22 @@ class DatabaseService:
         # TODO: Add validation
         return self.db_handler._get_user_by_id(user_id)
 
+    def get_cached_user(self, user_id: str) -> CachedUser | None:
+        """Get a user from the in-process user cache, loading it on a miss"""
+        user = user_cache.get(user_id)
+        if user is None:
+            db_user = self.db_handler._get_user_by_id(user_id)
+            if db_user is None:
+                return None
+            user = CachedUser.model_validate(db_user)
+            user_cache.set(user)
+        return user
+
+    def reload_cached_user(self, user_id: str) -> CachedUser | None:
+        """Drop a user from the in-process user cache and load it again"""
+        user_cache.invalidate(user_id)
+        return self.get_cached_user(user_id)
+
     def get_user_by_email(self, email):
         # TODO: Add validation
         return self.db_handler._get_user_by_email(email)
@@ -70,21 +130,43 @@ class DatabaseService:
         # TODO: Add validation
         return self.db_handler._get_all_users()
 
+    def get_users_page(
+        self, page_size: int, cursor: Optional[str] = None
+    ) -> tuple[list[User], Optional[str]]:
+        return self.db_handler._get_users_page(page_size, cursor)
+
     def update_user_last_login(self, user_id):
         # TODO: Add validation
-        return self.db_handler._update_user_last_login(user_id)
+        user = self.db_handler._update_user_last_login(user_id)
+        user_cache.invalidate(user_id)
+        return user
 
     def update_user(self, user_id, update_data):
         # TODO: Add validation
-        return self.db_handler._update_user(user_id, update_data)
+        user = self.db_handler._update_user(user_id, update_data)
+        user_cache.invalidate(user_id)
+        if "role" in update_data:
+            token_revocation.revoke_user(user_id)
+        return user
 
     def delete_user(self, user_id):
         # TODO: Add validation
-        return self.db_handler._delete_user(user_id)
+        self.db_handler._delete_user(user_id)
+        user_cache.invalidate(user_id)
+        token_revocation.revoke_user(user_id)
 
     # Case-specific operations
     def create_case(
-        self, filename, user_id, s3_key, case_id, case_content, case_number
+        self,
+        filename,
+        user_id,
+        s3_key,
+        case_id,
+        case_content,
+        case_number,
+        page_offsets=None,
+        case_metadata=None,
+        content_hash=None,
     ):
         file_type = filename.split(".")[-1].lower() if "." in filename else None
 
@@ -97,6 +179,7 @@ class DatabaseService:
                 case_content=case_content,
                 case_number=case_number,
                 user_id=user_id,
+                **({"case_metadata": case_metadata} if case_metadata else {}),
             )
 
             # Create SQLAlchemy model instance
@@ -105,6 +188,8 @@ class DatabaseService:
                 filename=case_model.filename,
                 storage_path=s3_key,
                 content_text=case_model.case_content,
+                page_offsets=page_offsets,
+                content_hash=content_hash,
                 file_type=case_model.file_type,
                 file_size=case_model.file_size,
                 status=CaseStatus.UPLOADED,
@@ -128,6 +213,11 @@ class DatabaseService:
         # TODO: Add validation and error handling
         return self.db_handler._get_all_cases_for_user(user_id)
 
+    def get_cases_page_for_user(
+        self, user_id: str, page_size: int, cursor: Optional[str] = None
+    ) -> tuple[list[Case], Optional[str]]:
+        return self.db_handler._get_cases_page_for_user(user_id, page_size, cursor)
+
     def get_case_by_id(self, case_id):
         # TODO: Add validation and error handling
         return self.db_handler._get_case_by_id(case_id)
@@ -140,6 +230,51 @@ class DatabaseService:
         # TODO: Add validation and error handling
         return self.db_handler._delete_case(case_id)
 
+    # Extraction cache operations
+    def get_extracted_pages(
+        self, content_hash: str, extractor: str
+    ) -> list[str] | None:
+        """
+        Get the page texts extracted from a file with this content before
+
+        Args:
+            content_hash: SHA-256 of the file content
+            extractor: Name of the extractor of the file type
+
+        Returns:
+            List of page texts or None if the content wasn't extracted yet
+        """
+        document = self.db_handler._get_extracted_document(content_hash, extractor)
+        return document.to_pages() if document else None
+
+    def store_extracted_pages(
+        self, content_hash: str, extractor: str, pages: list[str]
+    ):
+        """
+        Cache the page texts extracted from a file, failures only cost a later re-parse
+        """
+        try:
+            self.db_handler._create_extracted_document(
+                ExtractedDocument(
+                    content_hash=content_hash,
+                    extractor=extractor,
+                    pages=json.dumps(pages),
+                    page_count=len(pages),
+                )
+            )
+        except SQLAlchemyError as e:
+            print(f"Error caching extracted pages: {e}")
+
+    def delete_unreferenced_extracted_pages(self, content_hash: str):
+        """
+        Delete the cached page texts of a content if no case refers to it, e.g. after
+        the case of a freshly extracted file couldn't be created
+        """
+        try:
+            self.db_handler._delete_unreferenced_extracted_documents([content_hash])
+        except SQLAlchemyError as e:
+            print(f"Error deleting extracted pages: {e}")
+
     # QuestionSet-specific operations
     def create_question_set(self, case_id: str, prompt_id: str, prompt_version: int):
         try:
@@ -174,26 +309,29 @@ class DatabaseService:
             all_question_sets = []
             all_questions = []
 
-            for prompt, question_list in validated_questions.items():
-                # Create a QuestionSet for this prompt
-                validated_question_set_data = QuestionSetCreate(
-                    case_id=case_id, prompt_id=prompt.id, prompt_version=prompt.version
-                )
-                question_set = QuestionSet(
-                    case_id=validated_question_set_data.case_id,
-                    prompt_id=validated_question_set_data.prompt_id,
-                    prompt_version=validated_question_set_data.prompt_version,
-                )
-                # Questions have already been validated
-                # Create the question set and associate questions with it
-                created_set, created_questions = (
-                    self.db_handler._create_question_set_and_questions(
-                        question_set, question_list
+            with self.transaction():
+                for prompt, question_list in validated_questions.items():
+                    # Create a QuestionSet for this prompt
+                    validated_question_set_data = QuestionSetCreate(
+                        case_id=case_id,
+                        prompt_id=prompt.id,
+                        prompt_version=prompt.version,
+                    )
+                    question_set = QuestionSet(
+                        case_id=validated_question_set_data.case_id,
+                        prompt_id=validated_question_set_data.prompt_id,
+                        prompt_version=validated_question_set_data.prompt_version,
+                    )
+                    # Questions have already been validated
+                    # Create the question set and associate questions with it
+                    created_set, created_questions = (
+                        self.db_handler._create_question_set_and_questions(
+                            question_set, question_list
+                        )
                     )
-                )
 
-                all_question_sets.append(created_set)
-                all_questions.extend(created_questions)
+                    all_question_sets.append(created_set)
+                    all_questions.extend(created_questions)
 
             return all_question_sets, all_questions
 
@@ -254,6 +392,55 @@ class DatabaseService:
             raise ValueError(f"Question with ID {question_id} not found")
         return question
 
+    def get_questions_by_keyword_for_user(
+        self, user_id: str, keyword: str
+    ) -> list[Question]:
+        """
+        Get the questions of all cases of a user that are tagged with a keyword
+
+        Args:
+            user_id: ID of the user
+            keyword: Keyword to look for
+
+        Returns:
+            List of Question objects
+        """
+        keyword = keyword.strip()
+        if not keyword:
+            raise ValueError("Keyword must not be empty")
+        return self.db_handler._get_questions_by_keyword_for_user(user_id, keyword)
+
+    # Search-specific operations
+    def search_for_user(
+        self, user_id: str, search_query: str, page: int, page_size: int
+    ) -> dict:
+        """
+        Full-text search over the questions, model answers and chat messages of a user
+
+        Args:
+            user_id: ID of the user
+            search_query: Free text search query
+            page: 1-based page number
+            page_size: Number of hits per page
+
+        Returns:
+            Dictionary with the ranked hits of the page and whether more hits exist
+        """
+        search_query = search_query.strip()
+        if not search_query:
+            raise ValueError("Search query must not be empty")
+
+        # Fetch one extra hit to know whether there is a next page
+        hits = self.db_handler._search_for_user(
+            user_id, search_query, limit=page_size + 1, offset=(page - 1) * page_size
+        )
+        return {
+            "results": hits[:page_size],
+            "page": page,
+            "page_size": page_size,
+            "has_more": len(hits) > page_size,
+        }
+
     # Chat-specific operations
     def create_case_discussion(
         self, case_id: str, user_id: str, topic: Optional[str] = None
@@ -268,26 +455,39 @@ class DatabaseService:
         )
         return self.db_handler._create_case_discussion(case_discussion)
 
-    def get_case_discussions(self, case_id: str, user_id: str) -> list[CaseDiscussion]:
+    def get_case_discussions(
+        self, case_id: str, user_id: str, page_size: int, cursor: Optional[str] = None
+    ) -> tuple[list[CaseDiscussion], Optional[str]]:
         """
-        Get case discussions for a specific case and user
+        Get a page of case discussions for a specific case and user
 
         Args:
             case_id: ID of the case
             user_id: ID of the user
+            page_size: Number of case discussions per page
+            cursor: Cursor of the previous page
 
         Returns:
-            List of CaseDiscussion objects with eager-loaded answer discussions
+            Tuple of (CaseDiscussion objects with eager-loaded answer discussions, next cursor)
         """
-        return self.db_handler._get_case_discussions(case_id, user_id)
+        return self.db_handler._get_case_discussions(
+            case_id, user_id, page_size, cursor
+        )
 
-    async def get_unanswered_questions_by_topic(
-        self, case_id: str, topic: str
-    ) -> list[Question]:
-        return self.db_handler._get_unanswered_questions_by_topic(case_id, topic)
+    def get_random_unanswered_question(
+        self, case_id: str, topic: Optional[str] = None
+    ) -> Question | None:
+        """
+        Get a random unanswered question of a case, optionally restricted to a topic
+
+        Args:
+            case_id: ID of the case
+            topic: Optional prompt category or sub category
 
-    def get_all_unanswered_questions(self, case_id: str) -> list[Question]:
-        return self.db_handler._get_all_unanswered_questions(case_id)
+        Returns:
+            Question object or None if all questions are answered
+        """
+        return self.db_handler._get_random_unanswered_question(case_id, topic)
 
     def create_answer_discussion(
         self, case_discussion_id: int, selected_question_id: int
@@ -331,7 +531,7 @@ class DatabaseService:
         self, answer_discussion_id: int
     ) -> list[Message]:
         """
-        Get all messages for a specific answer discussion
+        Get all messages for a specific answer discussion, archived ones included
 
         Args:
             answer_discussion_id: ID of the answer discussion
@@ -343,6 +543,69 @@ class DatabaseService:
             answer_discussion_id
         )
 
+    def get_latest_messages_by_answer_discussion_ids(
+        self, answer_discussion_ids: list[int]
+    ) -> dict[int, Message]:
+        """
+        Get the most recent message of each of the given answer discussions
+
+        Args:
+            answer_discussion_ids: IDs of the answer discussions
+
+        Returns:
+            Dictionary mapping answer discussion ID to its latest Message
+        """
+        return self.db_handler._get_latest_messages_by_answer_discussion_ids(
+            answer_discussion_ids
+        )
+
+    def archive_idle_messages(
+        self,
+        idle_days: int = MESSAGE_ARCHIVE_IDLE_DAYS,
+        batch_size: int = MESSAGE_ARCHIVE_BATCH_SIZE,
+    ) -> tuple[int, int]:
+        """
+        Move the messages of idle answer discussions into their compressed archives
+
+        Args:
+            idle_days: Days without new messages after which a discussion is idle
+            batch_size: Maximum number of answer discussions to archive
+
+        Returns:
+            Tuple of (archived answer discussions, archived messages)
+        """
+        idle_before = datetime.now() - timedelta(days=idle_days)
+        answer_discussion_ids = self.db_handler._get_idle_answer_discussion_ids(
+            idle_before, batch_size
+        )
+        archived_discussions = archived_messages = 0
+        for answer_discussion_id in answer_discussion_ids:
+            moved = self.db_handler._archive_messages(answer_discussion_id, idle_before)
+            archived_discussions += moved > 0
+            archived_messages += moved
+        return archived_discussions, archived_messages
+
+    def get_messages_page_by_answer_discussion_id(
+        self, answer_discussion_id: int, page_size: int, cursor: Optional[str] = None
+    ) -> tuple[list[Message], Optional[str]]:
+        """
+        Get a page of messages for a specific answer discussion
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+            page_size: Number of messages per page
+            cursor: Cursor of the previous (newer) page
+
+        Returns:
+            Tuple of (Message objects in chronological order, cursor of the next older page)
+        """
+        messages, next_cursor = (
+            self.db_handler._get_messages_page_by_answer_discussion_id(
+                answer_discussion_id, page_size, cursor
+            )
+        )
+        return list(reversed(messages)), next_cursor
+
     def create_chat_message(
         self, role: MessageRole, content: str, answer_discussion_id: int
     ) -> Message:
@@ -360,7 +623,38 @@ class DatabaseService:
             answer_discussion_id=validated_chat_message_data.answer_discussion_id,
         )
 
-        return self.db_handler._create_message(chat_message)
+        with self.transaction():
+            chat_message = self.db_handler._create_message(chat_message)
+            # Write through to the chat history cache once the message is committed,
+            # a detached copy avoids reloading the expired message after the commit
+            cached_message = Message.from_dict(
+                chat_message.to_dict(), chat_message.answer_discussion_id
+            )
+            self.db_handler._after_commit(
+                lambda: chat_history_cache.append(cached_message)
+            )
+        return chat_message
+
+    def get_recent_messages(self, answer_discussion_id: int) -> list[Message]:
+        """
+        Get the most recent messages of an answer discussion from the chat history cache
+
+        On a cache miss the history is loaded from the database and cached.
+
+        Args:
+            answer_discussion_id: ID of the answer discussion
+
+        Returns:
+            List of the last CHAT_HISTORY_CACHE_SIZE messages, oldest first
+        """
+        messages = chat_history_cache.get(answer_discussion_id)
+        if messages is None:
+            version = chat_history_cache.version(answer_discussion_id)
+            messages = self.db_handler._get_messages_by_answer_discussion_id(
+                answer_discussion_id
+            )[-chat_history_cache.size :]
+            chat_history_cache.fill(answer_discussion_id, messages, version)
+        return messages
 
     # Prompt-specific operations
     def create_prompt(self, prompt_data: dict):
@@ -377,22 +671,37 @@ class DatabaseService:
                 content=validated_prompt_data.content,
             )
             self.db_handler._create_prompt(prompt)
+            prompt_registry.invalidate()
             return True
         except Exception as e:
             print(f"Error creating default prompts: {str(e)}")
             raise
 
-    def get_all_prompts(self) -> list[Prompt]:
-        return self.db_handler._get_all_prompts()
+    def update_prompt(self, prompt_id: str, update_data: dict) -> Prompt | None:
+        """update a prompt and bump its version"""
+        prompt = self.db_handler._update_prompt(prompt_id, update_data)
+        prompt_registry.invalidate()
+        return prompt
+
+    # Prompt lookups are served from the in-process prompt registry
+    def get_all_prompts(self) -> list[CachedPrompt]:
+        return prompt_registry.get_all(self.db_handler)
+
+    def get_all_prompt_ids(self) -> list[str]:
+        return [prompt.id for prompt in prompt_registry.get_all(self.db_handler)]
 
-    def get_all_prompt_ids(self) -> list[int]:
-        return self.db_handler._get_all_prompt_ids()
+    def get_prompt_by_id(self, prompt_id: str) -> CachedPrompt | None:
+        return prompt_registry.get_by_id(self.db_handler, prompt_id)
 
-    def get_prompt_by_id(self, prompt_id: int) -> Prompt | None:
-        return self.db_handler._get_prompt_by_id(prompt_id)
+    def get_all_prompts_by_type(self, prompt_type: PromptType) -> list[CachedPrompt]:
+        return prompt_registry.get_by_type(self.db_handler, prompt_type)
 
-    def get_all_prompts_by_type(self, prompt_type: PromptType) -> list[Prompt]:
-        return self.db_handler._get_all_prompts_by_type(prompt_type)
+    def get_all_prompts_by_type_negative(
+        self, prompt_type: PromptType
+    ) -> list[CachedPrompt]:
+        return prompt_registry.get_by_type_negative(self.db_handler, prompt_type)
 
-    def get_all_prompts_by_type_negative(self, prompt_type: PromptType) -> list[Prompt]:
-        return self.db_handler._get_all_prompts_by_type_negative(prompt_type)
+    def get_all_prompts_by_category(
+        self, category: PromptCategory
+    ) -> list[CachedPrompt]:
+        return prompt_registry.get_by_category(self.db_handler, category)
@@ -1,3 +1,4 @@
+from typing import BinaryIO
 from backend.handler.storage.storage_handler import StorageHandler
 
 
@@ -5,17 +6,89 @@ class StorageService:
     def __init__(self, storage_handler: StorageHandler):
         self.storage_handler = storage_handler
 
-    def upload_case_to_s3(self, file_data: bytes, user_id: str):
+    def generate_content_hash(self, file: BinaryIO) -> str:
         """
-        Upload a case to S3
+        Get the SHA-256 of a file's content, read in chunks
+        """
+        return self.storage_handler._generate_content_hash(file)
+
+    def generate_case_id(self, user_id: str, content_hash: str) -> str:
+        """
+        Get the content-derived id a case of this file gets on upload
+        """
+        return self.storage_handler._generate_case_id(user_id, content_hash)
+
+    def upload_case_to_s3(
+        self, file: BinaryIO, user_id: str, case_id: str | None = None
+    ):
+        """
+        Upload a case to S3, streamed in chunks
         """
         # @TODO: add type checking
         try:
-            return self.storage_handler._upload_case_to_s3(file_data, user_id)
+            return self.storage_handler._upload_case_to_s3(file, user_id, case_id)
         except Exception as e:
             print(f"Error uploading case to S3: {e}")
             raise e
 
+    def get_staged_upload_key(self, user_id: str, upload_id: str) -> str:
+        """
+        Get the staging key of a direct upload
+        """
+        return self.storage_handler._get_staged_upload_key(user_id, upload_id)
+
+    def create_upload_url(self, user_id: str):
+        """
+        Create a presigned URL for a direct upload to the storage
+        """
+        try:
+            return self.storage_handler._create_upload_url(user_id)
+        except Exception as e:
+            print(f"Error creating upload URL: {e}")
+            raise e
+
+    def receive_local_upload(self, token: str, stream: BinaryIO):
+        """
+        Store a direct upload sent to the API (local storage backend)
+        """
+        try:
+            return self.storage_handler._receive_local_upload(token, stream)
+        except Exception as e:
+            print(f"Error receiving direct upload: {e}")
+            raise e
+
+    def download_staged_upload(self, staged_key: str, file: BinaryIO):
+        """
+        Download a direct upload into a file, in chunks
+        """
+        try:
+            return self.storage_handler._download_staged_upload(staged_key, file)
+        except Exception as e:
+            print(f"Error downloading staged upload: {e}")
+            raise e
+
+    def promote_staged_upload(self, staged_key: str, user_id: str, case_id: str):
+        """
+        Move a direct upload to the key of its case
+        """
+        try:
+            return self.storage_handler._promote_staged_upload(
+                staged_key, user_id, case_id
+            )
+        except Exception as e:
+            print(f"Error promoting staged upload: {e}")
+            raise e
+
+    def restore_staged_upload(self, s3_key: str, staged_key: str):
+        """
+        Move a promoted direct upload back to its staging key
+        """
+        try:
+            return self.storage_handler._restore_staged_upload(s3_key, staged_key)
+        except Exception as e:
+            print(f"Error restoring staged upload: {e}")
+            raise e
+
     def delete_case_from_s3(self, s3_key: str):
         """
         Delete a case from S3
@@ -1,9 +1,35 @@
 import pytest
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
-from backend.database.persistent.config import Base, get_db
-from backend.database.persistent.models import User
+from backend.database.persistent.config import get_db
+from backend.database.persistent.models import Base
+from redis.exceptions import RedisError
+from backend.database.cache.redis import get_redis
+from backend.database.persistent.instrumentation import QueryStats
+from backend.handler.database.prompt_registry import prompt_registry
+from backend.handler.database.user_cache import user_cache
+from backend.handler.database.query_cache import query_cache
+from backend.database.persistent.models import (
+    AnswerDiscussion,
+    CaseDiscussion,
+    User,
+    Case,
+    Prompt,
+    PromptCategory,
+    PromptSubCategory,
+    PromptType,
+    Question,
+    QuestionSet,
+)
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.handler.storage.file_converter import FileConverter
+from backend.handler.storage.storage_backend import LocalStorageBackend
+from backend.handler.storage.storage_handler import StorageHandler
+from backend.services.case_service import CaseService
+from backend.services.database_service import DatabaseService
+from backend.services.storage_service import StorageService
 from backend.api.main import app
 from backend.api.dependencies.auth import create_access_token
 from backend.utils.password_utils import hash_password
@@ -34,6 +60,9 @@ def test_db(test_engine):
     # Create tables
     Base.metadata.drop_all(bind=test_engine)  # Drop all tables first
     Base.metadata.create_all(bind=test_engine)
+    prompt_registry.invalidate()
+    user_cache.clear()
+    query_cache.clear()
 
     # Override the dependency
     def override_get_db():
@@ -111,10 +140,133 @@ def test_admin(test_db):
 @pytest.fixture
 def auth_headers(test_user):
     """Provide authentication headers for a test user"""
-    token = create_access_token({"sub": test_user.email, "user_id": test_user.id})
+    token = create_access_token(
+        {"sub": test_user.email, "user_id": test_user.id, "role": test_user.role.value}
+    )
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def test_case_with_questions(test_db, test_user):
+    """Create a case of the test user with one answered and one unanswered question"""
+    case = Case(
+        id="case_1",
+        filename="case.pdf",
+        storage_path="cases/users/test/case_1",
+        file_type="pdf",
+        file_size=100,
+        case_number=1,
+        case_metadata={},
+        content_text="Falltext",
+        user_id=test_user.id,
+    )
+    prompt = Prompt(
+        id="conflict_prompt",
+        type=PromptType.SIMPLE,
+        category=PromptCategory.CONFLICT,
+        sub_category=PromptSubCategory.OPD_CONFLICT,
+        content="Prompt",
+    )
+    test_db.add_all([case, prompt])
+    test_db.flush()
+    question_set = QuestionSet(case_id=case.id, prompt_id=prompt.id)
+    test_db.add(question_set)
+    test_db.flush()
+    answered = Question(
+        question="Beantwortete Frage?",
+        difficulty="leicht",
+        keywords=["a"],
+        llm_answer="Antwort",
+        is_answered=True,
+        question_set_id=question_set.id,
+    )
+    unanswered = Question(
+        question="Offene Frage?",
+        difficulty="mittel",
+        keywords=["b"],
+        llm_answer="Antwort",
+        question_set_id=question_set.id,
+    )
+    test_db.add_all([answered, unanswered])
+    test_db.commit()
+    return case, unanswered
+
+
+@pytest.fixture
+def test_answer_discussion(test_db, test_user, test_case_with_questions):
+    """Create a discussion of the test user about the unanswered question, without messages"""
+    case, unanswered = test_case_with_questions
+    case_discussion = CaseDiscussion(case_id=case.id, user_id=test_user.id)
+    test_db.add(case_discussion)
+    test_db.flush()
+    answer_discussion = AnswerDiscussion(
+        case_discussion_id=case_discussion.id, question_id=unanswered.id
+    )
+    test_db.add(answer_discussion)
+    test_db.commit()
+    return answer_discussion
+
+
+@pytest.fixture
+def local_case_service(test_db, tmp_path):
+    """
+    Case service on the test database, storing files below tmp_path and without LLM
+
+    Tests reach the storage through case_service.storage_service.storage_handler.backend
+    and replace llm_service or file_converter on the returned service as needed.
+    """
+    return CaseService(
+        StorageService(StorageHandler(LocalStorageBackend(tmp_path))),
+        None,
+        DatabaseService(DatabaseHandler(test_db)),
+        FileConverter(),
+    )
+
+
+@pytest.fixture
+def query_budget(test_engine):
+    """
+    Fail when the wrapped block issues more statements than declared
+
+    Usage:
+        with query_budget(5):
+            client.get("/chat/case_discussions", ...)
+    """
+
+    @contextmanager
+    def budget(max_queries: int):
+        stats = QueryStats()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            stats.record(statement, 0.0)
+
+        event.listen(test_engine, "after_cursor_execute", record)
+        try:
+            yield stats
+        finally:
+            event.remove(test_engine, "after_cursor_execute", record)
+
+        statements = "\n".join(
+            f"{count}x {statement}" for statement, count in stats.statements.items()
+        )
+        assert stats.count <= max_queries, (
+            f"{stats.count} queries exceed the budget of {max_queries}:\n{statements}"
+        )
+
+    return budget
+
+
+@pytest.fixture
+def redis_client():
+    """Redis client of the app, skips the test if Redis isn't reachable"""
+    client = get_redis()
+    try:
+        client.ping()
+    except RedisError:
+        pytest.skip("Redis is not available")
+    return client
+
+
 def pytest_configure(config):
     """Add custom markers"""
     config.addinivalue_line(
@@ -0,0 +1,100 @@
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+"""
+Generators of text documents for the extraction tests and benchmarks.
+
+Every page consists of numbered lines ("Seite 2, Zeile 1: ..."), so the extracted text
+shows which page and line it came from.
+"""
+
+LINES_PER_PAGE = 40
+
+
+def make_pdf(pages: int, lines_per_page: int = LINES_PER_PAGE) -> bytes:
+    """Build a PDF with one Helvetica text block per page, without extra dependencies"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, needs the page object numbers
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for page in range(pages):
+        lines = b" T* ".join(
+            f"(Seite {page + 1}, Zeile {line + 1}: Der Patient berichtet ueber "
+            f"Schlafstoerungen und Konflikte am Arbeitsplatz.) Tj".encode()
+            for line in range(lines_per_page)
+        )
+        content = b"BT /F1 9 Tf 12 TL 40 800 Td " + lines + b" ET"
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_numbers.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    pdf = BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(pdf.tell())
+        pdf.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = pdf.tell()
+    pdf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        pdf.write(b"%010d 00000 n \n" % offset)
+    pdf.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return pdf.getvalue()
+
+
+def _line(page: int, line: int) -> str:
+    return (
+        f"Seite {page + 1}, Zeile {line + 1}: Der Patient berichtet über "
+        f"Schlafstörungen und Konflikte am Arbeitsplatz."
+    )
+
+
+def make_txt(pages: int, lines_per_page: int = LINES_PER_PAGE) -> bytes:
+    """Plain text with form feeds between the pages"""
+    return "\f".join(
+        "\n".join(_line(page, line) for line in range(lines_per_page)) + "\n"
+        for page in range(pages)
+    ).encode()
+
+
+def make_docx(pages: int, lines_per_page: int = LINES_PER_PAGE) -> bytes:
+    """Minimal DOCX with one paragraph per line and manual page breaks"""
+    paragraphs = []
+    for page in range(pages):
+        if page:
+            paragraphs.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        paragraphs.extend(
+            f"<w:p><w:r><w:t>{escape(_line(page, line))}</w:t></w:r></w:p>"
+            for line in range(lines_per_page)
+        )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{''.join(paragraphs)}</w:body></w:document>"
+    )
+    docx = BytesIO()
+    with zipfile.ZipFile(docx, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>",
+        )
+        archive.writestr("word/document.xml", document)
+    return docx.getvalue()
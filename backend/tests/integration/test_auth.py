@@ -1,8 +1,15 @@
 import jwt
 import pytest
+import threading
 from backend.api.main import app
 from fastapi.testclient import TestClient
 from datetime import datetime, timezone, timedelta
+from backend.database.persistent.models import UserRole
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.services.database_service import DatabaseService
+from backend.utils import password_utils
+from backend.api.dependencies.auth import create_access_token, decode_token
+from jose import JWTError
 
 client = TestClient(app)
 
@@ -82,3 +89,125 @@ def test_token_expiration_matches_production(client, test_user):
         minutes=ACCESS_TOKEN_EXPIRE_MINUTES
     )
     assert (exp_time - created_time).total_seconds() == ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def test_me_is_served_from_user_cache(client, auth_headers, query_budget):
+    """Authentication needs no query once the user is cached"""
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    with query_budget(0):
+        response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
+
+
+def test_role_change_invalidates_token(client, test_db, test_user, auth_headers):
+    """A token issued for the old role is rejected after the role changed"""
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    DatabaseService(DatabaseHandler(test_db)).update_user(
+        test_user.id, {"role": UserRole.ADMIN}
+    )
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_role_change_in_another_worker_accepts_the_new_token(
+    client, test_db, test_user, auth_headers
+):
+    """A fresh token with the new role isn't rejected by a stale cache entry"""
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    # Changed by another worker, this worker's user cache still has the old role
+    test_user.role = UserRole.ADMIN
+    test_db.commit()
+
+    new_token = create_access_token(
+        {"sub": test_user.email, "user_id": test_user.id, "role": "admin"}
+    )
+    response = client.get(
+        "/auth/me", headers={"Authorization": f"Bearer {new_token}"}
+    )
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_login_returns_503_when_saturated(client, test_user, monkeypatch):
+    """Logins are shed instead of queued when the hashing pool is saturated"""
+    admission = threading.BoundedSemaphore(1)
+    admission.acquire()
+    monkeypatch.setattr(password_utils, "_admission", admission)
+
+    response = client.post(
+        "/auth/token",
+        data={"username": "test@example.com", "password": "testpassword"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def _login(client):
+    response = client.post(
+        "/auth/token",
+        data={"username": "test@example.com", "password": "testpassword"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_token_is_not_an_access_token(client, test_user):
+    """Refresh tokens can't authenticate requests and access tokens can't refresh"""
+    tokens = _login(client)
+    response = client.get(
+        "/auth/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["access_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_refresh_token_rotation(client, test_user, redis_client):
+    """A refresh token works once, reusing it revokes the whole family"""
+    tokens = _login(client)
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    rotated = response.json()
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_deleted_user_tokens_are_revoked(client, test_db, test_user, redis_client):
+    """Tokens of a deleted user stop working in every worker"""
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    DatabaseService(DatabaseHandler(test_db)).delete_user(test_user.id)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    # Rejected by the revocation itself, not only by the missing user: workers
+    # whose user cache still holds the user rely on it
+    with pytest.raises(JWTError):
+        decode_token(tokens["access_token"], "access")
+
+
+def test_logout_revokes_tokens(client, test_user, redis_client):
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = client.post(
+        "/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers
+    )
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,189 @@
+import asyncio
+import uuid
+from io import BytesIO
+import pytest
+from backend.api.dependencies.storage import get_storage_handler
+from backend.api.main import app
+from backend.database.persistent.models import Case, ExtractedDocument
+from backend.handler.session.processing_lock import ProcessingLockTimeoutError
+from backend.handler.storage.file_converter import FileConverter
+from backend.handler.storage.storage_backend import LocalStorageBackend
+from backend.handler.storage.storage_handler import StorageHandler
+from backend.tests.documents import make_pdf
+
+
+class CountingFileConverter(FileConverter):
+    def __init__(self):
+        self.extractions = 0
+
+    async def extract_pages_async(self, stream, filename, content_type=None):
+        self.extractions += 1
+        return await super().extract_pages_async(stream, filename, content_type)
+
+
+def test_uploads_of_the_same_content_are_extracted_once(
+    test_user, test_admin, local_case_service
+):
+    case_service = local_case_service
+    file_converter = case_service.file_converter = CountingFileConverter()
+    pdf = make_pdf(3, lines_per_page=1)
+
+    case, _ = asyncio.run(
+        case_service.upload_case(BytesIO(pdf), "fall.pdf", test_user.id)
+    )
+    assert file_converter.extractions == 1
+    assert case.page_offsets[0] == 0 and len(case.page_offsets) == 3
+    assert case.page_text(2).startswith("Seite 2, Zeile 1")
+    assert case.page_number_at(case.content_text.index("Seite 3")) == 3
+    assert case.case_metadata["upload_source"] == "api"
+    normalization = case.case_metadata["normalization"]
+    assert normalization["characters_after"] == len(case.content_text)
+
+    # Same bytes from another user: a new case, but no second parse
+    other_case, _ = asyncio.run(
+        case_service.upload_case(BytesIO(pdf), "kopie.pdf", test_admin.id)
+    )
+    assert other_case.id != case.id
+    assert other_case.content_text == case.content_text
+    assert other_case.page_offsets == case.page_offsets
+    assert file_converter.extractions == 1
+
+
+def test_extraction_cache_is_per_extractor_and_dropped_with_the_last_case(
+    test_db, test_user, test_admin, local_case_service
+):
+    case_service = local_case_service
+    file_converter = case_service.file_converter = CountingFileConverter()
+    database_service = case_service.database_service
+    pdf = make_pdf(2, lines_per_page=1)
+
+    # The same bytes as text first must not hand their pages to the PDF upload
+    text_case, _ = asyncio.run(
+        case_service.upload_case(BytesIO(pdf), "fall.txt", test_user.id)
+    )
+    pdf_case, _ = asyncio.run(
+        case_service.upload_case(BytesIO(pdf), "fall.pdf", test_admin.id)
+    )
+    assert file_converter.extractions == 2
+    assert pdf_case.content_text.startswith("Seite 1, Zeile 1")
+    assert test_db.query(ExtractedDocument).count() == 2
+
+    # Still referenced by the other user's case
+    database_service.delete_case_from_db(text_case.id)
+    assert test_db.query(ExtractedDocument).count() == 2
+
+    database_service.db_handler._delete_user(test_admin.id)
+    assert test_db.get(Case, pdf_case.id) is None
+    assert test_db.query(ExtractedDocument).count() == 0
+
+
+def test_staged_upload_is_kept_for_a_retry(test_user, local_case_service, monkeypatch):
+    case_service = local_case_service
+    backend = case_service.storage_service.storage_handler.backend
+    upload_id = str(uuid.uuid4())
+    staged_key = case_service.storage_service.get_staged_upload_key(
+        test_user.id, upload_id
+    )
+    backend.put(staged_key, make_pdf(1, lines_per_page=1))
+
+    async def still_processing(*args):
+        raise ProcessingLockTimeoutError("still being processed")
+
+    monkeypatch.setattr(
+        case_service, "process_case_async_and_store_case_and_qanda", still_processing
+    )
+    with pytest.raises(ProcessingLockTimeoutError):
+        asyncio.run(
+            case_service.process_staged_upload(upload_id, "fall.pdf", test_user.id)
+        )
+    assert backend.exists(staged_key)
+
+    async def rejected(*args):
+        raise ValueError("Datei ist leer")
+
+    monkeypatch.setattr(
+        case_service, "process_case_async_and_store_case_and_qanda", rejected
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(
+            case_service.process_staged_upload(upload_id, "fall.pdf", test_user.id)
+        )
+    assert not backend.exists(staged_key)
+
+
+class FailingLLMService:
+    case_text = None
+
+    async def generate_all_questions_and_answers_async(self, user_id):
+        raise RuntimeError("LLM nicht erreichbar")
+
+
+@pytest.mark.parametrize("failure", ["database", "llm"])
+def test_failed_processing_restores_the_staged_upload(
+    test_db, test_user, local_case_service, monkeypatch, failure
+):
+    case_service = local_case_service
+    case_service.llm_service = FailingLLMService()
+    backend = case_service.storage_service.storage_handler.backend
+    staged_key = case_service.storage_service.get_staged_upload_key(
+        test_user.id, str(uuid.uuid4())
+    )
+    pdf = make_pdf(1, lines_per_page=1)
+    backend.put(staged_key, pdf)
+    if failure == "database":
+
+        def create_case(*args):
+            raise RuntimeError("Datenbank nicht erreichbar")
+
+        monkeypatch.setattr(case_service.database_service, "create_case", create_case)
+
+    content_hash = case_service.storage_service.generate_content_hash(BytesIO(pdf))
+    case_id = case_service.storage_service.generate_case_id(test_user.id, content_hash)
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            case_service._process_case_and_store_case_and_qanda(
+                BytesIO(pdf),
+                "fall.pdf",
+                test_user.id,
+                1,
+                case_id,
+                content_hash,
+                staged_key,
+            )
+        )
+    # Moved back, a retry of the upload finds it again
+    assert backend.exists(staged_key)
+    assert not backend.exists(f"cases/users/{test_user.id}/{case_id}")
+    assert test_db.get(Case, case_id) is None
+
+
+def test_direct_upload_with_local_storage(
+    client, test_user, auth_headers, tmp_path, monkeypatch
+):
+    # The case service pulls in the LLM client, which requires an API key
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    backend = LocalStorageBackend(tmp_path)
+    app.dependency_overrides[get_storage_handler] = lambda: StorageHandler(backend)
+
+    response = client.post(
+        "/cases/upload_url", json={"filename": "fall.pdf"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    upload = response.json()
+    assert upload["method"] == "PUT"
+
+    # Authorized by the token in the URL, like a presigned URL
+    pdf = make_pdf(1, lines_per_page=1)
+    assert client.put(upload["url"], content=pdf).status_code == 200
+    staged_key = StorageHandler(backend)._get_staged_upload_key(
+        test_user.id, upload["upload_id"]
+    )
+    assert backend.get(staged_key) == pdf
+    assert client.put(upload["url"], content=pdf).status_code == 409
+    assert client.put(upload["url"] + "x", content=pdf).status_code == 400
+
+
+def test_page_helpers_without_page_offsets():
+    case = Case(content_text="Falltext")
+    assert case.page_number_at(3) is None
+    assert case.page_text(1) == "Falltext"
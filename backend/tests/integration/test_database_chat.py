@@ -0,0 +1,376 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from backend.database.persistent.models import (
+    AnswerDiscussion,
+    CaseDiscussion,
+    Message,
+    MessageRole,
+)
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.services.database_service import DatabaseService
+from backend.services.chat_service import ChatService
+from backend.handler.session.chat_history_cache import (
+    ChatHistoryCache,
+    chat_history_cache,
+)
+
+
+def test_random_unanswered_question_skips_answered(test_db, test_case_with_questions):
+    case, unanswered = test_case_with_questions
+    db_handler = DatabaseHandler(test_db)
+
+    for _ in range(5):
+        question = db_handler._get_random_unanswered_question(case.id)
+        assert question.id == unanswered.id
+
+
+def test_random_unanswered_question_by_topic(test_db, test_case_with_questions):
+    case, unanswered = test_case_with_questions
+    db_handler = DatabaseHandler(test_db)
+
+    question = db_handler._get_random_unanswered_question(case.id, "opd_conflict")
+    assert question.id == unanswered.id
+    assert db_handler._get_random_unanswered_question(case.id, "structure") is None
+
+
+def test_messages_keyset_pagination(test_db, test_answer_discussion):
+    answer_discussion = test_answer_discussion
+    created_at = datetime(2025, 1, 1)
+    test_db.add_all(
+        Message(
+            role=MessageRole.USER,
+            content=f"Nachricht {i}",
+            answer_discussion_id=answer_discussion.id,
+            created_at=created_at,  # identical timestamps are ordered by id
+        )
+        for i in range(5)
+    )
+    test_db.commit()
+    db_service = DatabaseService(DatabaseHandler(test_db))
+
+    pages = []
+    cursor = None
+    while True:
+        messages, cursor = db_service.get_messages_page_by_answer_discussion_id(
+            answer_discussion.id, page_size=2, cursor=cursor
+        )
+        pages.append([m.content for m in messages])
+        if cursor is None:
+            break
+
+    assert pages == [
+        ["Nachricht 3", "Nachricht 4"],
+        ["Nachricht 1", "Nachricht 2"],
+        ["Nachricht 0"],
+    ]
+
+
+def test_latest_messages_by_answer_discussion_ids(test_db, test_answer_discussion):
+    answer_discussions = [
+        test_answer_discussion,
+        AnswerDiscussion(
+            case_discussion_id=test_answer_discussion.case_discussion_id,
+            question_id=test_answer_discussion.question_id,
+        ),
+    ]
+    test_db.add(answer_discussions[1])
+    test_db.flush()
+    for answer_discussion in answer_discussions:
+        for i in range(3):
+            test_db.add(
+                Message(
+                    role=MessageRole.USER,
+                    content=f"{answer_discussion.id}-{i}",
+                    answer_discussion_id=answer_discussion.id,
+                )
+            )
+    test_db.commit()
+
+    latest = DatabaseHandler(test_db)._get_latest_messages_by_answer_discussion_ids(
+        [answer_discussion.id for answer_discussion in answer_discussions]
+    )
+    assert {key: message.content for key, message in latest.items()} == {
+        answer_discussion.id: f"{answer_discussion.id}-2"
+        for answer_discussion in answer_discussions
+    }
+
+
+def test_idle_messages_are_archived_and_read_back(test_db, test_answer_discussion):
+    answer_discussion = test_answer_discussion
+    test_db.add_all(
+        Message(
+            role=MessageRole.USER,
+            content=f"Nachricht {i}",
+            answer_discussion_id=answer_discussion.id,
+            created_at=datetime(2025, 1, 1, 12, i),
+        )
+        for i in range(3)
+    )
+    test_db.commit()
+    answer_discussion_id = answer_discussion.id
+    db_service = DatabaseService(DatabaseHandler(test_db))
+
+    assert db_service.archive_idle_messages(idle_days=30) == (1, 3)
+    assert test_db.query(Message).count() == 0
+    assert db_service.archive_idle_messages(idle_days=30) == (0, 0)
+
+    # New messages stay hot, reads merge them with the archive
+    test_db.add(
+        Message(
+            role=MessageRole.ASSISTANT,
+            content="Nachricht 3",
+            answer_discussion_id=answer_discussion_id,
+        )
+    )
+    test_db.commit()
+    messages = db_service.get_messages_by_answer_discussion_id(answer_discussion_id)
+    assert [m.content for m in messages] == [f"Nachricht {i}" for i in range(4)]
+
+    pages = []
+    cursor = None
+    while True:
+        messages, cursor = db_service.get_messages_page_by_answer_discussion_id(
+            answer_discussion_id, page_size=2, cursor=cursor
+        )
+        pages.append([m.content for m in messages])
+        if cursor is None:
+            break
+    assert pages == [["Nachricht 2", "Nachricht 3"], ["Nachricht 0", "Nachricht 1"]]
+
+    # Archiving again appends to the existing archive
+    assert db_service.archive_idle_messages(idle_days=-1) == (1, 1)
+    latest = db_service.get_latest_messages_by_answer_discussion_ids(
+        [answer_discussion_id]
+    )
+    assert latest[answer_discussion_id].content == "Nachricht 3"
+    assert (
+        len(db_service.get_messages_by_answer_discussion_id(answer_discussion_id)) == 4
+    )
+
+
+def test_discussion_active_again_is_not_archived(test_db, test_answer_discussion):
+    answer_discussion = test_answer_discussion
+    test_db.add(
+        Message(
+            role=MessageRole.USER,
+            content="Alte Nachricht",
+            answer_discussion_id=answer_discussion.id,
+            created_at=datetime(2025, 1, 1, 12),
+        )
+    )
+    test_db.commit()
+    answer_discussion_id = answer_discussion.id
+    db_handler = DatabaseHandler(test_db)
+    idle_before = datetime(2025, 2, 1)
+    assert db_handler._get_idle_answer_discussion_ids(idle_before, 10) == [
+        answer_discussion_id
+    ]
+
+    # Posted after the discussion was found idle
+    test_db.add(
+        Message(
+            role=MessageRole.USER,
+            content="Neue Nachricht",
+            answer_discussion_id=answer_discussion_id,
+        )
+    )
+    test_db.commit()
+    assert db_handler._archive_messages(answer_discussion_id, idle_before) == 0
+    assert test_db.query(Message).count() == 2
+
+
+class FakeLLMService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.histories = []
+
+    async def generate_response(self, message, chat_history=None):
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        self.histories.append([m.content for m in chat_history])
+        return "Eine ausführliche Antwort des Prüfers."
+
+
+def test_start_case_discussion_is_one_unit_of_work(
+    test_db, test_user, test_case_with_questions
+):
+    case, unanswered = test_case_with_questions
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    chat_service = ChatService(db_service, FakeLLMService())
+
+    commits = []
+    event.listen(test_db, "after_commit", lambda session: commits.append(session))
+    result = asyncio.run(chat_service.start_case_discussion(test_user.id, case.id))
+    assert len(commits) == 1
+    assert result["initial_message"] == unanswered.question
+
+    # No question left for the topic: nothing may be left half-created
+    with pytest.raises(ValueError):
+        asyncio.run(
+            chat_service.start_case_discussion(test_user.id, case.id, "structure")
+        )
+    assert test_db.query(CaseDiscussion).count() == 1
+
+
+def test_failed_operation_fails_the_whole_unit_of_work(
+    test_db, test_user, test_case_with_questions
+):
+    case, _ = test_case_with_questions
+    db_handler = DatabaseHandler(test_db)
+
+    # A caller swallowing the error of one step can't commit the other steps
+    with pytest.raises(SQLAlchemyError):
+        with db_handler._transaction():
+            db_handler._create_case_discussion(
+                CaseDiscussion(case_id=case.id, user_id=test_user.id)
+            )
+            try:
+                db_handler._create_case_discussion(
+                    CaseDiscussion(case_id=case.id, user_id=None)
+                )
+            except SQLAlchemyError:
+                pass
+    assert test_db.query(CaseDiscussion).count() == 0
+
+
+def test_add_user_message_stores_both_messages_after_response(
+    test_db, test_user, test_case_with_questions
+):
+    case, _ = test_case_with_questions
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    llm_service = FakeLLMService()
+    started = asyncio.run(
+        ChatService(db_service, llm_service).start_case_discussion(
+            test_user.id, case.id
+        )
+    )
+    answer_discussion_id = started["answer_discussion_id"]
+
+    asyncio.run(
+        ChatService(db_service, llm_service).add_user_message(
+            "Meine Antwort", answer_discussion_id
+        )
+    )
+    assert llm_service.histories == [["Offene Frage?", "Meine Antwort"]]
+    messages = db_service.get_messages_by_answer_discussion_id(answer_discussion_id)
+    assert [m.role for m in messages] == [
+        MessageRole.ASSISTANT,
+        MessageRole.USER,
+        MessageRole.ASSISTANT,
+    ]
+
+    # A failing LLM call leaves no orphaned user message
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            ChatService(db_service, FakeLLMService(fail=True)).add_user_message(
+                "Noch eine Antwort", answer_discussion_id
+            )
+        )
+    assert (
+        len(db_service.get_messages_by_answer_discussion_id(answer_discussion_id)) == 3
+    )
+
+
+def test_case_discussions_query_budget(
+    client,
+    test_db,
+    test_user,
+    test_case_with_questions,
+    auth_headers,
+    query_budget,
+    monkeypatch,
+):
+    # The chat service pulls in the LLM client, which requires an API key
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    case, _ = test_case_with_questions
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    for _ in range(3):
+        asyncio.run(
+            ChatService(db_service, FakeLLMService()).start_case_discussion(
+                test_user.id, case.id
+            )
+        )
+
+    case_id = case.id
+
+    # Independent of the number of discussions: user, discussions with their
+    # answer discussions, and the latest messages
+    with query_budget(4) as stats:
+        response = client.get(
+            "/chat/case_discussions", params={"case_id": case_id}, headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert len(response.json()["discussions"]) == 3
+    assert response.headers["X-DB-Query-Count"] == str(stats.count)
+
+
+def test_chat_history_cache_is_written_through(
+    test_db, test_user, test_case_with_questions, redis_client, query_budget
+):
+    case, _ = test_case_with_questions
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    llm_service = FakeLLMService()
+    answer_discussion_id = asyncio.run(
+        ChatService(db_service, llm_service).start_case_discussion(
+            test_user.id, case.id
+        )
+    )["answer_discussion_id"]
+    chat_history_cache.invalidate(answer_discussion_id)
+
+    # Miss: loaded from the database and cached
+    assert [
+        m.content for m in db_service.get_recent_messages(answer_discussion_id)
+    ] == ["Offene Frage?"]
+    asyncio.run(
+        ChatService(db_service, llm_service).add_user_message(
+            "Meine Antwort", answer_discussion_id
+        )
+    )
+
+    # Hit: the new messages were written through, no query needed
+    with query_budget(0):
+        messages = db_service.get_recent_messages(answer_discussion_id)
+    assert [m.content for m in messages] == [
+        "Offene Frage?",
+        "Meine Antwort",
+        "Eine ausführliche Antwort des Prüfers.",
+    ]
+
+    # Messages of a rolled back unit of work never reach the cache
+    with pytest.raises(RuntimeError):
+        with db_service.transaction():
+            db_service.create_chat_message(
+                MessageRole.USER, "Verworfen", answer_discussion_id
+            )
+            raise RuntimeError("rollback")
+    assert len(db_service.get_recent_messages(answer_discussion_id)) == 3
+    chat_history_cache.invalidate(answer_discussion_id)
+
+
+def test_chat_history_fill_is_dropped_after_concurrent_append(redis_client):
+    cache = ChatHistoryCache(redis_client)
+    answer_discussion_id = 10**9
+    cache.invalidate(answer_discussion_id)
+
+    def message(i):
+        return Message(
+            id=i,
+            role=MessageRole.USER,
+            content=f"Nachricht {i}",
+            created_at=datetime(2025, 1, 1, 12, i),
+            answer_discussion_id=answer_discussion_id,
+        )
+
+    # A message commits while the snapshot is loaded, its append finds no list
+    version = cache.version(answer_discussion_id)
+    cache.append(message(2))
+    cache.fill(answer_discussion_id, [message(1)], version)
+    assert cache.get(answer_discussion_id) is None
+
+    version = cache.version(answer_discussion_id)
+    cache.fill(answer_discussion_id, [message(1), message(2)], version)
+    assert [m.id for m in cache.get(answer_discussion_id)] == [1, 2]
+    cache.invalidate(answer_discussion_id)
@@ -0,0 +1,122 @@
+from sqlalchemy import event
+from backend.database.persistent.models import CaseStatus, PromptType
+from backend.handler.database.query_cache import query_cache
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.services.database_service import DatabaseService
+
+
+def test_questions_by_keyword(
+    client, test_case_with_questions, auth_headers, monkeypatch
+):
+    # The case service pulls in the LLM client, which requires an API key
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    _, unanswered = test_case_with_questions
+    response = client.get(
+        "/cases/questions_by_keyword", params={"keyword": "b"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [q["id"] for q in response.json()] == [unanswered.id]
+    assert response.json()[0]["keywords"] == ["b"]
+
+    response = client.get(
+        "/cases/questions_by_keyword", params={"keyword": "c"}, headers=auth_headers
+    )
+    assert response.json() == []
+
+
+def test_prompt_registry_serves_lookups_from_memory(
+    test_db, test_case_with_questions, query_budget
+):
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    assert db_service.get_prompt_by_id("conflict_prompt").type == PromptType.SIMPLE
+
+    with query_budget(0):
+        assert db_service.get_prompt_by_id("conflict_prompt").content
+        assert db_service.get_all_prompts_by_type_negative(PromptType.INSTRUCTION)
+
+    db_service.create_prompt(
+        {
+            "id": "instruction_prompt",
+            "type": PromptType.INSTRUCTION,
+            "content": "Antworte auf Deutsch.",
+        }
+    )
+    assert db_service.get_prompt_by_id("instruction_prompt") is not None
+
+    db_service.update_prompt("conflict_prompt", {"content": "Neuer Inhalt"})
+    prompt = db_service.get_prompt_by_id("conflict_prompt")
+    assert prompt.content == "Neuer Inhalt"
+    assert prompt.version == 2
+
+
+def test_case_reads_are_cached_until_written(
+    test_db, test_case_with_questions, query_budget
+):
+    case, unanswered = test_case_with_questions
+    case_id, user_id, question_id = case.id, case.user_id, unanswered.id
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    assert db_service.get_case_by_id(case_id).status == CaseStatus.UPLOADED
+    assert len(db_service.get_all_cases_for_user(user_id)) == 1
+    assert db_service.get_question_by_id(question_id).keywords == ["b"]
+
+    with query_budget(0):
+        cached_case = db_service.get_case_by_id(case_id)
+        cases = db_service.get_all_cases_for_user(user_id)
+        question = db_service.get_question_by_id(question_id)
+    assert cached_case.status == CaseStatus.UPLOADED
+    assert cached_case.upload_date == case.upload_date
+    # The case text is never cached
+    assert cached_case.content_text is None
+    assert [c.id for c in cases] == [case_id]
+    assert question.question == "Offene Frage?"
+
+    # Inside a unit of work reads bypass the cache and see its own writes
+    with db_service.transaction():
+        db_service.update_case_status(case_id, CaseStatus.PROCESSING)
+        assert db_service.get_case_by_id(case_id).status == CaseStatus.PROCESSING
+
+    # Writes invalidate the cached reads once committed
+    db_service.update_case_status(case_id, CaseStatus.COMPLETED)
+    assert db_service.get_case_by_id(case_id).status == CaseStatus.COMPLETED
+    assert db_service.get_all_cases_for_user(user_id)[0].status == (
+        CaseStatus.COMPLETED
+    )
+
+    db_service.delete_case_from_db(case_id)
+    assert db_service.get_case_by_id(case_id) is None
+    assert db_service.get_all_cases_for_user(user_id) == []
+    assert query_cache.stats()["_get_case_by_id"]["l1_hits"] == 1
+
+
+def test_reads_racing_a_write_are_not_cached(test_db, test_case_with_questions):
+    case, _ = test_case_with_questions
+    case_id, user_id = case.id, case.user_id
+    db_service = DatabaseService(DatabaseHandler(test_db))
+
+    # Another worker commits a write while the read runs its query
+    pending_writes = []
+
+    def concurrent_write(orm_execute_state):
+        if pending_writes:
+            query_cache.invalidate(pending_writes.pop())
+
+    event.listen(test_db, "do_orm_execute", concurrent_write)
+    pending_writes.append([f"case:{case_id}"])
+    db_service.get_case_by_id(case_id)
+    pending_writes.append([f"user_cases:{user_id}"])
+    db_service.get_all_cases_for_user(user_id)
+
+    db_service.get_case_by_id(case_id)
+    db_service.get_all_cases_for_user(user_id)
+    stats = query_cache.stats()
+    assert stats["_get_case_by_id"]["misses"] == 2
+    assert stats["_get_all_cases_for_user"]["misses"] == 2
+
+
+def test_replica_reads_are_not_cached(test_db, test_case_with_questions):
+    case, _ = test_case_with_questions
+    test_db.info["replica"] = True
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    assert db_service.get_case_by_id(case.id).status == CaseStatus.UPLOADED
+    assert db_service.get_case_by_id(case.id).status == CaseStatus.UPLOADED
+    assert query_cache.stats()["_get_case_by_id"]["misses"] == 2
@@ -22,8 +22,48 @@ def test_create_user(client, test_db):
     assert "password" not in response.json()
 
 
+def test_update_user(client, test_user, auth_headers):
+    response = client.put(
+        f"/users/{test_user.id}",
+        json={"first_name": "Neuer"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Neuer"
+
+    response = client.put(
+        f"/users/{test_user.id}",
+        json={"password": "Neues12345", "current_password": "falsch"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 401
+
+
 def test_delete_user(client, test_user, auth_headers):
     user_id = test_user.id
     response = client.delete(f"/users/{user_id}", headers=auth_headers)
     assert response.status_code == 200
     assert response.json() == "User deleted successfully"
+
+
+def test_list_users_pagination(client, test_user, test_admin):
+    response = client.get("/users/", params={"page_size": 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 1
+    assert first_page["next_cursor"]
+    assert "password_hash" not in first_page["items"][0]
+
+    response = client.get(
+        "/users/", params={"page_size": 1, "cursor": first_page["next_cursor"]}
+    )
+    second_page = response.json()
+    assert len(second_page["items"]) == 1
+    assert second_page["next_cursor"] is None
+    assert {first_page["items"][0]["id"], second_page["items"][0]["id"]} == {
+        test_user.id,
+        test_admin.id,
+    }
+
+    response = client.get("/users/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,110 @@
+from sqlalchemy import text
+from backend.database.persistent.models import Message, MessageRole
+from backend.handler.database.database_handler import DatabaseHandler
+from backend.services.database_service import DatabaseService
+
+
+def test_search_questions_answers_and_messages(
+    client, test_db, test_case_with_questions, test_answer_discussion, auth_headers
+):
+    _, unanswered = test_case_with_questions
+    answer_discussion = test_answer_discussion
+    unanswered.llm_answer = "Die Patientin zeigt vor allem Abwehrmechanismen wie Projektion."
+    message = Message(
+        role=MessageRole.USER,
+        content="Ich denke, die Abwehr läuft über Verdrängung.",
+        answer_discussion_id=answer_discussion.id,
+    )
+    test_db.add(message)
+    test_db.commit()
+
+    response = client.get("/search/", params={"q": "Abwehr"}, headers=auth_headers)
+    assert response.status_code == 200
+    hits = {(hit["kind"], hit["id"]) for hit in response.json()["results"]}
+    assert hits == {("question", unanswered.id), ("message", message.id)}
+
+    response = client.get(
+        "/search/", params={"q": "Verdrängung", "page_size": 1}, headers=auth_headers
+    )
+    body = response.json()
+    assert [hit["id"] for hit in body["results"]] == [message.id]
+    assert body["results"][0]["answer_discussion_id"] == answer_discussion.id
+    assert body["has_more"] is False
+
+
+def test_search_is_scoped_to_user(client, test_case_with_questions, test_admin):
+    from backend.api.dependencies.auth import create_access_token
+
+    token = create_access_token({"sub": test_admin.email, "user_id": test_admin.id})
+    response = client.get(
+        "/search/",
+        params={"q": "Offene"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+def test_edited_message_is_reindexed(
+    client, test_db, test_answer_discussion, auth_headers
+):
+    answer_discussion = test_answer_discussion
+    message = Message(
+        role=MessageRole.USER,
+        content="Ich denke an Verdrängung.",
+        answer_discussion_id=answer_discussion.id,
+    )
+    test_db.add(message)
+    test_db.commit()
+
+    message.content = "Ich denke an Projektion."
+    test_db.commit()
+
+    response = client.get("/search/", params={"q": "Verdrängung"}, headers=auth_headers)
+    assert response.json()["results"] == []
+    response = client.get("/search/", params={"q": "Projektion"}, headers=auth_headers)
+    assert [hit["id"] for hit in response.json()["results"]] == [message.id]
+
+
+def test_archived_messages_stay_searchable(
+    client, test_db, test_answer_discussion, auth_headers
+):
+    answer_discussion = test_answer_discussion
+    message = Message(
+        role=MessageRole.USER,
+        content="Ich denke, die Abwehr läuft über Verdrängung.",
+        answer_discussion_id=answer_discussion.id,
+    )
+    test_db.add(message)
+    test_db.commit()
+    message_id = message.id
+
+    db_service = DatabaseService(DatabaseHandler(test_db))
+    assert db_service.archive_idle_messages(idle_days=-1) == (1, 1)
+
+    response = client.get("/search/", params={"q": "Verdrängung"}, headers=auth_headers)
+    [hit] = response.json()["results"]
+    assert hit["id"] == message_id
+    assert hit["answer_discussion_id"] == answer_discussion.id
+    assert "[Verdrängung.]" in hit["snippet"]
+
+    # Ids of archived messages aren't reused
+    new_message = Message(
+        role=MessageRole.USER,
+        content="Neue Nachricht",
+        answer_discussion_id=answer_discussion.id,
+    )
+    test_db.add(new_message)
+    test_db.commit()
+    assert new_message.id > message_id
+
+    # Deleting the discussion removes the archived content from the index
+    test_db.delete(answer_discussion.case_discussion)
+    test_db.commit()
+    indexed = test_db.execute(
+        text(
+            "SELECT count(*) FROM archived_messages_fts "
+            "WHERE archived_messages_fts MATCH 'Verdrängung'"
+        )
+    ).scalar()
+    assert indexed == 0
@@ -0,0 +1,34 @@
+import pytest
+import zstandard
+from backend.database.persistent.compression import ZSTD_MAGIC, ZstdCodec
+
+
+@pytest.fixture
+def codec():
+    return ZstdCodec(threshold=100, dictionary_dir="", dictionary_name=None)
+
+
+def test_short_values_stay_raw(codec):
+    encoded = codec.encode("Kurze Antwort")
+    assert encoded == "Kurze Antwort".encode("utf-8")
+    assert codec.decode(encoded) == "Kurze Antwort"
+
+
+def test_long_values_are_compressed(codec):
+    value = "Die Patientin zeigt Abwehrmechanismen wie Verdrängung. " * 50
+    encoded = codec.encode(value)
+    assert encoded.startswith(ZSTD_MAGIC)
+    assert len(encoded) < len(value)
+    assert codec.decode(encoded) == value
+
+
+def test_legacy_text_values_are_readable(codec):
+    assert codec.decode("Übertragung") == "Übertragung"
+
+
+def test_unknown_dictionary_raises(codec):
+    samples = [f"Sitzung {i}: Gegenübertragung und Widerstand".encode() * 20 for i in range(200)]
+    dictionary = zstandard.train_dictionary(4096, samples)
+    encoded = zstandard.ZstdCompressor(dict_data=dictionary).compress(samples[0])
+    with pytest.raises(ValueError):
+        codec.decode(encoded)
@@ -0,0 +1,68 @@
+import asyncio
+from io import BytesIO
+import pytest
+from backend.handler.storage import extractors
+from backend.handler.storage.extractors import (
+    DocxExtractor,
+    PdfExtractor,
+    TxtExtractor,
+    get_extractor,
+)
+from backend.handler.storage.file_converter import FileConverter
+from backend.tests.documents import make_docx, make_pdf
+
+
+def test_pooled_extraction_matches_sequential(monkeypatch, tmp_path):
+    monkeypatch.setattr(extractors, "PDF_EXTRACTION_PAGES_PER_TASK", 4)
+    path = tmp_path / "fall.pdf"
+    path.write_bytes(make_pdf(10, lines_per_page=2))
+    stream = BytesIO(path.read_bytes())
+
+    extracted = asyncio.run(FileConverter().extract_pages_async(stream, "fall.pdf"))
+    assert stream.tell() == 0
+    assert extracted.pages == PdfExtractor().extract_pages(str(path))
+    assert extracted.text.index("Seite 1, Zeile 1") < extracted.text.index(
+        "Seite 10, Zeile 2"
+    )
+
+
+def test_pooled_extraction_rejects_invalid_pdf():
+    with pytest.raises(ValueError):
+        asyncio.run(FileConverter().extract_pages_async(BytesIO(b"kein PDF"), "x.pdf"))
+
+
+def test_extractors_are_looked_up_by_extension_and_mime_type():
+    assert isinstance(get_extractor("Fall.DOCX"), DocxExtractor)
+    assert isinstance(get_extractor("fall", "text/plain"), TxtExtractor)
+    with pytest.raises(ValueError):
+        get_extractor("fall.odt")
+
+
+def test_docx_pages_are_split_at_page_breaks(tmp_path):
+    path = tmp_path / "fall.docx"
+    path.write_bytes(make_docx(3, lines_per_page=2))
+    pages = DocxExtractor().extract_pages(str(path))
+    assert len(pages) == 3
+    assert pages[1].startswith("Seite 2, Zeile 1: Der Patient berichtet über")
+    assert "Seite 3" not in pages[1]
+
+
+def test_txt_is_decoded_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(extractors, "TEXT_CHUNK_SIZE", 7)
+    path = tmp_path / "fall.txt"
+    path.write_bytes("Schlafstörungen\fÄngste".encode())
+    assert TxtExtractor().extract_pages(str(path)) == ["Schlafstörungen", "Ängste"]
+
+    # Not valid UTF-8: Windows-1252
+    path.write_bytes("Ängste".encode("cp1252"))
+    assert TxtExtractor().extract_pages(str(path)) == ["Ängste"]
+
+
+def test_pooled_extraction_of_docx():
+    extracted = asyncio.run(
+        FileConverter().extract_pages_async(
+            BytesIO(make_docx(2, lines_per_page=1)), "fall.docx"
+        )
+    )
+    assert len(extracted.pages) == 2
+    assert extracted.page_offsets[1] == len(extracted.pages[0])
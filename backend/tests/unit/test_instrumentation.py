@@ -0,0 +1,14 @@
+import logging
+from sqlalchemy import create_engine, text
+from backend.database.persistent import instrumentation
+
+
+def test_slow_query_log_leaves_out_parameters(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_THRESHOLD_MS", 0)
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_LOG_PARAMETERS", False)
+    engine = create_engine("sqlite://")
+    with caplog.at_level(logging.WARNING, logger="papi.sql"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :content"), {"content": "Falltext"})
+    assert "SELECT ?" in caplog.text
+    assert "Falltext" not in caplog.text
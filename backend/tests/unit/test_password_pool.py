@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import pytest
+from backend.utils import password_utils
+from backend.utils.password_utils import (
+    PasswordHasherBusyError,
+    hash_password_async,
+    verify_password_async,
+)
+
+
+def test_hash_and_verify_in_pool():
+    async def run():
+        password_hash = await hash_password_async("geheim123")
+        return (
+            await verify_password_async("geheim123", password_hash),
+            await verify_password_async("falsch", password_hash),
+        )
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_saturated_pool_rejects_work(monkeypatch):
+    monkeypatch.setattr(password_utils, "_admission", threading.BoundedSemaphore(1))
+    release = threading.Event()
+
+    async def run():
+        blocked = asyncio.ensure_future(password_utils._run_in_pool(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusyError):
+            await hash_password_async("geheim123")
+        release.set()
+        await blocked
+        # The slot is free again once the running hash finished
+        return await hash_password_async("geheim123")
+
+    assert asyncio.run(run()).startswith("$argon2")
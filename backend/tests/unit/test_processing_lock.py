@@ -0,0 +1,82 @@
+import asyncio
+from io import BytesIO
+import pytest
+from backend.database.persistent.models import CaseStatus
+from backend.handler.session.processing_lock import (
+    ProcessingLock,
+    ProcessingLockTimeoutError,
+)
+
+
+def test_lock_serializes_jobs_of_the_same_key():
+    lock = ProcessingLock(timeout=5, wait=5)
+    events = []
+
+    async def job(name):
+        async with lock.hold("case_1") as waited:
+            events.append((name, "start", waited))
+            await asyncio.sleep(0.05)
+            events.append((name, "end", waited))
+
+    async def run():
+        await asyncio.gather(job("first"), job("second"))
+
+    asyncio.run(run())
+    assert events == [
+        ("first", "start", False),
+        ("first", "end", False),
+        ("second", "start", True),
+        ("second", "end", True),
+    ]
+
+
+def test_lock_gives_up_waiting():
+    lock = ProcessingLock(timeout=5, wait=0.1)
+
+    async def run():
+        async with lock.hold("case_1"):
+            with pytest.raises(ProcessingLockTimeoutError):
+                async with lock.hold("case_1"):
+                    pass
+
+    asyncio.run(run())
+
+
+class FakeDatabaseService:
+    def __init__(self):
+        self.cases = {}
+
+    def get_case_by_id(self, case_id):
+        return self.cases.get(case_id)
+
+
+def test_duplicate_upload_attaches_to_in_flight_job(local_case_service, monkeypatch):
+    case_service = local_case_service
+    database_service = case_service.database_service = FakeDatabaseService()
+    processed = []
+
+    async def process(
+        file, filename, user_id, case_number, case_id, content_hash, staged_key
+    ):
+        await asyncio.sleep(0.05)
+        database_service.cases[case_id] = type(
+            "Case", (), {"status": CaseStatus.COMPLETED}
+        )
+        processed.append(filename)
+        return database_service.cases[case_id]
+
+    monkeypatch.setattr(case_service, "_process_case_and_store_case_and_qanda", process)
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                case_service.process_case_async_and_store_case_and_qanda(
+                    BytesIO(b"%PDF"), f"case_{i}.pdf", "user_1"
+                )
+                for i in range(3)
+            )
+        )
+
+    results = asyncio.run(run())
+    assert processed == ["case_0.pdf"]
+    assert results[1:] == [None, None]
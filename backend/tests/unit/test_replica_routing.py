@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from backend.database.persistent.config import (
+    SessionRouter,
+    create_replica_sessionmaker,
+)
+from backend.database.persistent.models import Base, Prompt, PromptType
+
+
+@pytest.fixture
+def router(tmp_path):
+    primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    Base.metadata.create_all(primary_engine)
+    primary = sessionmaker(bind=primary_engine)
+
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    Base.metadata.create_all(create_engine(replica_url))
+    replica = create_replica_sessionmaker(replica_url)
+    return SessionRouter(primary, [replica], stickiness_seconds=60)
+
+
+def _database_file(session):
+    return session.execute(text("PRAGMA database_list")).all()[0][2]
+
+
+def test_reads_go_to_replica_and_writes_to_primary(router):
+    assert _database_file(router.session_for("GET", "client")).endswith("replica.db")
+    assert _database_file(router.session_for("POST", "client")).endswith("primary.db")
+
+
+def test_reads_stick_to_primary_after_own_write(router):
+    router.mark_write("client")
+    assert _database_file(router.session_for("GET", "client")).endswith("primary.db")
+    assert _database_file(router.session_for("GET", "other")).endswith("replica.db")
+
+
+def test_replica_sessions_are_read_only(router):
+    session = router.session_for("GET", "client")
+    assert session.info["replica"]
+    session.add(Prompt(id="p", type=PromptType.SIMPLE, content="x"))
+    with pytest.raises(RuntimeError):
+        session.commit()
+
+
+def test_falls_back_to_primary_without_replicas():
+    primary = sessionmaker(bind=create_engine("sqlite://"))
+    router = SessionRouter(primary, [])
+    assert router.session_for("GET", "client").get_bind() is primary.kw["bind"]
@@ -0,0 +1,55 @@
+import asyncio
+import uuid
+import pytest
+from redis.exceptions import RedisError
+from backend.database.cache.redis import get_async_redis
+from backend.handler.session.session_manager import SessionManager
+
+
+async def _session_manager():
+    client = get_async_redis()
+    try:
+        await client.ping()
+    except RedisError:
+        pytest.skip("Redis is not available")
+    return SessionManager(client)
+
+
+def test_session_roundtrip_and_sliding_expiry():
+    async def run():
+        session_manager = await _session_manager()
+        user_id = str(uuid.uuid4())
+        assert await session_manager.get_session(user_id) is None
+
+        session = await session_manager.get_or_create_session(user_id)
+        session.messages.append({"role": "user", "content": "Grüß Gott"})
+        await session_manager.update_session(session)
+
+        key = session_manager._session_key(user_id)
+        await session_manager.redis_client.expire(key, 5)
+        loaded = await session_manager.get_session(user_id)
+        assert loaded.id == session.id
+        assert loaded.messages == [{"role": "user", "content": "Grüß Gott"}]
+        assert await session_manager.redis_client.ttl(key) > 5
+
+        await session_manager.delete_session(user_id)
+        assert await session_manager.get_session(user_id) is None
+
+    asyncio.run(run())
+
+
+def test_update_recreates_expired_session():
+    async def run():
+        session_manager = await _session_manager()
+        user_id = str(uuid.uuid4())
+        session = await session_manager.create_session(user_id)
+        await session_manager.delete_session(user_id)
+
+        session.messages.append({"role": "assistant", "content": "Hallo"})
+        await session_manager.update_session(session)
+        loaded = await session_manager.get_session(user_id)
+        assert loaded.id == session.id
+        assert loaded.messages == session.messages
+        await session_manager.delete_session(user_id)
+
+    asyncio.run(run())
@@ -0,0 +1,183 @@
+import base64
+import hashlib
+import json
+import uuid
+from io import BytesIO
+import pytest
+from botocore.stub import Stubber
+from backend.handler.storage.storage_backend import (
+    LocalStorageBackend,
+    S3StorageBackend,
+)
+from backend.handler.storage.storage_handler import HASH_CHUNK_SIZE, StorageHandler
+
+
+def test_local_backend_roundtrip(tmp_path):
+    backend = LocalStorageBackend(tmp_path)
+    backend.put("cases/users/u1/c1", b"%PDF-1.7")
+    assert backend.exists("cases/users/u1/c1")
+    assert backend.get("cases/users/u1/c1") == b"%PDF-1.7"
+
+    with pytest.raises(FileExistsError):
+        backend.put("cases/users/u1/c1", b"anderer Inhalt")
+    assert backend.get("cases/users/u1/c1") == b"%PDF-1.7"
+
+    backend.delete("cases/users/u1/c1")
+    backend.delete("cases/users/u1/c1")
+    assert not backend.exists("cases/users/u1/c1")
+    with pytest.raises(FileNotFoundError):
+        backend.get("cases/users/u1/c1")
+
+
+def test_local_backend_rejects_keys_outside_its_root(tmp_path):
+    backend = LocalStorageBackend(tmp_path / "storage")
+    with pytest.raises(ValueError):
+        backend.put("../outside", b"data")
+
+
+def test_storage_handler_rejects_duplicate_uploads(tmp_path):
+    storage_handler = StorageHandler(LocalStorageBackend(tmp_path))
+    s3_key, case_id = storage_handler._upload_case_to_s3(BytesIO(b"%PDF-1.7"), "user_1")
+    assert s3_key == f"cases/users/user_1/{case_id}"
+    assert storage_handler._get_case_by_id_from_s3("user_1", case_id) == s3_key
+
+    with pytest.raises(FileExistsError):
+        storage_handler._upload_case_to_s3(BytesIO(b"%PDF-1.7"), "user_1")
+
+    storage_handler._delete_case_from_s3(s3_key)
+    with pytest.raises(FileNotFoundError):
+        storage_handler._get_case_by_id_from_s3("user_1", case_id)
+
+
+def test_content_is_hashed_incrementally():
+    file = BytesIO(b"x" * (3 * HASH_CHUNK_SIZE + 7))
+    storage_handler = StorageHandler(LocalStorageBackend("."))
+    content_hash = storage_handler._generate_content_hash(file)
+    assert content_hash == hashlib.sha256(file.getvalue()).hexdigest()
+    assert file.tell() == 0
+    # Case ids differ per user for the same content
+    assert storage_handler._generate_case_id(
+        "u1", content_hash
+    ) != storage_handler._generate_case_id("u2", content_hash)
+
+
+def test_s3_backend_streams_multipart_upload():
+    backend = S3StorageBackend(bucket="bucket", part_size=5)
+    stubber = Stubber(backend.client)
+    stubber.add_response(
+        "create_multipart_upload",
+        {"UploadId": "upload"},
+        {"Bucket": "bucket", "Key": "key"},
+    )
+    for number, body in enumerate([b"01234", b"56789", b"ab"], start=1):
+        stubber.add_response(
+            "upload_part",
+            {"ETag": f"etag{number}"},
+            {
+                "Bucket": "bucket",
+                "Key": "key",
+                "UploadId": "upload",
+                "PartNumber": number,
+                "Body": body,
+            },
+        )
+    stubber.add_response(
+        "complete_multipart_upload",
+        {},
+        {
+            "Bucket": "bucket",
+            "Key": "key",
+            "UploadId": "upload",
+            "MultipartUpload": {
+                "Parts": [
+                    {"ETag": f"etag{number}", "PartNumber": number}
+                    for number in (1, 2, 3)
+                ]
+            },
+            "IfNoneMatch": "*",
+        },
+    )
+    with stubber:
+        backend.put_stream("key", BytesIO(b"0123456789ab"))
+    stubber.assert_no_pending_responses()
+
+
+def test_s3_backend_aborts_rejected_multipart_upload():
+    backend = S3StorageBackend(bucket="bucket", part_size=5)
+    stubber = Stubber(backend.client)
+    stubber.add_response("create_multipart_upload", {"UploadId": "upload"})
+    stubber.add_response("upload_part", {"ETag": "etag1"})
+    stubber.add_response("upload_part", {"ETag": "etag2"})
+    stubber.add_client_error(
+        "complete_multipart_upload", "PreconditionFailed", http_status_code=412
+    )
+    stubber.add_response("abort_multipart_upload", {})
+    with stubber, pytest.raises(FileExistsError):
+        backend.put_stream("key", BytesIO(b"0123456789"))
+    stubber.assert_no_pending_responses()
+
+
+def test_s3_backend_presigns_size_limited_post(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    backend = S3StorageBackend(bucket="bucket")
+    upload = backend.create_upload_url("cases/users/u1/uploads/x", 100, 60)
+    assert upload["method"] == "POST"
+    assert upload["fields"]["key"] == "cases/users/u1/uploads/x"
+    policy = json.loads(base64.b64decode(upload["fields"]["policy"]))
+    assert ["content-length-range", 1, 100] in policy["conditions"]
+
+
+def test_staged_upload_is_moved_to_its_case_key(tmp_path):
+    backend = LocalStorageBackend(tmp_path)
+    storage_handler = StorageHandler(backend)
+    with pytest.raises(ValueError):
+        storage_handler._get_staged_upload_key("user_1", "../c1")
+
+    staged_key = storage_handler._get_staged_upload_key("user_1", str(uuid.uuid4()))
+    backend.put(staged_key, b"%PDF-1.7")
+    file = BytesIO()
+    storage_handler._download_staged_upload(staged_key, file)
+    assert file.read() == b"%PDF-1.7"
+
+    s3_key, _ = storage_handler._promote_staged_upload(staged_key, "user_1", "c1")
+    assert backend.get(s3_key) == b"%PDF-1.7"
+    assert not backend.exists(staged_key)
+
+    # A second upload of the same case is rejected and stays staged
+    backend.put(staged_key, b"%PDF-1.7")
+    with pytest.raises(FileExistsError):
+        storage_handler._promote_staged_upload(staged_key, "user_1", "c1")
+    assert backend.exists(staged_key)
+    with pytest.raises(FileNotFoundError):
+        storage_handler._download_staged_upload(
+            storage_handler._get_staged_upload_key("user_1", str(uuid.uuid4())),
+            BytesIO(),
+        )
+
+
+def test_local_backend_receives_direct_uploads(tmp_path):
+    backend = LocalStorageBackend(tmp_path)
+    storage_handler = StorageHandler(backend)
+    upload = backend.create_upload_url("cases/users/u1/uploads/x", 8, 60)
+    assert upload["method"] == "PUT"
+    token = upload["url"].rsplit("/", 1)[1]
+
+    with pytest.raises(ValueError):
+        storage_handler._receive_local_upload(token, BytesIO(b"%PDF-1.7 too large"))
+    assert not backend.exists("cases/users/u1/uploads/x")
+    with pytest.raises(ValueError):
+        storage_handler._receive_local_upload(token[:-2], BytesIO(b"%PDF-1.7"))
+
+    assert storage_handler._receive_local_upload(token, BytesIO(b"%PDF-1.7")) == (
+        "cases/users/u1/uploads/x"
+    )
+    assert backend.get("cases/users/u1/uploads/x") == b"%PDF-1.7"
+    with pytest.raises(FileExistsError):
+        storage_handler._receive_local_upload(token, BytesIO(b"%PDF-1.7"))
+
+    expired = backend.create_upload_url("cases/users/u1/uploads/y", 8, -1)["url"]
+    with pytest.raises(ValueError):
+        storage_handler._receive_local_upload(
+            expired.rsplit("/", 1)[1], BytesIO(b"%PDF-1.7")
+        )
@@ -0,0 +1,82 @@
+import pytest
+import requests
+from backend.handler.storage import text_normalizer
+from backend.handler.storage.text_normalizer import normalize_pages
+
+
+def make_page(number, body):
+    return (
+        f"Prüfungsfall OPD – Fall 1\nSeite {number} von 4\n\n{body}\n\n\n"
+        f"- {number} -\nVertraulich\n"
+    )
+
+
+def test_repeated_headers_footers_and_page_numbers_are_removed():
+    pages = [
+        make_page(1, "Der Patient  berichtet über\tSchlafstö-\nrungen."),
+        make_page(2, "Vor- und Nachteile der Ein-\nund Ausgangstür."),
+        make_page(3, "Die Mutter\n\n\n\nist Lehrerin."),
+        make_page(4, "Ende."),
+    ]
+    assert normalize_pages(pages) == [
+        "Der Patient berichtet über Schlafstörungen.\n",
+        "Vor- und Nachteile der Ein-\nund Ausgangstür.\n",
+        "Die Mutter\n\nist Lehrerin.\n",
+        "Ende.\n",
+    ]
+
+
+def test_lines_of_few_pages_are_not_boilerplate():
+    pages = ["Anamnese\nText eins", "Anamnese\nText zwei", "", "Befund"]
+    assert normalize_pages(pages[:2]) == [
+        "Anamnese\nText eins\n",
+        "Anamnese\nText zwei\n",
+    ]
+    # Present on less than half of the pages
+    assert normalize_pages(pages + ["Diagnose"]) == [
+        "Anamnese\nText eins\n",
+        "Anamnese\nText zwei\n",
+        "",
+        "Befund\n",
+        "Diagnose\n",
+    ]
+
+
+def test_only_counting_numbers_are_page_numbers():
+    # A bare number alone, or the same on every page, is content
+    assert normalize_pages(["Geburtsjahr:\n1984"]) == ["Geburtsjahr:\n1984\n"]
+    assert normalize_pages(["Blutdruck\n120", "Puls\n120"]) == [
+        "Blutdruck\n120\n",
+        "Puls\n120\n",
+    ]
+    assert normalize_pages(["Anamnese\n7", "Befund\n8"]) == [
+        "Anamnese\n",
+        "Befund\n",
+    ]
+
+
+def test_token_savings_are_reported():
+    if text_normalizer._get_encoding() is None:
+        pytest.skip("Tokenizer encoding is not available")
+    pages = [make_page(number, "Der Patient berichtet.") for number in range(1, 5)]
+    before = "".join(pages)
+    stats = text_normalizer.normalization_stats(before, "".join(normalize_pages(pages)))
+    assert stats.tokens_after < stats.tokens_before
+    assert stats.characters_after < stats.characters_before
+
+
+def test_failed_tokenizer_download_is_not_retried(monkeypatch):
+    attempts = []
+
+    def get_encoding(name):
+        attempts.append(name)
+        raise requests.exceptions.ConnectionError("offline")
+
+    monkeypatch.setattr(text_normalizer.tiktoken, "get_encoding", get_encoding)
+    text_normalizer._get_encoding.cache_clear()
+    try:
+        assert text_normalizer.count_tokens("Der Patient berichtet.") is None
+        assert text_normalizer.count_tokens("Der Patient berichtet.") is None
+    finally:
+        text_normalizer._get_encoding.cache_clear()
+    assert len(attempts) == 1
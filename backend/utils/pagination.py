@@ -0,0 +1,38 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+"""
+Opaque cursors for keyset pagination.
+
+A cursor holds the sort key values (e.g. created_at and id) of the last row of a page,
+the next page continues strictly after that key.
+"""
+
+
+def encode_cursor(values: list) -> str:
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    try:
+        return [
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else value
+            for value, column in zip(payload, columns)
+        ]
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from backend.config.settings import (
@@ -6,6 +9,8 @@ from backend.config.settings import (
     ARGON2_PARALLELISM,
     ARGON2_HASH_LENGTH,
     ARGON2_SALT_LENGTH,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
 )
 
 # Password hasher setup
@@ -17,6 +22,17 @@ ph = PasswordHasher(
     salt_len=ARGON2_SALT_LENGTH,
 )
 
+# Dedicated pool for Argon2, the C implementation releases the GIL so threads run in parallel.
+# At most PASSWORD_HASH_WORKERS hashes run at once and PASSWORD_HASH_MAX_QUEUE wait for a worker.
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2"
+)
+_admission = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE)
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing pool is saturated"""
+
 
 def hash_password(password: str) -> str:
     return ph.hash(password)
@@ -29,3 +45,27 @@ def verify_password(password: str, hashed_password: str) -> bool:
         return False
     except Exception as e:
         raise e
+
+
+async def _run_in_pool(function, *args):
+    """Run a hashing function in the bounded pool without blocking the event loop"""
+    if not _admission.acquire(blocking=False):
+        raise PasswordHasherBusyError("Password hashing pool is saturated")
+    try:
+        future = _executor.submit(function, *args)
+    except Exception:
+        _admission.release()
+        raise
+    # Release once the hash finished, even if the awaiting request was cancelled
+    future.add_done_callback(lambda _: _admission.release())
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the hashing pool, raises PasswordHasherBusyError when saturated"""
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool, raises PasswordHasherBusyError when saturated"""
+    return await _run_in_pool(verify_password, password, hashed_password)
@@ -44,7 +44,7 @@ const Dashboard = () => {
       }
 
       const data = await response.json();
-      setCases(data);
+      setCases(data.items);
     } catch (err) {
       console.error('Error fetching cases:', err);
       setError(err.message || 'Failed to load your cases. Please try again later.');